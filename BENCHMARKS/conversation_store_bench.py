@@ -0,0 +1,70 @@
+"""
+Fills a TOOLS.SQLite_DS_Converser.ConversationStore with synthetic turns and prints how long
+add_turn() blocks the caller and how long last_turns() and recall() take at that size.
+
+Usage:
+    python -m BENCHMARKS.conversation_store_bench [turns] [database]
+
+turns defaults to 1,000,000. Without a database path a temporary file is used and deleted afterwards;
+pass a path to keep the filled database and rerun only the queries against it.
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from TOOLS.SQLite_DS_Converser import ConversationStore
+
+TOPICS = ["weather in Delhi", "dal with rice", "cricket score", "train to Jaipur", "electricity bill", "guitar chords",
+          "python decorators", "mother's birthday", "gym schedule", "stock market", "monsoon holidays", "Taj Mahal"]
+QUERIES = ["what did I say about the train to Jaipur", "remind me of the guitar chords", "electricity bill",
+           "when is my mother's birthday", "xylophone"]
+
+
+def fill(store: ConversationStore, turns: int) -> None:
+    rng = random.Random(0)
+    blocked = 0.0
+    start = time.perf_counter()
+    for turn in range(turns):
+        topic = rng.choice(TOPICS)
+        user = f"Turn {turn}: tell me something about the {topic}"
+        assistant = f"Here is what I know about the {topic}, number {rng.randrange(10 ** 6)}."
+        before = time.perf_counter()
+        store.add_turn(user, assistant)
+        blocked += time.perf_counter() - before
+    store.flush()
+    elapsed = time.perf_counter() - start
+    print(f"\033[93mStored {turns:,} turns in {elapsed:.1f} s; add_turn() blocked the caller "
+          f"{blocked / turns * 1e6:.1f} µs per turn\033[0m")
+
+
+def measure(name: str, call, repeats: int = 50) -> None:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"\033[92m{name:52s} median {statistics.median(timings):7.2f} ms | p95 {timings[int(repeats * 0.95) - 1]:7.2f} ms\033[0m")
+
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    directory = None if len(sys.argv) > 2 else tempfile.TemporaryDirectory()
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(directory.name, "history.sqlite3")
+
+    store = ConversationStore(path)
+    if store.count() < turns:
+        fill(store, turns - store.count())
+    print(f"{store.count():,} turns, {os.path.getsize(path) / 2 ** 20:.0f} MiB")
+
+    measure("last_turns(10)", lambda: store.last_turns(10))
+    measure("last_turns(200)", lambda: store.last_turns(200))
+    for query in QUERIES:
+        measure(f"recall({query!r})"[:52], lambda: store.recall(query, k=5))
+    store.close()
+    if directory is not None:
+        directory.cleanup()
@@ -0,0 +1,95 @@
+"""
+Replays 500 chat turns through ConversationHistoryManager and deepInfra_TEXT.generate, the way
+main.py drives them, and prints how the request prompt and the live history evolve.
+
+The "legacy" run inserts the system prompt into the caller's history on every call, as the providers
+did before TOOLS.message_builder; the "current" run goes through the real deepInfra_TEXT.generate
+with the HTTP layer replaced by a recorded stream, so no network access is needed.
+
+Usage:
+    python -m BENCHMARKS.prompt_growth_bench [turns] [history_offset]
+
+history_offset defaults to 1000 tokens, as in IMPORTS.py; pass 0 to disable trimming and see the raw growth.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from BENCHMARKS.sse_decoder_bench import replay, synthesize_recording
+from BRAIN.AI.TEXT.API import deepInfra_TEXT
+from PROMPTS import INSTRUCTIONS
+from TOOLS import Alpaca_DS_Converser, http_transport
+from TOOLS.message_builder import prompt_size
+
+SYSTEM_PROMPT = INSTRUCTIONS.human_response_v3_AVA
+RECORDING = synthesize_recording(tokens=40)
+
+
+def legacy_generate(conversation: list, system_prompt: str) -> dict:
+    """The message assembly the providers used to do: the system prompt is inserted into the caller's list."""
+    conversation.insert(0, {"role": "system", "content": system_prompt})
+    return {"messages": conversation}
+
+
+def current_generate(conversation: list, system_prompt: str) -> dict:
+    """Calls the real provider and returns the payload it sent."""
+    sent = {}
+
+    def post(url, **kwargs):
+        sent.update(kwargs["json"])
+        return replay(RECORDING)
+
+    original_post, http_transport.post = http_transport.post, post
+    try:
+        deepInfra_TEXT.generate(conversation, system_prompt=system_prompt, stream=False)
+    finally:
+        http_transport.post = original_post
+    return sent
+
+
+def run(generate, turns: int, history_offset: int) -> list:
+    """Drives the history manager like main.py and returns one sample per turn."""
+    samples = []
+    with tempfile.TemporaryDirectory() as directory:
+        history_manager = Alpaca_DS_Converser.ConversationHistoryManager(os.path.join(directory, "history.jsonl"),
+                                                                        history_offset=history_offset or 10 ** 12)
+        for turn in range(1, turns + 1):
+            speech = f"Question number {turn}: what should I cook tonight?"
+            history_manager.add_message({"role": "user", "content": speech})
+            start = time.perf_counter()
+            payload = generate(history_manager.history, SYSTEM_PROMPT)
+            elapsed = time.perf_counter() - start
+            size = prompt_size(payload["messages"])
+            history_manager.update_file(speech, "Maybe a nice dal with rice.")
+            samples.append({"turn": turn, "characters": size["characters"], "payload_bytes": len(json.dumps(list(payload["messages"]))),
+                            "system_messages": sum(m["role"] == "system" for m in history_manager.history),
+                            "chat_messages": sum(m["role"] != "system" for m in history_manager.history), "seconds": elapsed})
+        history_manager.log.close()
+    return samples
+
+
+def summarize(name: str, samples: list, color: str) -> None:
+    print(f"{color}{name}\033[0m")
+    print("   turn | prompt chars | payload bytes | system msgs in history | chat msgs in history")
+    for sample in samples:
+        if sample["turn"] in (1, 10, 50, 100, 250, 500) or sample is samples[-1]:
+            print(f"{color}  {sample['turn']:5d} | {sample['characters']:12d} | {sample['payload_bytes']:13d} | "
+                  f"{sample['system_messages']:22d} | {sample['chat_messages']:20d}\033[0m")
+
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    history_offset = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    legacy = run(legacy_generate, turns, history_offset)
+    current = run(current_generate, turns, history_offset)
+    summarize("Legacy: system prompt inserted into the history", legacy, "\033[93m")
+    summarize("Current: messages assembled by TOOLS.message_builder", current, "\033[92m")
+
+    first, last = current[0]["characters"], current[-1]["characters"]
+    steady = max(sample["characters"] for sample in current[len(current) // 10:])
+    print(f"Current prompt: {first} chars on turn 1, {last} on turn {turns}, at most {steady} after warm-up")
+    assert all(sample["system_messages"] == 0 for sample in current), "A system prompt leaked into the history"
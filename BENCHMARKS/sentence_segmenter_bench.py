@@ -0,0 +1,72 @@
+"""
+Streams a long (4,000-token) response token by token through the old "re.split the whole partial
+sentence on every token" loop and through TOOLS.sentence_segmenter, and prints the time taken.
+
+Usage:
+    python -m BENCHMARKS.sentence_segmenter_bench [tokens]
+"""
+
+import re
+import sys
+import time
+
+from TOOLS.sentence_segmenter import SentenceSegmenter
+
+PARAGRAPH = ("India is the seventh largest country by area and the most populous democracy in the world. "
+             "Dr. A. P. J. Abdul Kalam served as its 11th President from 2002 to 2007. "
+             "Its economy grew by 7.2 percent last year, e.g. services grew faster than manufacturing! "
+             "भारत एक विशाल देश है। इसकी राजधानी नई दिल्ली है। ")
+
+
+def tokens(count: int):
+    """Splits a long response into word-sized tokens, the way LLM APIs stream them."""
+    words = re.findall(r"\S+\s*", PARAGRAPH)
+    return [words[i % len(words)] for i in range(count)]
+
+
+def old_segmenter(stream):
+    """The loop STREAM/deepInfra_TEXT._stream_response and STREAM/basedGPT.generate used to run."""
+    sentences, partial_sentence = [], ""
+    for data_chunk in stream:
+        partial_sentence += data_chunk
+        parts = re.split(r'(?<!\b\w\.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', partial_sentence)
+        sentences += [s.strip() for s in parts[:-1]]
+        partial_sentence = parts[-1]
+    return sentences + ([partial_sentence.strip()] if partial_sentence else [])
+
+
+def new_segmenter(stream):
+    segmenter = SentenceSegmenter()
+    sentences = []
+    for data_chunk in stream:
+        sentences += segmenter.feed(data_chunk)
+    return sentences + segmenter.flush()
+
+
+def old_segmenter_no_boundaries(stream):
+    """Worst case for the old loop: a response without sentence boundaries is re-scanned on every token."""
+    return old_segmenter(s.replace(".", ",").replace("?", ",").replace("।", ",") for s in stream)
+
+
+def new_segmenter_no_boundaries(stream):
+    return new_segmenter(s.replace(".", ",").replace("?", ",").replace("।", ",") for s in stream)
+
+
+def measure(segmenter, stream, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        segmenter(stream)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    stream = tokens(count)
+    print(f"Response: {count} tokens, {sum(map(len, stream))} characters, {len(new_segmenter(stream))} sentences")
+    for label, old, new in (("with sentences", old_segmenter, new_segmenter),
+                            ("without boundaries", old_segmenter_no_boundaries, new_segmenter_no_boundaries)):
+        before, after = measure(old, stream), measure(new, stream)
+        print(f"\033[93m{label:>20} | re.split per token: {before * 1000:8.2f} ms\033[0m")
+        print(f"\033[92m{label:>20} | SentenceSegmenter : {after * 1000:8.2f} ms  ({before / after:.1f}x)\033[0m")
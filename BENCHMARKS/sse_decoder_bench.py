@@ -0,0 +1,88 @@
+"""
+Replays a recorded 2,000-token chat completion stream through the old per-byte iter_lines parser
+and through TOOLS.sse_decoder, and prints the CPU time spent per token by each.
+
+Usage:
+    python -m BENCHMARKS.sse_decoder_bench [recorded_stream.sse]
+
+Without an argument a DeepInfra-style recording with 2,000 deltas is synthesized.
+"""
+
+import io
+import json
+import sys
+import time
+
+import requests
+from urllib3.response import HTTPResponse
+
+from TOOLS.sse_decoder import iter_deltas
+
+WORDS = ("The Taj Mahal is an ivory-white marble mausoleum on the right bank of the river Yamuna in Agra, "
+         "commissioned in 1631 by the Mughal emperor Shah Jahan to house the tomb of his favourite wife.").split()
+
+
+def synthesize_recording(tokens: int = 2000) -> bytes:
+    """Builds a stream shaped like the one api.deepinfra.com sends, one delta per event."""
+    events = []
+    for i in range(tokens):
+        chunk = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": 1726000000,
+                 "model": "meta-llama/Meta-Llama-3.1-405B-Instruct",
+                 "choices": [{"index": 0, "delta": {"role": "assistant", "content": " " + WORDS[i % len(WORDS)]}, "finish_reason": None}]}
+        events.append(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+    events.append(b"data: [DONE]\n\n")
+    return b"".join(events)
+
+
+def replay(recording: bytes) -> requests.Response:
+    """Wraps a recording in a streamed requests.Response, as requests.post(..., stream=True) returns."""
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    response.raw = HTTPResponse(body=io.BytesIO(recording), preload_content=False, decode_content=False)
+    return response
+
+
+def old_parser(response: requests.Response) -> str:
+    """The loop deepInfra_TEXT.generate used before the shared decoder."""
+    full_response = ""
+    for line in response.iter_lines(decode_unicode=True, chunk_size=1):
+        if line.startswith("data:"):
+            try:
+                content = json.loads(line[5:])
+                if content != "[DONE]":
+                    delta_content = content.get("choices", [{}])[0].get("delta", {}).get("content")
+                    if delta_content:
+                        full_response += delta_content
+            except:
+                continue
+    return full_response
+
+
+def new_parser(response: requests.Response) -> str:
+    return "".join(iter_deltas(response))
+
+
+def measure(parser, recording: bytes, repeats: int = 5) -> float:
+    """Returns the best CPU time of a full replay."""
+    best = float("inf")
+    for _ in range(repeats):
+        response = replay(recording)
+        start = time.process_time()
+        parser(response)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+if __name__ == "__main__":
+    recording = open(sys.argv[1], "rb").read() if len(sys.argv) > 1 else synthesize_recording()
+    tokens = recording.count(b"\ndata:") + recording.startswith(b"data:") - recording.count(b"[DONE]")
+
+    assert old_parser(replay(recording)) == new_parser(replay(recording)), "Parsers disagree on the decoded text"
+
+    before = measure(old_parser, recording)
+    after = measure(new_parser, recording)
+    print(f"Stream: {len(recording) / 1024:.1f} KiB, {tokens} tokens")
+    print(f"\033[93miter_lines(chunk_size=1): {before / tokens * 1e6:8.2f} µs CPU per token\033[0m")
+    print(f"\033[92mSSEDecoder             : {after / tokens * 1e6:8.2f} µs CPU per token\033[0m")
+    print(f"Speed-up: {before / after:.1f}x")
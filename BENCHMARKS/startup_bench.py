@@ -0,0 +1,91 @@
+"""
+Measures how long `import IMPORTS` takes, i.e. the time until main.py can start listening
+(excluding the browser, which the listener launches in the background), and which modules
+that time is spent on, using `python -X importtime`. Every run is appended to
+BENCHMARKS/results/startup.jsonl so regressions show up against earlier runs.
+
+Usage:
+    python -m BENCHMARKS.startup_bench [runs] [top]
+"""
+
+import datetime
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+RESULTS_FILE = "BENCHMARKS/results/startup.jsonl"
+TARGET_MS = 1000
+
+CHILD = ("import time; start = time.perf_counter(); import IMPORTS; "
+         "print('READY_MS', (time.perf_counter() - start) * 1000)")
+
+
+def run_once() -> Tuple[float, Dict[str, float]]:
+    """
+    Imports IMPORTS in a fresh interpreter.
+
+    Returns:
+        Tuple[float, Dict[str, float]]: Time until ready (ms) and the cumulative import time (ms)
+                                        of every imported module.
+    """
+    child = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD], capture_output=True, text=True,
+                           env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    ready = [line for line in child.stdout.splitlines() if line.startswith("READY_MS")]
+    if not ready:
+        raise RuntimeError(child.stderr.strip().splitlines()[-1] if child.stderr.strip() else "import IMPORTS failed")
+
+    modules: Dict[str, float] = {}
+    for line in child.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # The nesting in the output is unreliable while the background warm-up imports in parallel,
+        # so every module is listed with its own cumulative time (parents include their children)
+        if cumulative.strip().isdigit() and name.strip() != "IMPORTS":
+            modules[name.strip()] = int(cumulative) / 1000
+    return float(ready[0].split()[1]), modules
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def previous_runs() -> List[dict]:
+    if not os.path.exists(RESULTS_FILE):
+        return []
+    with open(RESULTS_FILE, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    results = [run_once() for _ in range(runs)]
+    ready_ms = sorted(ready for ready, _ in results)
+    median = ready_ms[len(ready_ms) // 2]
+    # The breakdown of the median run
+    modules = next(modules for ready, modules in results if ready == median)
+    slowest = sorted(modules.items(), key=lambda item: -item[1])[:top]
+
+    print(f"{'module':<48}{'cumulative ms':>14}")
+    for name, ms in slowest:
+        print(f"{name:<48}{ms:>14.1f}")
+    colour = "\033[92m" if median < TARGET_MS else "\033[91m"
+    print(f"{colour}Ready to listen after {median:.0f} ms (median of {runs}, min {ready_ms[0]:.0f} ms, target {TARGET_MS} ms)\033[0m")
+
+    history = previous_runs()
+    if history:
+        last = history[-1]
+        print(f"Previous run ({last['date']}, {last['commit']}): {last['ready_ms']:.0f} ms ({median - last['ready_ms']:+.0f} ms)")
+
+    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+    with open(RESULTS_FILE, "a", encoding="utf-8") as file:
+        file.write(json.dumps({"date": datetime.datetime.now().isoformat(timespec="seconds"), "commit": git_commit(),
+                               "python": sys.version.split()[0], "runs": runs, "ready_ms": round(median, 1),
+                               "top": [[name, round(ms, 1)] for name, ms in slowest]}) + "\n")
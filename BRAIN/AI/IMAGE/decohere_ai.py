@@ -1,4 +1,4 @@
-import requests
+from TOOLS import http_transport
 import base64
 from typing import Tuple, Optional
 import os
@@ -44,7 +44,7 @@ def generate(prompt: str, seed: int=1800647681, width: int=1024, height: int=576
     }
 
     # Make the POST request to the API
-    response = requests.post(url, headers=headers, json=payload)
+    response = http_transport.post(url, headers=headers, json=payload)
 
     # Check the response status code
     if response.status_code == 200:
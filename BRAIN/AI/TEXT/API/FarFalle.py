@@ -1,7 +1,8 @@
 import requests
 import json
-import re
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
+from TOOLS.sse_decoder import aiter_payloads, iter_payloads
+from TOOLS import http_transport
 
 class FarFalle:
     """A class to interact with the FarFalle chat service.
@@ -11,10 +12,15 @@ class FarFalle:
         url: The URL endpoint for the FarFalle chat service.
     """
 
-    def __init__(self):
-        """Initializes the FarFalle class with a session and the service URL."""
+    def __init__(self, max_concurrent: int = 4):
+        """Initializes the FarFalle class with a session and the service URL.
+
+        Args:
+            max_concurrent: Maximum number of agenerate() requests in flight at once. Defaults to 4.
+        """
         self.session: requests.Session = requests.Session()
         self.url: str = "https://farfalle.onrender.com/chat"
+        self.max_concurrent: int = max_concurrent
 
     def generate(self, conversation_history: List[Dict[str, str]], model: Optional[str] = 'llama-3-70b', stream: Optional[bool] = False) -> tuple[str, dict]:
         """Generates a response from the FarFalle chat service.
@@ -40,22 +46,62 @@ class FarFalle:
             "model": model
         }
 
-        content = ""
+        content = []
         sources = {}
         # Make the POST request and stream the response
         response = self.session.post(self.url, json=payload, stream=True)
-        for line in response.iter_lines(decode_unicode=True, chunk_size=1):
-            if line:
-                modified_line = re.sub("data:", "", line)
-                try:
-                    json_data = json.loads(modified_line)
-                    if not sources:
-                        sources = json_data
-                    content += json_data['data']['text']
-                    if stream:
-                        print(json_data['data']['text'], end="", flush=True)
-                except: continue
-        return content, sources
+        for data in iter_payloads(response):
+            try:
+                json_data = json.loads(data)
+                if not sources:
+                    sources = json_data
+                content.append(json_data['data']['text'])
+                if stream:
+                    print(json_data['data']['text'], end="", flush=True)
+            except: continue
+        return "".join(content), sources
+
+    async def agenerate(self, conversation_history: List[Dict[str, str]], model: Optional[str] = 'llama-3-70b', sources: Optional[dict] = None) -> AsyncIterator[str]:
+        """Async counterpart of generate() that yields the response text as it arrives.
+
+        The request runs on the event loop's shared httpx client, with at most max_concurrent
+        requests to FarFalle in flight at once.
+
+        Args:
+            conversation_history: A list of dictionaries containing the conversation history. It is not modified.
+            model: The model name to use for generating the response. Defaults to 'llama-3-70b'.
+            sources: An optional dictionary that is filled with the sources event, for process_sources().
+
+        Yields:
+            The text deltas of the response. Raises httpx.HTTPError if the request fails.
+        """
+        # Send the last user message as the query and everything else as the history
+        last_user = next((i for i in range(len(conversation_history) - 1, -1, -1) if conversation_history[i]['role'] == 'user'), None)
+        if last_user is None:
+            query, history = '', list(conversation_history)
+        else:
+            query, history = conversation_history[last_user]['content'], conversation_history[:last_user] + conversation_history[last_user + 1:]
+        payload = {
+            "query": query,
+            "history": history,
+            "model": model
+        }
+
+        sources_received = False
+        async with http_transport.semaphore("farfalle", self.max_concurrent):
+            async with http_transport.async_client().stream("POST", self.url, json=payload) as response:
+                response.raise_for_status()
+                async for data in aiter_payloads(response):
+                    try:
+                        json_data = json.loads(data)
+                        if not sources_received:
+                            sources_received = True
+                            if sources is not None:
+                                sources.update(json_data)
+                        text = json_data['data']['text']
+                    except: continue
+                    if text:
+                        yield text
 
     def process_sources(self, sources: dict) -> tuple[List[Dict[str, str]], List[str]]:
         """Processes the sources dictionary to extract relevant information.
@@ -1,10 +1,46 @@
 import os
+from typing import AsyncIterator
 from huggingface_hub import InferenceClient
 from dotenv import load_dotenv
+from TOOLS.sse_decoder import aiter_deltas
+from TOOLS import http_transport
+from TOOLS.response_cache import cached
 
 # Load environment variables from .env file
 load_dotenv()
 
+END_TOKENS = ("<|end|>", "<|endoftext|>", "[END]", "<|eot_id|>", "</s>")
+MAX_CONCURRENT_REQUESTS = 4
+
+def format_prompt(prompt: str, system_prompt: str, chat_template: str = "mistral") -> str:
+    """
+    Formats the system prompt and the user prompt with the chat template of the model.
+
+    Args:
+        - prompt (str): The user prompt.
+        - system_prompt (str): The system prompt.
+        - chat_template (str): One of "mistral", "gemma", "helping ai"; anything else uses a plain markdown layout.
+
+    Returns:
+        str: The prompt to send to the text-generation endpoint.
+    """
+    if chat_template == "mistral":
+        return f"[INST] {system_prompt} [/INST][INST] {prompt} [/INST]"
+    elif chat_template == "gemma":
+        return f"<bos><start_of_turn>system{system_prompt}<end_of_turn><start_of_turn>user{prompt}<end_of_turn><start_of_turn>model"
+    elif chat_template == "helping ai":
+        return f"<|im_start|>system: {system_prompt}\n<|im_end|>\n<|im_start|>user: {prompt}\n<|im_end|>\n<|im_start|>assistant:"
+    else:
+        return f"**Instructions**\n{system_prompt}\n\n **User**\n{prompt}\n\n**Assistant: **"
+
+def _token_text(event: dict):
+    """Extracts the text of a text-generation-inference stream event, skipping special tokens."""
+    token = event.get("token") or {}
+    if token.get("special") or token.get("text") in END_TOKENS:
+        return None
+    return token.get("text")
+
+@cached("huggingface")
 def generate(
     prompt: str, 
     model: str = "microsoft/Phi-3-mini-4k-instruct", 
@@ -46,14 +82,7 @@ def generate(
     headers = {"Authorization": f"Bearer {os.environ.get('HUGGING_FACE_READ')}"}
     client = InferenceClient(api_url, headers=headers)
 
-    if chat_template == "mistral":
-        formatted_prompt = f"[INST] {system_prompt} [/INST][INST] {prompt} [/INST]"
-    elif chat_template == "gemma":
-        formatted_prompt = f"<bos><start_of_turn>system{system_prompt}<end_of_turn><start_of_turn>user{prompt}<end_of_turn><start_of_turn>model"
-    elif chat_template == "helping ai":
-        formatted_prompt = f"<|im_start|>system: {system_prompt}\n<|im_end|>\n<|im_start|>user: {prompt}\n<|im_end|>\n<|im_start|>assistant:"
-    else:
-        formatted_prompt = f"**Instructions**\n{system_prompt}\n\n **User**\n{prompt}\n\n**Assistant: **"
+    formatted_prompt = format_prompt(prompt, system_prompt, chat_template)
 
     try:
         response = ""
@@ -80,14 +109,64 @@ def generate(
         )
 
     # Clean the response from potential end-of-text tokens
-    response = response.replace("<|end|>", "")
-    response = response.replace("<|endoftext|>", "")
-    response = response.replace("[END]", "")
-    response = response.replace("<|eot_id|>", "")
-    response = response.replace("</s>", "").strip()
+    for token in END_TOKENS:
+        response = response.replace(token, "")
+    response = response.strip()
 
     return response
 
+async def agenerate(
+    prompt: str, 
+    model: str = "microsoft/Phi-3-mini-4k-instruct", 
+    system_prompt: str = "Keep your response short and concise.", 
+    temperature: float = 0.9, 
+    max_new_tokens: int = 512, 
+    top_p: float = 0.95, 
+    repetition_penalty: float = 1.0, 
+    chat_template: str = "mistral",
+    max_concurrent: int = MAX_CONCURRENT_REQUESTS
+) -> AsyncIterator[str]:
+    """
+    Async counterpart of generate() that yields the generated tokens as they arrive.
+
+    The text-generation-inference stream is requested directly on the event loop's shared httpx client
+    instead of through InferenceClient, and at most max_concurrent requests to the Inference API are
+    in flight at once. Only models served by text-generation-inference support streaming.
+
+    Parameters:
+        - prompt (str): The input text prompt to generate text from.
+        - model (str): The name of the model on Hugging Face.
+        - system_prompt (str): The system prompt to guide the generation process.
+        - temperature (float): Controls the randomness of the generated text.
+        - max_new_tokens (int): The maximum number of tokens to generate in the output text.
+        - top_p (float): A nucleus sampling parameter.
+        - repetition_penalty (float): Penalty applied to the likelihood of tokens already generated.
+        - chat_template (str): The chat template of the model, see format_prompt().
+        - max_concurrent (int): The in-flight request cap of the provider, fixed by the first call on a loop.
+
+    Yields:
+        str: The generated tokens, without special tokens. Raises httpx.HTTPError if the request fails.
+    """
+    api_url = f"https://api-inference.huggingface.co/models/{model}"
+    headers = {"Authorization": f"Bearer {os.environ.get('HUGGING_FACE_READ')}"}
+    payload = {
+        "inputs": format_prompt(prompt, system_prompt, chat_template),
+        "parameters": {
+            "temperature": temperature,
+            "max_new_tokens": max_new_tokens,
+            "top_p": top_p,
+            "repetition_penalty": repetition_penalty,
+            "do_sample": True,
+        },
+        "stream": True,
+    }
+
+    async with http_transport.semaphore("huggingface", max_concurrent):
+        async with http_transport.async_client().stream("POST", api_url, headers=headers, json=payload) as response:
+            response.raise_for_status()
+            async for token in aiter_deltas(response, extract=_token_text):
+                yield token
+
 # Example usage
 if __name__ == "__main__":
     import time
@@ -1,8 +1,8 @@
-import requests
-import re
-import json
+from TOOLS.sse_decoder import iter_deltas
+from TOOLS import http_transport
+from TOOLS.message_builder import build_messages
 
-def generate(prompt: dict, system_prompt: str = "Be Helpful and Friendly", model: str = "Phind Instant", stream_chunk_size: int = 12, stream: bool = True) -> str:
+def generate(prompt: dict, system_prompt: str = "Be Helpful and Friendly", model: str = "Phind Instant", stream_chunk_size: int = 65536, stream: bool = True) -> str:
     """
     Generates a response from the Phind Instant model based on the given prompt.
 
@@ -13,7 +13,7 @@ def generate(prompt: dict, system_prompt: str = "Be Helpful and Friendly", model
                                         Available Models: 
                                             - "Phind-34B"
                                             - "Phind Instant"
-    - stream_chunk_size (int, optional): The number of bytes to read from the response stream. Defaults to 64.
+    - stream_chunk_size (int, optional): The maximum number of bytes to read from the response stream at once. Defaults to 65536.
     - stream (bool, optional): Whether to stream the response. Defaults to True.
                                             
     Returns:
@@ -26,33 +26,26 @@ def generate(prompt: dict, system_prompt: str = "Be Helpful and Friendly", model
     """
 
     headers = {"User-Agent": ""}
-    # Insert the system prompt at the beginning of the conversation history
-    prompt.insert(0, {"content": system_prompt, "role": "system"})
     payload = {
         "additional_extension_context": "",
         "allow_magic_buttons": True,
         "is_vscode_extension": True,
-        "message_history": prompt,
+        "message_history": build_messages(prompt, system_prompt),
         "requested_model": model,
         "user_input": prompt[-1]["content"],
     }
 
     # Send POST request and stream response
     chat_endpoint = "https://https.extension.phind.com/agent/"
-    response = requests.post(chat_endpoint, headers=headers, json=payload, stream=True)
+    response = http_transport.post(chat_endpoint, headers=headers, json=payload, stream=True)
 
     # Collect streamed text content
-    streaming_text = ""
-    for value in response.iter_lines(decode_unicode=True, chunk_size=stream_chunk_size):
-        modified_value = re.sub("data:", "", value)
-        if modified_value:
-            json_modified_value = json.loads(modified_value)
-            try:
-                if stream: print(json_modified_value["choices"][0]["delta"]["content"], end="")
-                streaming_text += json_modified_value["choices"][0]["delta"]["content"]
-            except: continue
-
-    return streaming_text
+    streaming_text = []
+    for delta in iter_deltas(response, buffer_size=stream_chunk_size):
+        if stream: print(delta, end="")
+        streaming_text.append(delta)
+
+    return "".join(streaming_text)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import requests
 from typing import Optional, Dict, List
 import time
+from TOOLS.message_builder import build_messages
 
 def generate(
         conversation_history: List[Dict[str, str]],
@@ -20,10 +21,7 @@ def generate(
 
     url = "https://www.basedgpt.chat/api/chat"
 
-    if system_prompt:
-        conversation_history.insert(0, {"role": "system", "content": system_prompt})
-
-    payload = {"messages": conversation_history}
+    payload = {"messages": build_messages(conversation_history, system_prompt)}
 
     response = requests.post(url, json=payload, stream=True)
     complete_response = ""
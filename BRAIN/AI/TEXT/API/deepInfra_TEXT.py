@@ -1,7 +1,39 @@
-import json
+import collections
 import requests
-from typing import Union, List, Dict
-
+from typing import AsyncIterator, Union, List, Dict, Optional, Callable
+from TOOLS.sse_decoder import aiter_deltas, iter_deltas
+from TOOLS import http_transport
+from TOOLS.cancellation import CancelToken, abort_response
+from TOOLS.message_builder import build_messages
+from TOOLS.response_cache import cached
+
+API_URL = "https://api.deepinfra.com/v1/openai/chat/completions"
+
+HEADERS = {
+    "Accept": "text/event-stream",
+    "Accept-Encoding": "gzip, deflate, br, zstd",
+    "Accept-Language": "en-US,en;q=0.9,hi;q=0.8",
+    "Connection": "keep-alive",
+    "Content-Type": "application/json",
+    "Dnt": "1",
+    "Host": "api.deepinfra.com",
+    "Origin": "https://deepinfra.com",
+    "Referer": "https://deepinfra.com/",
+    "Sec-Ch-Ua": "\"Google Chrome\";v=\"125\", \"Chromium\";v=\"125\", \"Not.A/Brand\";v=\"24\"",
+    "Sec-Ch-Ua-Mobile": "?0",
+    "Sec-Ch-Ua-Platform": "\"Windows\"",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-site",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
+    "X-Deepinfra-Source": "web-page",
+}
+
+# Hop-by-hop and encoding headers are left to httpx, which negotiates them itself (and rejects them over HTTP/2)
+ASYNC_HEADERS = {key: value for key, value in HEADERS.items() if key not in ("Accept-Encoding", "Connection", "Host")}
+MAX_CONCURRENT_REQUESTS = 8
+
+@cached("deepinfra")
 def generate(
     conversation: Union[str, List[Dict[str, str]]],
     model: str = 'meta-llama/Meta-Llama-3.1-405B-Instruct',
@@ -9,7 +41,10 @@ def generate(
     max_tokens: int = 512,
     temperature: float = 0.7,
     stream: bool = True,
-    chunk_size: int = 1
+    chunk_size: int = 65536,
+    stop: Optional[List[str]] = None,
+    until: Optional[Callable[[str], bool]] = None,
+    cancel_token: Optional[CancelToken] = None
 ) -> Union[str, None]:
     """
     Generates responses using various large language models (LLMs) for conversational interactions.
@@ -21,7 +56,12 @@ def generate(
         max_tokens (int): The maximum number of tokens to be generated.
         temperature (float): The randomness of the LLM's output.
         stream (bool): Whether to stream the response from the LLM.
-        chunk_size (int): The size of chunks to be streamed from the LLM.
+        chunk_size (int): The maximum number of bytes read from the response stream at once.
+        stop (Optional[List[str]]): Stop sequences at which the server ends the generation.
+        until (Optional[Callable[[str], bool]]): Called with the text received so far; once it returns True
+                                                  the stream is closed early, e.g. as soon as a JSON verdict is complete.
+        cancel_token (Optional[CancelToken]): Aborts the request when cancelled, e.g. once a speculative answer is
+                                              no longer needed; the call then returns None.
 
     Models:
             - "meta-llama/Meta-Llama-3.1-405B-Instruct"
@@ -45,71 +85,107 @@ def generate(
     Returns:
         Union[str, None]: The LLM's response if successful, otherwise None.
     """
-    API_URL = "https://api.deepinfra.com/v1/openai/chat/completions"
-    
-    headers = {
-        "Accept": "text/event-stream",
-        "Accept-Encoding": "gzip, deflate, br, zstd",
-        "Accept-Language": "en-US,en;q=0.9,hi;q=0.8",
-        "Connection": "keep-alive",
-        "Content-Type": "application/json",
-        "Dnt": "1",
-        "Host": "api.deepinfra.com",
-        "Origin": "https://deepinfra.com",
-        "Referer": "https://deepinfra.com/",
-        "Sec-Ch-Ua": "\"Google Chrome\";v=\"125\", \"Chromium\";v=\"125\", \"Not.A/Brand\";v=\"24\"",
-        "Sec-Ch-Ua-Mobile": "?0",
-        "Sec-Ch-Ua-Platform": "\"Windows\"",
-        "Sec-Fetch-Dest": "empty",
-        "Sec-Fetch-Mode": "cors",
-        "Sec-Fetch-Site": "same-site",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-        "X-Deepinfra-Source": "web-page",
-    }
-
-    if isinstance(conversation, str):
-        conversation = [{"role": "user", "content": conversation}]
-    elif not isinstance(conversation, list):
+    if not isinstance(conversation, (str, list, tuple, collections.deque)):
         raise ValueError("Conversation must be either a string or a list of dictionaries")
 
-    conversation.insert(0, {"role": "system", "content": system_prompt})
-
     payload = {
         "model": model,
-        "messages": conversation,
+        "messages": build_messages(conversation, system_prompt),
         "temperature": temperature,
         "max_tokens": max_tokens,
-        "stop": [],
+        "stop": stop or [],
         "stream": True
     }
 
+    if cancel_token is not None and cancel_token.is_cancelled:
+        return None
+    unregister = lambda: None
     try:
-        response = requests.post(API_URL, headers=headers, json=payload, stream=True)
+        response = http_transport.post(API_URL, headers=HEADERS, json=payload, stream=True)
+        if cancel_token is not None:
+            unregister = cancel_token.add_callback(lambda: abort_response(response))
         response.raise_for_status()
         
-        full_response = ""
-        for line in response.iter_lines(decode_unicode=True, chunk_size=chunk_size):
-            if line.startswith("data:"):
-                try:
-                    content = json.loads(line[5:])
-                    if content != "[DONE]":
-                        delta_content = content.get("choices", [{}])[0].get("delta", {}).get("content")
-                        if delta_content:
-                            if stream:
-                                print(delta_content, end="", flush=True)
-                            full_response += delta_content
-
-                except:
-                    continue
-        
-        return full_response.strip()
+        response_parts = []
+        for delta_content in iter_deltas(response, buffer_size=chunk_size):
+            if cancel_token is not None and cancel_token.is_cancelled:
+                break
+            if stream:
+                print(delta_content, end="", flush=True)
+            response_parts.append(delta_content)
+
+            if until is not None and until("".join(response_parts)):
+                response.close()
+                break
+
+        if cancel_token is not None and cancel_token.is_cancelled:
+            response.close()
+            return None
+        return "".join(response_parts).strip()
     
     except requests.RequestException as e:
+        if cancel_token is not None and cancel_token.is_cancelled:
+            return None
         print(f"Error occurred during API request: {e}")
         if hasattr(e.response, 'text'):
             print(f"Response content: {e.response.text}")
         return None
 
+    except Exception:
+        # Shutting the socket down from the cancelling thread can surface as a raw urllib3 error
+        if cancel_token is not None and cancel_token.is_cancelled:
+            return None
+        raise
+
+    finally:
+        unregister()
+
+async def agenerate(
+    conversation: Union[str, List[Dict[str, str]]],
+    model: str = 'meta-llama/Meta-Llama-3.1-405B-Instruct',
+    system_prompt: str = "Be helpful and friendly. Keep your response straightforward, short, and concise.",
+    max_tokens: int = 512,
+    temperature: float = 0.7,
+    stop: Optional[List[str]] = None,
+    max_concurrent: int = MAX_CONCURRENT_REQUESTS
+) -> AsyncIterator[str]:
+    """
+    Async counterpart of generate() that yields the response deltas as they arrive.
+
+    The request runs on the event loop's shared httpx client, so many conversations can stream at once
+    on one thread; at most max_concurrent of them hold a DeepInfra request at a time, the rest wait
+    for a free slot. The conversation list is not modified.
+
+    Args:
+        conversation (Union[str, List[Dict[str, str]]]): A single user query or conversation history.
+        model (str): The identifier of the LLM to be used.
+        system_prompt (str): The initial system message to guide the conversation.
+        max_tokens (int): The maximum number of tokens to be generated.
+        temperature (float): The randomness of the LLM's output.
+        stop (Optional[List[str]]): Stop sequences at which the server ends the generation.
+        max_concurrent (int): The in-flight request cap of the provider, fixed by the first call on a loop.
+
+    Yields:
+        str: The text deltas of the response. Raises httpx.HTTPError if the request fails.
+    """
+    if not isinstance(conversation, (str, list, tuple, collections.deque)):
+        raise ValueError("Conversation must be either a string or a list of dictionaries")
+
+    payload = {
+        "model": model,
+        "messages": build_messages(conversation, system_prompt),
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stop": stop or [],
+        "stream": True
+    }
+
+    async with http_transport.semaphore("deepinfra", max_concurrent):
+        async with http_transport.async_client().stream("POST", API_URL, headers=ASYNC_HEADERS, json=payload) as response:
+            response.raise_for_status()
+            async for delta in aiter_deltas(response):
+                yield delta
+
 if __name__ == "__main__":
     # Example usage with a single query
     single_query = "What is the capital of France?"
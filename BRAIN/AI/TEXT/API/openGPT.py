@@ -7,6 +7,8 @@ from typing import List, Dict, Optional
 import requests
 from dotenv import load_dotenv
 
+from TOOLS.message_builder import build_messages
+
 load_dotenv()
 
 
@@ -248,12 +250,9 @@ class ConversationalAgent:
             The complete response generated by the GPT model.
         """
 
-        if system_message:
-            conversation_history.insert(0, {"content": system_message, "type": "system"})
-
         headers = {"Cookie": f"opengpts_user_id={self.user_id}"}
         payload = {
-            "input": conversation_history,
+            "input": build_messages(conversation_history, system_message, role_key="type"),
             "assistant_id": self.assistant_id,
             "thread_id": str(uuid.uuid4()),
         }
@@ -333,7 +332,7 @@ def generate(
                              Each dictionary should have "content" and "type" keys,
                              where "type" is either "user" or "assistant".
         system_prompt: An optional system prompt to guide the AI's behavior.
-                      This prompt is added at the beginning of the conversation history.
+                      This prompt is sent before the conversation history, which is not modified.
         assistant_id: The ID of the assistant to use for the conversation.
         user_id: The ID of the user engaging in the conversation.
 
@@ -341,17 +340,13 @@ def generate(
         The final response generated by the GPT model.
     """
 
-    # Add the system prompt to the beginning of the conversation history
-    if system_prompt:
-        conversation_history.insert(0, {"content": system_prompt, "type": "system"})
-
     # Define the API endpoint and headers
     api_endpoint = "https://opengpts-example-vz4y4ooboq-uc.a.run.app/runs/stream"
     headers = {"Cookie": F"opengpts_user_id={user_id}"}
 
     # Construct the request payload
     payload = {
-        "input": conversation_history,
+        "input": build_messages(conversation_history, system_prompt, role_key="type"),
         "assistant_id": assistant_id,
         "thread_id": str(uuid.uuid4()),
     }
@@ -1,12 +1,19 @@
 import requests
 import json
 import os
-import re
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
+from TOOLS.sse_decoder import aiter_deltas, iter_deltas
+from TOOLS import http_transport
+from TOOLS.message_builder import build_messages
+from TOOLS.response_cache import cached
 
 load_dotenv()  # Load environment variables from .env file
 
+API_URL = "https://openrouter.ai/api/v1/chat/completions"
+MAX_CONCURRENT_REQUESTS = 4
+
+@cached("openrouter", valid=lambda response: bool(response) and not response.startswith("Failed to Get Response"))
 def generate(
     conversation_history: List[Dict[str, str]],
     system_prompt: Optional[str] = "You are a helpful and friendly AI assistant.",
@@ -21,14 +28,14 @@ def generate(
 ) -> str:
     """
     Sends a request to the OpenRouter API and returns the generated text using the specified model.
-    The system prompt is added at the beginning of the conversation history to guide the AI's behavior.
+    The system prompt is sent before the conversation history to guide the AI's behavior; the history itself is not modified.
 
     Args:
         conversation_history: A list of dictionaries representing the conversation history.
                               Each dictionary should have "content" and "role" keys,
                               where "role" is either "system" or "user".
         system_prompt: An optional system prompt to guide the AI's behavior.
-                       This prompt is added at the beginning of the conversation history.
+                       This prompt is sent before the conversation history.
         model: The language model to use for generating the response.
         max_tokens: The maximum number of tokens to generate in the response.
         temperature: A parameter controlling the diversity of the generated response.
@@ -62,13 +69,9 @@ def generate(
         - "openai/gpt-4-turbo"
     """
 
-    # Add the system prompt to the beginning of the conversation history
-    if system_prompt:
-        conversation_history.insert(0, {"role": "system", "content": system_prompt})
-
     headers = {"Authorization": f"Bearer {os.environ.get('OPENROUTER')}"}
     payload = json.dumps({
-        "messages": conversation_history,
+        "messages": build_messages(conversation_history, system_prompt),
         "model": model,
         "max_tokens": max_tokens,
         "temperature": temperature,
@@ -80,26 +83,71 @@ def generate(
     })
 
     try:
-        response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
+        response = http_transport.post(
+            url=API_URL,
             headers=headers,
             data=payload,
             stream=True
         )
-        completion = ""
-        for line in response.iter_lines(decode_unicode=True, chunk_size=1):
-            if line:
-                modified_value: str = re.sub("data:", "", line)
-                try:
-                    json_modified_value = json.loads(modified_value)
-                    completion += json_modified_value['choices'][0]['delta']['content']
-                    if stream: print(json_modified_value['choices'][0]['delta']['content'], end="", flush=True)
-                except json.JSONDecodeError:
-                    continue
-        return completion
+        completion = []
+        for delta in iter_deltas(response):
+            completion.append(delta)
+            if stream: print(delta, end="", flush=True)
+        return "".join(completion)
     except requests.RequestException as e:
         return f"Failed to Get Response\nError: {e}\nResponse: {response.text}"
 
+async def agenerate(
+    conversation_history: List[Dict[str, str]],
+    system_prompt: Optional[str] = "You are a helpful and friendly AI assistant.",
+    model: str = "meta-llama/llama-3-8b-instruct:free",
+    max_tokens: int = 8096,
+    temperature: float = 0.85,
+    frequency_penalty: float = 0.34,
+    presence_penalty: float = 0.06,
+    repetition_penalty: float = 1.0,
+    top_k: int = 0,
+    max_concurrent: int = MAX_CONCURRENT_REQUESTS
+) -> AsyncIterator[str]:
+    """
+    Async counterpart of generate() that yields the response deltas as they arrive, on the event loop's
+    shared httpx client. At most max_concurrent requests to OpenRouter are in flight at once; the
+    conversation history is not modified.
+
+    Args:
+        conversation_history: A list of dictionaries with "role" and "content" keys.
+        system_prompt: An optional system prompt sent before the conversation history.
+        model: The language model to use for generating the response.
+        max_tokens: The maximum number of tokens to generate in the response.
+        temperature: A parameter controlling the diversity of the generated response.
+        frequency_penalty: A penalty applied to tokens with low frequency in the training data.
+        presence_penalty: A penalty applied to tokens based on their presence in the prompt.
+        repetition_penalty: A penalty applied to repeated tokens in the generated response.
+        top_k: The number of highest probability tokens to consider at each step of generation.
+        max_concurrent: The in-flight request cap of the provider, fixed by the first call on a loop.
+
+    Yields:
+        The text deltas of the response. Raises httpx.HTTPError if the request fails.
+    """
+    payload = {
+        "messages": build_messages(conversation_history, system_prompt),
+        "model": model,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "frequency_penalty": frequency_penalty,
+        "presence_penalty": presence_penalty,
+        "repetition_penalty": repetition_penalty,
+        "top_k": top_k,
+        "stream": True,
+    }
+    headers = {"Authorization": f"Bearer {os.environ.get('OPENROUTER')}"}
+
+    async with http_transport.semaphore("openrouter", max_concurrent):
+        async with http_transport.async_client().stream("POST", API_URL, headers=headers, json=payload) as response:
+            response.raise_for_status()
+            async for delta in aiter_deltas(response):
+                yield delta
+
 if __name__ == "__main__":
     # Example usage with conversation history and system prompt
     conversation = [
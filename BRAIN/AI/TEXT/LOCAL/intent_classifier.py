@@ -0,0 +1,201 @@
+import json
+import os
+import re
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+ARTIFACT_PATH = "ASSETS/CLASSIFIER/intent_classifier.npz"
+EXAMPLES_PATH = "ASSETS/CLASSIFIER/intent_examples.json"
+
+IMAGE_LABELS = ["no", "yes"]
+TASK_LABELS = ["chat", "vision", "website", "call", "system"]
+
+# Maps the section headers of BISECTORS.complex_task_classifier_v* onto the routes main.py handles
+BISECTOR_TASKS = {
+    "OPEN YOUTUBE": "chat",
+    "ACTIVATE WEBSITE ASSISTANT": "website",
+    "SOMETHING ELSE": "chat",
+    "CONVERSE": "chat",
+    "VISION": "vision",
+    "MAKE A CALL": "call",
+}
+
+_WORD_RE = re.compile(r"[\w']+")
+
+
+def hash_ngrams(text: str, dim: int = 1 << 14) -> np.ndarray:
+    """
+    Hashes the word unigrams/bigrams and character 3-5 grams of a text into feature indices.
+
+    The hash is crc32, which (unlike the built-in hash()) is stable across processes, so the
+    indices match the ones the artifact was trained with.
+
+    Args:
+        text (str): The text to featurize.
+        dim (int, optional): Size of the feature space, must be a power of two. Defaults to 16384.
+
+    Returns:
+        np.ndarray: The sorted, unique feature indices of the text.
+    """
+    words = _WORD_RE.findall(text.lower())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        for n in (3, 4, 5):
+            grams += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+    mask = dim - 1
+    return np.unique(np.fromiter((zlib.crc32(g.encode()) & mask for g in grams), dtype=np.int64, count=len(grams)))
+
+
+def bisector_examples() -> List[Tuple[str, bool, str]]:
+    """
+    Turns the keyword lists and example queries of PROMPTS/BISECTORS.py into weak training examples.
+
+    Returns:
+        List[Tuple[str, bool, str]]: (text, is_image_request, task) triples.
+    """
+    from PROMPTS import BISECTORS
+
+    examples = []
+
+    # Only the phrase list of image_requests_v3 names image requests; the property lists after it do not
+    keywords = BISECTORS.image_requests_v3.split("Additionally")[0]
+    examples += [(phrase, True, "chat") for phrase in re.findall(r'^- "([^"]+)"', keywords, re.MULTILINE)]
+    videos = BISECTORS.video_requests_v1.split("Additionally")[0]
+    examples += [(phrase, False, "chat") for phrase in re.findall(r'^- "([^"]+)"', videos, re.MULTILINE)]
+
+    for name in ("complex_task_classifier_v3", "complex_task_classifier_v4", "complex_task_classifier_v5"):
+        task = None
+        for line in getattr(BISECTORS, name).splitlines():
+            header = re.match(r"\*\*(.+?)\*\*:", line.strip())
+            if header:
+                task = BISECTOR_TASKS.get(header.group(1))
+                continue
+            query = re.search(r'(?:User query: )?"([^"]+)"', line)
+            if task and query and line.strip().startswith("-"):
+                examples.append((query.group(1), False, task))
+
+    return list(dict.fromkeys(examples))
+
+
+def load_examples(path: str = EXAMPLES_PATH) -> List[Tuple[str, bool, str]]:
+    """Loads the hand-labelled examples stored next to the artifact."""
+    with open(path, "r", encoding="utf-8") as file:
+        return [(entry["text"], entry["image"], entry["task"]) for entry in json.load(file)]
+
+
+def _train_head(features: List[np.ndarray], targets: np.ndarray, n_classes: int, dim: int,
+                epochs: int = 300, learning_rate: float = 2.0, l2: float = 1e-4) -> Tuple[np.ndarray, np.ndarray]:
+    """Fits a softmax regression head with full-batch gradient descent."""
+    x = np.zeros((len(features), dim), dtype=np.float32)
+    for row, indices in enumerate(features):
+        x[row, indices] = 1.0 / np.sqrt(max(len(indices), 1))
+    y = np.eye(n_classes, dtype=np.float32)[targets]
+
+    weights = np.zeros((dim, n_classes), dtype=np.float32)
+    bias = np.zeros(n_classes, dtype=np.float32)
+    for _ in range(epochs):
+        logits = x @ weights + bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        error = (probs - y) / len(features)
+        weights -= learning_rate * (x.T @ error + l2 * weights)
+        bias -= learning_rate * error.sum(axis=0)
+    return weights, bias
+
+
+class IntentClassifier:
+    """
+    Local replacement for the BISECTORS image/task LLM classifiers: hashed n-gram features fed
+    into two linear softmax heads, one answering "is this an image request" and one picking the
+    route (chat, vision, website, call or system control). Prediction takes well under a millisecond.
+    """
+
+    def __init__(self, image_weights: np.ndarray, image_bias: np.ndarray, task_weights: np.ndarray, task_bias: np.ndarray) -> None:
+        self.image_weights = image_weights
+        self.image_bias = image_bias
+        self.task_weights = task_weights
+        self.task_bias = task_bias
+        self.dim = image_weights.shape[0]
+
+    @classmethod
+    def train(cls, examples: Optional[Iterable[Tuple[str, bool, str]]] = None, dim: int = 1 << 14) -> "IntentClassifier":
+        """
+        Trains the classifier on the labelled examples plus the BISECTORS keyword lists.
+
+        Args:
+            examples (Optional[Iterable[Tuple[str, bool, str]]]): (text, is_image_request, task) triples.
+                                                                  Defaults to load_examples() + bisector_examples().
+            dim (int, optional): Size of the hashed feature space. Defaults to 16384.
+        """
+        if examples is None:
+            examples = load_examples() + bisector_examples()
+        examples = list(examples)
+        features = [hash_ngrams(text, dim) for text, _, _ in examples]
+        image_targets = np.array([int(image) for _, image, _ in examples])
+        task_targets = np.array([TASK_LABELS.index(task) for _, _, task in examples])
+        return cls(*_train_head(features, image_targets, len(IMAGE_LABELS), dim),
+                   *_train_head(features, task_targets, len(TASK_LABELS), dim))
+
+    @classmethod
+    def load(cls, path: str = ARTIFACT_PATH) -> "IntentClassifier":
+        """Loads the artifact, training and saving a fresh one if it does not exist yet."""
+        if not os.path.exists(path):
+            classifier = cls.train()
+            classifier.save(path)
+            return classifier
+        with np.load(path) as artifact:
+            return cls(artifact["image_weights"], artifact["image_bias"], artifact["task_weights"], artifact["task_bias"])
+
+    def save(self, path: str = ARTIFACT_PATH) -> None:
+        """Stores the weights as a compressed NumPy artifact."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, image_weights=self.image_weights, image_bias=self.image_bias,
+                            task_weights=self.task_weights, task_bias=self.task_bias)
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        exp = np.exp(logits - logits.max())
+        return exp / exp.sum()
+
+    def predict(self, text: str) -> Dict[str, object]:
+        """
+        Classifies a single utterance.
+
+        Returns:
+            Dict[str, object]: {"image": bool, "task": str, "confidence": float}, where confidence is the
+                               lower of the two heads' probabilities.
+        """
+        indices = hash_ngrams(text, self.dim)
+        scale = 1.0 / np.sqrt(max(len(indices), 1))
+        image_probs = self._softmax(self.image_weights[indices].sum(axis=0) * scale + self.image_bias)
+        task_probs = self._softmax(self.task_weights[indices].sum(axis=0) * scale + self.task_bias)
+        image, task = int(image_probs.argmax()), int(task_probs.argmax())
+        return {
+            "image": bool(image),
+            "task": TASK_LABELS[task],
+            "confidence": float(min(image_probs[image], task_probs[task])),
+        }
+
+
+if __name__ == "__main__":
+    # Retrains the artifact from ASSETS/CLASSIFIER/intent_examples.json and BISECTORS.py, then benchmarks it
+    classifier = IntentClassifier.train()
+    classifier.save()
+    classifier = IntentClassifier.load()
+
+    queries = ["generate an image of a horse running on mars", "what is in my hand", "turn on dark mode",
+               "call mummy", "summarize this page", "who is the president of france"]
+    for query in queries:
+        print(f"{query!r:55} -> {classifier.predict(query)}")
+
+    runs = 10_000
+    start = time.perf_counter()
+    for i in range(runs):
+        classifier.predict(queries[i % len(queries)])
+    print(f"\033[92mAverage classification time: {(time.perf_counter() - start) / runs * 1e6:.1f} µs\033[0m")
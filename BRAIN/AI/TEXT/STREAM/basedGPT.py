@@ -1,6 +1,7 @@
 import requests
-import re
 from typing import Optional, Dict, List, Generator
+from TOOLS.sentence_segmenter import SentenceSegmenter
+from TOOLS.message_builder import build_messages
 
 def generate(conversation_history: List[Dict[str, str]], system_prompt: Optional[str] = "Be Helpful and Friendly") -> Generator[str, None, None]:
     """
@@ -23,28 +24,20 @@ def generate(conversation_history: List[Dict[str, str]], system_prompt: Optional
 
     api_endpoint = "https://www.basedgpt.chat/api/chat"
 
-    if system_prompt:
-        conversation_history.insert(0, {"role": "system", "content": system_prompt})
-
-    request_data = {"messages": conversation_history}
+    request_data = {"messages": build_messages(conversation_history, system_prompt)}
 
     api_response = requests.post(api_endpoint, json=request_data, stream=True)
-    partial_sentence = ""
+    segmenter = SentenceSegmenter()
 
     for data_chunk in api_response.iter_content(decode_unicode=True, chunk_size=1):
         if isinstance(data_chunk, bytes):
             data_chunk = data_chunk.decode("utf-8")
-        partial_sentence += data_chunk
         print(data_chunk, end="", flush=True)
-        # Enhanced sentence boundary detection accommodating multi-digit numbers
-        sentences = re.split(r'(?<!\b\w\.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', partial_sentence)
-        for complete_sentence in sentences[:-1]:
-            yield complete_sentence.strip()
-        partial_sentence = sentences[-1] 
+        # Only the newly received characters are scanned for sentence boundaries
+        yield from segmenter.feed(data_chunk)
 
     # Yield any remaining portion of the incomplete sentence
-    if partial_sentence:
-        yield partial_sentence.strip()
+    yield from segmenter.flush()
 
 if __name__ == "__main__":
     # Illustrative Example
@@ -1,7 +1,12 @@
 import json
 import requests
-from typing import Union, Generator
-import re
+from typing import Union, Generator, Optional
+from TOOLS.cancellation import CancelToken, abort_response
+from TOOLS.sse_decoder import iter_deltas
+from TOOLS import http_transport
+from TOOLS.sentence_segmenter import SentenceSegmenter
+from TOOLS.tracing import NULL_TRACE
+from TOOLS.message_builder import build_messages
 
 def generate(conversation_history: list, 
               model: str = 'meta-llama/Meta-Llama-3-70B-Instruct', 
@@ -9,7 +14,9 @@ def generate(conversation_history: list,
               max_tokens: int = 512, 
               temperature: float = 0.7, 
               stream: bool = True, 
-              chunk_size: int = 1) -> Union[Generator[str, None, None], str]:
+              chunk_size: int = 65536,
+              cancel_token: Optional[CancelToken] = None,
+              trace=NULL_TRACE) -> Union[Generator[str, None, None], str]:
     """
     Utilizes a variety of large language models (LLMs) to engage in conversational interactions.
     
@@ -20,7 +27,9 @@ def generate(conversation_history: list,
         - max_tokens (int): Optional. The maximum number of tokens to be generated by the LLM. Defaults to 512.
         - temperature (float): Optional. The temperature of the LLM. Defaults to 0.7.
         - stream (bool): Optional. Whether to stream the response from the LLM. Defaults to False.
-        - chunk_size (int): Optional. The size of the chunks to be streamed from the LLM. Defaults to 24.
+        - chunk_size (int): Optional. The maximum number of bytes read from the response stream at once. Defaults to 65536.
+        - cancel_token (CancelToken): Optional. Aborts the HTTP stream when the turn is cancelled (barge-in); the generator then simply ends.
+        - trace (Trace): Optional. The turn's TOOLS.tracing trace; records the first and last token of the stream.
 
     Models:
             - "meta-llama/Meta-Llama-3-70B-Instruct"
@@ -61,12 +70,9 @@ def generate(conversation_history: list,
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
     "X-Deepinfra-Source": "web-page",
 }
-    # Insert the system prompt at the beginning of the conversation history
-    conversation_history.insert(0, {"role": "system", "content": system_prompt})
-
     payload = {
         "model": model,
-        "messages": conversation_history,
+        "messages": build_messages(conversation_history, system_prompt),
         "temperature": temperature,
         "max_tokens": max_tokens,
         "stop": [],
@@ -74,44 +80,50 @@ def generate(conversation_history: list,
     }
     
     if stream:
-        yield from _stream_response(api_url, headers, payload, chunk_size)
+        yield from _stream_response(api_url, headers, payload, chunk_size, cancel_token, trace)
     else:
         return _get_full_response(api_url, headers, payload)
 
-def _stream_response(api_url, headers, payload, chunk_size):
+def _stream_response(api_url, headers, payload, chunk_size, cancel_token=None, trace=NULL_TRACE):
     """Streams the response from the API and yields sentences."""
-    partial_sentence = ""
+    segmenter = SentenceSegmenter()
+    if cancel_token is not None and cancel_token.is_cancelled:
+        return
+    response, unregister, tokens = None, lambda: None, 0
     try:
-        response = requests.post(api_url, headers=headers, json=payload, stream=True)
-        for value in response.iter_lines(decode_unicode=True, chunk_size=chunk_size):
-            modified_value = re.sub("data:", "", value)
-            if modified_value and "[DONE]" not in modified_value:
-                json_modified_value = json.loads(modified_value)
-                try:
-                    if json_modified_value["choices"][0]["delta"]["content"] != None:
-                        data_chunk = json_modified_value["choices"][0]["delta"]["content"]
-                        partial_sentence += data_chunk
-                        print(data_chunk, end="", flush=True)
-                        sentences = re.split(r'(?<!\b\w\.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', partial_sentence)
-                        for complete_sentence in sentences[:-1]:
-                            yield complete_sentence.strip()
-                        partial_sentence = sentences[-1] 
-                except: 
-                    continue
-        if partial_sentence:
-            yield partial_sentence.strip()
+        response = http_transport.post(api_url, headers=headers, json=payload, stream=True)
+        if cancel_token is not None:
+            unregister = cancel_token.add_callback(lambda: abort_response(response))
+        for data_chunk in iter_deltas(response, buffer_size=chunk_size):
+            if cancel_token is not None and cancel_token.is_cancelled:
+                return
+            tokens += 1
+            if tokens == 1:
+                trace.mark("llm.first_token")
+            print(data_chunk, end="", flush=True)
+            yield from segmenter.feed(data_chunk)
+        trace.mark("llm.last_token", tokens=tokens)
+        if cancel_token is None or not cancel_token.is_cancelled:
+            yield from segmenter.flush()
     
     except json.JSONDecodeError: 
         pass
     
     except Exception as e:
+        if cancel_token is not None and cancel_token.is_cancelled:
+            return
         print("Error:", e)
         yield "Response content: " + response.text
 
+    finally:
+        unregister()
+        if response is not None and cancel_token is not None and cancel_token.is_cancelled:
+            response.close()
+
 def _get_full_response(api_url, headers, payload):
     """Retrieves the full response from the API."""
     try:
-        response = requests.post(api_url, headers=headers, json=payload)
+        response = http_transport.post(api_url, headers=headers, json=payload)
         response.raise_for_status()  # Check for HTTP errors
         return response.json()['choices'][0]['message']['content']
     except requests.exceptions.RequestException as e:
@@ -1,4 +1,4 @@
-import requests
+from TOOLS import http_transport
 import base64
 import time
 
@@ -61,7 +61,7 @@ def generate(user_message: str, image_path: str, system_prompt: str="Be a helpfu
         ],
         "stream": False
     }
-    response = requests.post(api_url, headers=headers, json=payload)
+    response = http_transport.post(api_url, headers=headers, json=payload)
     return response.json()['choices'][0]['message']['content']
 
 
@@ -4,6 +4,7 @@ Project: Realtime Speech to Text Listener
 Description: A Python script that uses Selenium to interact with a website and listen to user input & print them in real time.
 """
 
+import time
 from typing import Optional
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -31,6 +32,8 @@ class SpeechToTextListener:
         self.chrome_options.add_argument("--headless=new")
         self.driver = webdriver.Chrome(options=self.chrome_options)
         self.wait = WebDriverWait(self.driver, wait_time)
+        # time.perf_counter() at which the last recording ended, i.e. when the user stopped speaking
+        self.heard_at: Optional[float] = None
         print("Made By ❤️ @DevsDoCode")
 
     def stream(self, content: str):
@@ -85,6 +88,7 @@ class SpeechToTextListener:
             if text:
                 self.stream(text)
             is_recording = self.driver.find_element(By.ID, "is_recording")
+        self.heard_at = time.perf_counter()
 
         return self.get_text()
 
@@ -1,9 +1,10 @@
-from typing import Generator
+from typing import Generator, Optional
 import pyaudio
 from vosk import Model, KaldiRecognizer
 import ast
 
-def speech_to_text(prints: bool = True, model_path: str = r"ASSETS\Vosk\vosk-model-small-en-us-0.15") -> Generator[str, None, None]:
+def speech_to_text(prints: bool = True, model_path: str = r"ASSETS\Vosk\vosk-model-small-en-us-0.15",
+                   model: Optional[Model] = None) -> Generator[str, None, None]:
     """
     Asynchronously transcribes continuous speech into text using the Vosk library and PyAudio.
 
@@ -13,6 +14,8 @@ def speech_to_text(prints: bool = True, model_path: str = r"ASSETS\Vosk\vosk-mod
     Args:
         prints (bool): If True, prints the transcription results.
         model_path (str): The path to the Vosk model file.
+        model (Optional[Model]): An already loaded Vosk model, e.g. resources.get("vosk_model") from IMPORTS.py,
+                                 which skips loading it from model_path.
 
     Yields:
         str: The transcribed text in lowercase.
@@ -26,7 +29,7 @@ def speech_to_text(prints: bool = True, model_path: str = r"ASSETS\Vosk\vosk-mod
         ...     print(speech)
     """
     # Initialize Vosk model
-    model = Model(model_path)
+    model = model or Model(model_path)
     recognizer = KaldiRecognizer(model, 16000)
     print("Model Initialized....")
 
@@ -1,4 +1,4 @@
-import requests
+from TOOLS import http_transport
 import base64
 # from TOOLS.AUDIO import Interrupted_Playsound
 from playsound import playsound
@@ -47,7 +47,7 @@ def speak(text: str, model: str = "aura-arcas-en", filename: str = "ASSETS/outpu
     payload = {"text": text, "model": model}
        
 
-    response = requests.post(url, headers=headers, json=payload)
+    response = http_transport.post(url, headers=headers, json=payload)
     response.raise_for_status()  # Ensure the request was successful
 
     with open(filename, 'wb') as audio_file:
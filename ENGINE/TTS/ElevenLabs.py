@@ -142,8 +142,7 @@ class ElevenLabsAPI:
                     if response:
                         return response
             print("\033[91mNo response obtained from API. Retrying with a new set of proxies...\033[0m")
-            get_proxies()
-            proxies = self.get_proxies_list()  # Update proxies for the retry
+            proxies = get_proxies()  # Update proxies for the retry
 
     def speak(self, text: str, voice_name: Optional[str] = None, voice_id: Optional[str] = None,
               filename: Optional[str] = "ASSETS/ElevenLabs_response.mp3") -> None:
@@ -1,14 +1,17 @@
 import requests
+from TOOLS import http_transport
 import base64
 from playsound import playsound
-import re
 import threading
 import queue
 import time
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
 from io import BytesIO
+from typing import Optional
 from TOOLS.AUDIO.Interrupted_Playsound import play_audio
+from TOOLS.cancellation import CancelToken
+from TOOLS.sentence_segmenter import split_sentences
 
 class SpeechSynthesizer:
     """
@@ -37,7 +40,7 @@ class SpeechSynthesizer:
         """
         api_endpoint = "https://deepgram.com/api/ttsAudioGeneration"
         request_payload = {"text": text, "model": voice_model}
-        api_response = requests.post(api_endpoint, json=request_payload)
+        api_response = http_transport.post(api_endpoint, json=request_payload)
         api_response.raise_for_status()  # Raise an exception for unsuccessful API requests
 
         # Create the directory if it doesn't exist
@@ -93,6 +96,24 @@ class SpeechSynthesizer:
         """
         self.audio_queue.put(filename)
     
+    def cancel(self):
+        """
+        Drops every audio file still waiting in the playback queue, e.g. when a hotword interrupts the turn.
+        Register it with CancelToken.add_callback to tie the queue to a turn.
+        """
+        while True:
+            try:
+                filename = self.audio_queue.get_nowait()
+            except queue.Empty:
+                break
+            if filename is None:
+                self.audio_queue.put(None)
+                self.audio_queue.task_done()
+                break
+            try: os.remove(filename)
+            except OSError: pass
+            self.audio_queue.task_done()
+
     def wait_for_playback_completion(self):
         """
         Blocks the calling thread until all queued audio files have been played back.
@@ -111,11 +132,16 @@ class SpeechSynthesizer:
 
 
 
-def speak(text: str, voice_name: str = "Arcas", output_file: str = "ASSETS/STREAM_AUDIOS/output_audio.mp3", verbose: bool = True):
+def speak(text: str, voice_name: str = "Arcas", output_file: str = "ASSETS/STREAM_AUDIOS/output_audio.mp3", verbose: bool = True,
+          cancel_token: Optional[CancelToken] = None):
     """
     ## Best Jarvis Voices: 
         - Arcas, Zeus
+
+    A cancel_token (e.g. fired by a hotword) cancels the chunks not yet synthesized, stops the retries
+    and the playback, and makes speak() return without waiting for requests already in flight.
     """
+    cancelled = lambda: cancel_token is not None and cancel_token.is_cancelled
     available_voices = {
         "Asteria": "aura-asteria-en", "Arcas": "aura-arcas-en", "Luna": "aura-luna-en",
         "Zeus": "aura-zeus-en", "Orpheus": "aura-orpheus-en", "Angus": "aura-angus-en",
@@ -138,14 +164,14 @@ def speak(text: str, voice_name: str = "Arcas", output_file: str = "ASSETS/STREA
     }
 
     # Split text into sentences
-    sentences = re.split(r'(?<!\b\w\.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', text)
+    sentences = split_sentences(text)
 
     # Function to request audio for each chunk
     def generate_audio_for_chunk(part_text: str, part_number: int):
-        while True:
+        while not cancelled():
             try:
                 payload = {"text": part_text, "model": available_voices[voice_name]}
-                response = requests.post(url, headers=headers, json=payload, timeout=None)
+                response = http_transport.post(url, headers=headers, json=payload, timeout=None)
                 response.raise_for_status()
                 response_data = response.json().get('data')
                 if response_data:
@@ -160,23 +186,37 @@ def speak(text: str, voice_name: str = "Arcas", output_file: str = "ASSETS/STREA
                 # if verbose:
                 #     print(f"Error for chunk {part_number}: {e}. Retrying...")
                 time.sleep(1)
+        raise CancelledError()
 
     # Using ThreadPoolExecutor to handle requests concurrently
-    with ThreadPoolExecutor() as executor:
-        futures = {executor.submit(generate_audio_for_chunk, sentence.strip(), chunk_num): chunk_num 
-                   for chunk_num, sentence in enumerate(sentences, start=1)}
-        
-        # Dictionary to store results with order preserved
-        audio_chunks = {}
+    executor = ThreadPoolExecutor()
+    futures = {executor.submit(generate_audio_for_chunk, sentence.strip(), chunk_num): chunk_num 
+               for chunk_num, sentence in enumerate(sentences, start=1)}
+    unregister = cancel_token.add_callback(lambda: [future.cancel() for future in futures]) if cancel_token else lambda: None
 
+    # Dictionary to store results with order preserved
+    audio_chunks = {}
+
+    try:
         for future in as_completed(futures):
+            if cancelled():
+                break
             chunk_num = futures[future]
             try:
                 part_number, audio_data = future.result()
                 audio_chunks[part_number] = audio_data  # Store the audio data in correct sequence
+            except CancelledError:
+                continue
             except Exception as e:
                 if verbose:
                     print(f"Failed to generate audio for chunk {chunk_num}: {e}")
+    finally:
+        unregister()
+        # On cancel, requests already in flight finish in the background instead of blocking the turn
+        executor.shutdown(wait=not cancelled(), cancel_futures=True)
+
+    if cancelled():
+        return
 
     # Combine audio chunks in the correct sequence
     combined_audio = BytesIO()
@@ -192,7 +232,7 @@ def speak(text: str, voice_name: str = "Arcas", output_file: str = "ASSETS/STREA
 
     # playsound(output_file)
 
-    play_audio(output_file)
+    play_audio(output_file, cancel_token=cancel_token)
     os.remove(output_file)
 
 if __name__=="__main__":
@@ -1,4 +1,4 @@
-import requests
+from TOOLS import http_transport
 import base64
 import os
 import threading
@@ -48,7 +48,7 @@ class SpeechSynthesizer:
             }
         }
 
-        response = requests.post(url, json=payload)
+        response = http_transport.post(url, json=payload)
         response.raise_for_status()
         
         audio_data = base64.b64decode(response.json()['audioStream'])
@@ -0,0 +1,214 @@
+import io
+import os
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Executor, Future
+from typing import Callable, Dict, Iterable, List, Optional
+
+from TOOLS.cancellation import CancelToken
+from TOOLS.tracing import NULL_TRACE
+
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+
+
+def play_mp3(audio: bytes) -> None:
+    """
+    Plays MP3 bytes with pygame and blocks until playback has finished. The mixer is initialised
+    once and kept open, so consecutive sentences follow each other without a re-initialisation gap.
+    """
+    import pygame
+
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    pygame.mixer.music.load(io.BytesIO(audio), "mp3")
+    pygame.mixer.music.play()
+    while pygame.mixer.music.get_busy():
+        time.sleep(0.01)
+
+
+def stop_mp3() -> None:
+    """Stops whatever play_mp3 is playing; play_mp3 returns within one 10 ms poll."""
+    import pygame
+
+    if pygame.mixer.get_init():
+        pygame.mixer.music.stop()
+
+
+class SentenceQueue:
+    """Hands sentences from the thread generating them to the pipeline speaking them."""
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+
+    def put(self, sentence: str) -> None:
+        if not self._closed:
+            self._queue.put(sentence)
+
+    def close(self) -> None:
+        """Marks the end of the answer. Must be called on errors too; later calls and sentences are ignored."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+
+    def __iter__(self):
+        while (sentence := self._queue.get()) is not None:
+            yield sentence
+
+
+class StreamingVoicePipeline:
+    """
+    Speaks an LLM answer while it is still being generated: every sentence is sent to the TTS
+    service as soon as it arrives, syntheses run concurrently, and the resulting audio is played
+    strictly in sentence order. The first sentence starts playing as soon as it is synthesized,
+    so the user hears the answer long before the LLM has finished writing it.
+    """
+
+    def __init__(self,
+                 synthesize: Optional[Callable[[str], bytes]] = None,
+                 play: Callable[[bytes], None] = play_mp3,
+                 stop: Callable[[], None] = stop_mp3,
+                 executor: Optional[Executor] = None,
+                 prints: bool = True) -> None:
+        """
+        Args:
+            synthesize (Optional[Callable[[str], bytes]], optional): Turns one sentence into audio bytes.
+                                                                      Defaults to ENGINE.TTS.speechify.synthesize.
+            play (Callable[[bytes], None], optional): Plays audio bytes and blocks until done. Defaults to play_mp3.
+            stop (Callable[[], None], optional): Makes a running play() return early. Defaults to stop_mp3.
+            executor (Optional[Executor], optional): Where syntheses run. Defaults to the shared I/O pool.
+            prints (bool, optional): Whether to print the per-turn timings. Defaults to True.
+        """
+        if synthesize is None:
+            from ENGINE.TTS.speechify import synthesize
+        if executor is None:
+            from TOOLS.execution_service import get_service
+            executor = get_service().executor("io")
+        self.synthesize = synthesize
+        self.play = play
+        self.stop = stop
+        self.executor = executor
+        self.prints = prints
+
+    def _synthesize(self, sentence: str, index: int, trace) -> bytes:
+        """Synthesizes one sentence and records the time it took and when it was ready."""
+        with trace.span("tts.synthesize", sentence=index):
+            audio = self.synthesize(sentence)
+        trace.mark("tts.chunk_ready", sentence=index)
+        return audio
+
+    def _playback(self, pending: queue.Queue, metrics: Dict[str, float], started_at: float,
+                  cancel_token: Optional[CancelToken], trace) -> None:
+        """Plays the synthesized sentences in order until the None sentinel arrives."""
+        while (future := pending.get()) is not None:
+            if cancel_token is not None and cancel_token.is_cancelled:
+                continue
+            try:
+                audio = future.result()
+            except CancelledError:
+                continue
+            except Exception as e:
+                print(f"\033[91mFailed to synthesize a sentence: {e}\033[0m")
+                continue
+            if cancel_token is not None and cancel_token.is_cancelled:
+                continue
+            if "time_to_first_audio" not in metrics:
+                metrics["time_to_first_audio"] = time.perf_counter() - started_at
+                trace.mark("audio.first")
+                if self.prints:
+                    print(f"\n\033[92mTime to first audio: {metrics['time_to_first_audio']:.2f} seconds\033[0m")
+            with trace.span("audio.play"):
+                self.play(audio)
+
+    def _cancel(self, pending: queue.Queue, submitted: List[Future]) -> None:
+        """Barge-in: drops the queued sentences, cancels the syntheses not yet started and stops playback."""
+        for future in submitted:
+            future.cancel()
+        try:
+            while pending.get_nowait() is not None:
+                pass
+        except queue.Empty:
+            pass
+        pending.put(None)
+        self.stop()
+
+    def speak(self, sentences: Iterable[str], started_at: Optional[float] = None,
+              cancel_token: Optional[CancelToken] = None, trace=NULL_TRACE) -> Dict[str, float]:
+        """
+        Synthesizes and plays a stream of sentences, blocking until the last one has been played.
+
+        Args:
+            sentences (Iterable[str]): The sentences of the answer, typically a streaming LLM generator.
+            started_at (Optional[float], optional): time.perf_counter() at which the turn started, e.g. when
+                                                    the user stopped speaking. Defaults to now.
+            cancel_token (Optional[CancelToken], optional): Cancels the turn, e.g. when a hotword is heard.
+                                                            The sentences iterable must end on cancel too.
+            trace (Trace, optional): The turn's TOOLS.tracing trace; records every synthesis, the first audio
+                                     out and the end of playback. Defaults to NULL_TRACE.
+
+        Returns:
+            Dict[str, float]: time_to_first_audio, total (seconds) and sentences (count) of the turn, plus
+                              cancel_latency (seconds from cancel() until speak() returned) if it was cancelled.
+        """
+        started_at = time.perf_counter() if started_at is None else started_at
+        metrics: Dict[str, float] = {"sentences": 0}
+        pending: queue.Queue = queue.Queue()
+        submitted: List[Future] = []
+        player = threading.Thread(target=self._playback, args=(pending, metrics, started_at, cancel_token, trace), daemon=True)
+        player.start()
+        unregister = cancel_token.add_callback(lambda: self._cancel(pending, submitted)) if cancel_token else lambda: None
+
+        try:
+            for sentence in sentences:
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    break
+                if sentence.strip():
+                    submitted.append(self.executor.submit(self._synthesize, sentence, metrics["sentences"], trace))
+                    pending.put(submitted[-1])
+                    metrics["sentences"] += 1
+        finally:
+            pending.put(None)
+            player.join()
+            unregister()
+
+        metrics["total"] = time.perf_counter() - started_at
+        trace.mark("audio.end", cancelled=bool(cancel_token and cancel_token.is_cancelled))
+        if cancel_token is not None and cancel_token.is_cancelled:
+            metrics["cancel_latency"] = time.perf_counter() - cancel_token.cancelled_at
+            if self.prints:
+                print(f"\033[93mInterrupted, pipeline freed {metrics['cancel_latency'] * 1000:.0f} ms after the hotword\033[0m")
+        elif self.prints:
+            print(f"\033[92mSpoke {metrics['sentences']} sentences in {metrics['total']:.2f} seconds\033[0m")
+        return metrics
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    def fake_llm(cancel_token: Optional[CancelToken] = None):
+        cancel_token = cancel_token or CancelToken()
+        for sentence in ["India is a country in South Asia.", "It is the most populous country.", "Its capital is New Delhi."]:
+            if cancel_token.wait(0.6):
+                return
+            yield sentence
+
+    def fake_synthesize(sentence: str) -> bytes:
+        time.sleep(0.4)
+        return sentence.encode()
+
+    stopped = threading.Event()
+
+    def fake_play(audio: bytes) -> None:
+        stopped.clear()
+        if not stopped.wait(0.5):
+            print("PLAYED >>", audio.decode())
+
+    pipeline = StreamingVoicePipeline(fake_synthesize, play=fake_play, stop=stopped.set,
+                                      executor=ThreadPoolExecutor(max_workers=4))
+    print(pipeline.speak(fake_llm()))
+
+    # Barge-in: a hotword cancels the turn while the first sentence is playing
+    token = CancelToken()
+    threading.Timer(1.3, token.cancel).start()
+    print(pipeline.speak(fake_llm(token), cancel_token=token))
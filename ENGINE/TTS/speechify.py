@@ -1,8 +1,34 @@
-import requests
+from TOOLS import http_transport
 import base64
 import os
 from TOOLS.AUDIO import Interrupted_Playsound
 
+def synthesize(paragraph: str, voice_name: str = "mrbeast") -> bytes:
+    """
+    Converts text to speech using the Speechify API and returns the MP3 audio without playing it.
+
+    Parameters:
+        paragraph (str): The text to convert to speech.
+        voice_name (str): The voice model to use for speech generation, see speak().
+
+    Returns:
+        bytes: The synthesized MP3 audio.
+    """
+    url = "https://audio.api.speechify.com/generateAudioFiles"
+    payload = {
+        "audioFormat": "mp3",
+        "paragraphChunks": [paragraph],
+        "voiceParams": {
+            "name": voice_name,
+            "engine": "speechify",
+            "languageCode": "en-US"
+        }
+    }
+
+    response = http_transport.post(url, json=payload)
+    response.raise_for_status()
+    return base64.b64decode(response.json()['audioStream'])
+
 def speak(paragraph: str, voice_name: str = "mrbeast", filename: str = "ASSETS/output_audio.mp3"):
     """
     Converts text to speech using the Speechify API and plays the audio.
@@ -24,21 +50,7 @@ def speak(paragraph: str, voice_name: str = "mrbeast", filename: str = "ASSETS/o
     try: os.remove(filename)
     except: pass
     
-    url = "https://audio.api.speechify.com/generateAudioFiles"
-    payload = {
-        "audioFormat": "mp3",
-        "paragraphChunks": [paragraph],
-        "voiceParams": {
-            "name": voice_name,
-            "engine": "speechify",
-            "languageCode": "en-US"
-        }
-    }
-
-    response = requests.post(url, json=payload)
-    response.raise_for_status()
-    
-    audio_data = base64.b64decode(response.json()['audioStream'])
+    audio_data = synthesize(paragraph, voice_name)
     with open(filename, 'wb') as audio_file:
         audio_file.write(audio_data)
     
@@ -1,54 +1,121 @@
 """----------------------------------------------------------------------------------------------SYSTEM IMPORTS------------------------------------------------------------------"""
 
+import atexit
 import concurrent.futures
+import json
 import os
+import time
 
 """----------------------------------------------------------------------------------------------USER IMPORTS----------------------------------------------------------------------"""
 
+# Heavy or rarely used modules (selenium, cv2, huggingface_hub, webscout, pygame ...) are imported on first use
+from TOOLS.lazy_import import lazy_attr, lazy_module, preload
+from TOOLS.resource_manager import ResourceManager
+
 # from ENGINE.STT.vosk_recog import speech_to_text
 # from ENGINE.STT.NetHyTech import SpeechToTextListener
-from ENGINE.STT.DevsDoCode import SpeechToTextListener
+SpeechToTextListener = lazy_attr("ENGINE.STT.DevsDoCode", "SpeechToTextListener")
 
 # from ENGINE.TTS.deepAI import speak
 # from ENGINE.TTS.DeepGram import speak
-from ENGINE.TTS.speechify import speak
+speak = lazy_attr("ENGINE.TTS.speechify", "speak")
+from ENGINE.TTS.STREAMING.voice_pipeline import StreamingVoicePipeline, SentenceQueue
+from TOOLS.sentence_segmenter import split_sentences
 # from ENGINE.TTS.edge_tts import speak
 # from ENGINE.TTS.stream_elements_api import speak
 # from ENGINE.TTS.ai_voice import speak, initiate_proxies
 # from ENGINE.TTS.hearling import Partial_Async_HearlingAudioGenerator
 
-from BRAIN.AI.TEXT.API import openrouter
+openrouter = lazy_module("BRAIN.AI.TEXT.API.openrouter")
 from BRAIN.AI.TEXT.API import deepInfra_TEXT
 # from BRAIN.AI.TEXT.API import Phind
 # from BRAIN.AI.TEXT.API import Pi_Ai
 # from BRAIN.AI.TEXT.API import deepseek_ai
-from BRAIN.AI.TEXT.API import openGPT
-from BRAIN.AI.TEXT.API import Hugging_Face_TEXT
+openGPT = lazy_module("BRAIN.AI.TEXT.API.openGPT")
+Hugging_Face_TEXT = lazy_module("BRAIN.AI.TEXT.API.Hugging_Face_TEXT")
 # from BRAIN.AI.TEXT.API import liaobots
 # from BRAIN.AI.TEXT.API import hugging_chat; hf_api = hugging_chat.HuggingChat_RE(model="microsoft/Phi-3-mini-4k-instruct")
 # from BRAIN.AI.TEXT.API import Blackbox_ai
 
-from BRAIN.AI.VISION import deepInfra_VISION
+IntentClassifier = lazy_attr("BRAIN.AI.TEXT.LOCAL.intent_classifier", "IntentClassifier")
+GGUFChatbot = lazy_attr("BRAIN.AI.TEXT.LOCAL.llama_CPP", "GGUFChatbot")
+
+deepInfra_VISION = lazy_module("BRAIN.AI.VISION.deepInfra_VISION")
 
 # from BRAIN.TOOLS import groq_web_access
 
 # from BRAIN.AI.IMAGE import deepInfra_IMG
-from BRAIN.AI.IMAGE import decohere_ai
+decohere_ai = lazy_module("BRAIN.AI.IMAGE.decohere_ai")
 
 # from PLAYGROUND.ADB_CALL import make_call, android_device_connection_setup; android_device_connection_setup.initialise()
-from PLAYGROUND.WEBSITE_ASSISTANT import jenna_reader, chrome_latest_url
-from PLAYGROUND.CAMERA import camera_vision
+jenna_reader = lazy_module("PLAYGROUND.WEBSITE_ASSISTANT.jenna_reader")
+chrome_latest_url = lazy_module("PLAYGROUND.WEBSITE_ASSISTANT.chrome_latest_url")
+camera_vision = lazy_module("PLAYGROUND.CAMERA.camera_vision")
+AudioModelHandler = lazy_attr("PLAYGROUND.CLAP_NN.audio_inference", "AudioModelHandler")
 
 from PROMPTS import INSTRUCTIONS, BISECTORS
 
-from TOOLS import Alpaca_DS_Converser, RawDog
-from TOOLS.SYSTEM_SETTINGS import system_theme, taskbar
+from TOOLS import Alpaca_DS_Converser, SQLite_DS_Converser
+RawDog = lazy_module("TOOLS.RawDog")
+from TOOLS.turn_orchestrator import TurnOrchestrator
+from TOOLS.execution_service import get_service
+from TOOLS import http_transport
+from TOOLS.cancellation import CancelToken, watch_hotword
+from TOOLS import tracing
+from TOOLS.hedged_generation import HedgedRouter
+from TOOLS import response_cache
+from TOOLS.semantic_cache import SemanticCache
+from TOOLS.history_summarizer import HistorySummarizer
+from TOOLS.retrieval_memory import RetrievalMemory
+system_theme = lazy_module("TOOLS.SYSTEM_SETTINGS.system_theme")
+taskbar = lazy_module("TOOLS.SYSTEM_SETTINGS.taskbar")
 
 """----------------------------------------------------------------------------------------------INITIALIZATION-------------------------------------------------------------------"""
 
-listener = SpeechToTextListener(language="en-IN")
-history_manager = Alpaca_DS_Converser.ConversationHistoryManager(history_offset=700)
-agent = openGPT.ConversationalAgent()
+execution_service = get_service()
+# Chat answers are asked from the fastest healthy provider first and, if it has not answered within
+# HEDGE_DELAY, from the backups too; the provider scores are saved on exit for the next session
+llm_router = HedgedRouter()
+atexit.register(llm_router.registry.save)
+
+# Classifier verdicts are deterministic (temperature 0), so identical classifier requests are answered
+# from the response cache for a week; the hit counters are printed on exit
+for name, classifier_prompt in vars(BISECTORS).items():
+    if isinstance(classifier_prompt, str) and not name.startswith("_"):
+        response_cache.register_prompt_class(classifier_prompt, "classifier")
+atexit.register(lambda: response_cache.get_cache().report())
+# Paraphrases of recent chat questions are answered from memory instead of the LLM
+semantic_cache = SemanticCache()
+
+# Connect to the LLM and TTS hosts while everything else starts, keep those connections alive between
+# turns and print how often a request could reuse one when the assistant exits
+http_transport.prewarm()
+http_transport.start_keepalive()
+atexit.register(http_transport.report)
+
+
+def create_history_manager():
+    # The retriever indexes the store, which holds the text of every turn; the history is budgeted in tokens
+    # of the model answering chat turns (deepInfra_TEXT's default)
+    store = SQLite_DS_Converser.ConversationStore()
+    return Alpaca_DS_Converser.ConversationHistoryManager(history_offset=1000, model="meta-llama/Meta-Llama-3.1-405B-Instruct", store=store,
+                                                          summarizer=HistorySummarizer(), retriever=RetrievalMemory(store))
+
+
+# Heavy resources initialize concurrently in the background; each name below is a proxy that only
+# blocks when a turn first uses it, so listening starts as soon as the browser is up
+resources = ResourceManager()
+listener = resources.register("listener", lambda: SpeechToTextListener(language="en-IN"))
+history_manager = resources.register("history_manager", create_history_manager)
+intent_classifier = resources.register("intent_classifier", lambda: IntentClassifier.load())
+voice_pipeline = resources.register("voice_pipeline", StreamingVoicePipeline)
+agent = resources.register("agent", lambda: openGPT.ConversationalAgent())
+# Optional resources, initialized on first use
+vosk_model = resources.register("vosk_model", lambda: lazy_attr("vosk", "Model")(r"ASSETS\Vosk\vosk-model-small-en-us-0.15"), autostart=False)
+clap_model = resources.register("clap_model", lambda: AudioModelHandler(r"ASSETS\CLAP_DETECTS\MODELS\Clap_Detect_Model.pth"), autostart=False)
+gguf_chatbot = resources.register("gguf_chatbot", lambda: GGUFChatbot(), autostart=False)
+resources.start()
+preload(speak)
 # ai_model = deepseek_ai.DeepSeekAPI()
 # taskExecutor = RawDog.TaskExecutor()
 # engine = Partial_Async_HearlingAudioGenerator()
\ No newline at end of file
@@ -22,7 +22,8 @@ class AudioProcessor:
                  buffer_duration: float = 10,  # in seconds
                  sample_rate: int = 44100,  # in Hz
                  dtype: Any = np.int16,
-                 directory: str = "./"):
+                 directory: str = "./",
+                 model_handler: AudioModelHandler = None):
         """
         Initializes the AudioProcessor.
 
@@ -34,6 +35,8 @@ class AudioProcessor:
             sample_rate (int, optional): Sampling rate of the audio. Defaults to 44100 Hz.
             dtype (Any, optional): Data type of the audio samples. Defaults to np.int16.
             directory (str, optional): Directory to save temporary audio files. Defaults to "./".
+            model_handler (AudioModelHandler, optional): An already loaded model, e.g. resources.get("clap_model")
+                                                         from IMPORTS.py. Defaults to loading model_path.
         """
         self.chunk_duration = chunk_duration
         self.buffer_duration = buffer_duration
@@ -44,7 +47,7 @@ class AudioProcessor:
         self.chunk_samples = int(chunk_duration * sample_rate)
         self.buffer_samples = int(buffer_duration * sample_rate)
         
-        self.model_handler = AudioModelHandler(model_path)
+        self.model_handler = model_handler or AudioModelHandler(model_path)
         self.buffer = deque(maxlen=self.buffer_samples)
         self.stream = sd.InputStream(device=device_index, channels=1, samplerate=sample_rate, dtype=dtype)
     
@@ -322,4 +322,17 @@ Enhanced examples for classification:
   - Response: 'MAKE A CALL'
 
 The AI should respond with one of the six tasks only, without any additional information or elaboration.
-"""
\ No newline at end of file
+"""
+# Single-call router: replaces image_requests_v3 + complex_task_classifier_v* with one compact JSON verdict
+routing_classifier_v1 = """
+You are a router for a voice assistant. Classify the user's text and reply with ONLY a single-line JSON object, nothing else:
+{"image": <true|false>, "task": "<vision|website|call|system|chat>"}
+
+- "image": true only if the user asks to generate, draw, paint, design or otherwise create a picture/artwork.
+- "task":
+  - "vision": needs the camera to answer ("what is in my hand", "recognize the object in front of me").
+  - "website": asks about the web page open in the browser ("summarize this page", "help me with this website").
+  - "call": asks to phone or dial someone ("call mummy", "make a call to 123-456-7890").
+  - "system": changes computer settings such as dark/light theme, taskbar alignment or taskbar temperature.
+  - "chat": anything else, including image requests, questions and casual conversation.
+"""
@@ -15,10 +15,12 @@ class HotwordDetector:
         prints (bool): A flag to print debug messages.
 
     Methods:
-        listen_for_hotwords (stop_event: Optional[threading.Event] = None) -> bool:
+        listen_for_hotwords (stop_event: Optional[threading.Event] = None, keep_open: bool = False) -> bool:
             Listens for hotwords and returns True if a hotword is detected, False otherwise.
         stop () -> None:
             Stops the hotword detection process.
+        close () -> None:
+            Releases Porcupine and the microphone of a detector that was kept open.
     """
     def __init__(self, keywords: List[str] = ['picovoice', 'grasshopper', 'americano', 'hey siri', 'bumblebee', 'ok google', 'blueberry', 'jarvis', 'pico clock', 'terminator', 'computer', 'porcupine', 'grapefruit', 'hey google', 'alexa'], 
                  activation_sound_path: Optional[str] = r"ASSETS\SOUNDS\activation_sound.wav",
@@ -46,14 +48,18 @@ class HotwordDetector:
         self._stop_requested = True
         if self.prints: print("Hotword detection has been stopped.")
 
-    def listen_for_hotwords(self, stop_event: Optional[object] = None) -> bool:
+    def listen_for_hotwords(self, stop_event: Optional[object] = None, keep_open: bool = False) -> bool:
         """
         Listens for hotwords and returns True if a hotword is detected, False otherwise.
         If an activation or deactivation sound path is provided, the corresponding sound will be played.
         :param stop_event: An optional threading.Event() to stop listening externally.
+        :param keep_open: Keep Porcupine and the microphone open for the next call instead of releasing them;
+                          the audio stream is only paused, and close() releases them.
         :return: True if a hotword is detected, False otherwise.
         """
         try:
+            if self.audio_stream.is_stopped():
+                self.audio_stream.start_stream()
             if self.deactivation_sound_path:
                 self._play_sound(self.deactivation_sound_path)
             if self.prints: print("Listening for hotwords...")
@@ -67,9 +73,18 @@ class HotwordDetector:
                     if self.activation_sound_path:
                         self._play_sound(self.activation_sound_path)
                     return True  # Return True if a hotword is detected
+            return False
 
         finally:
-            self._cleanup()
+            if keep_open:
+                # Paused, so no audio piles up (and overflows) in the input buffer until the next call
+                self.audio_stream.stop_stream()
+            else:
+                self._cleanup()
+
+    def close(self) -> None:
+        """Releases Porcupine and the microphone; safe to call more than once."""
+        self._cleanup()
 
     def _play_sound(self, sound_path: Optional[str]) -> None:
         """Plays a sound file if a path is provided."""
@@ -82,10 +97,13 @@ class HotwordDetector:
         if self.prints: print("Cleaning up resources...")
         if self.porcupine is not None:
             self.porcupine.delete()
+            self.porcupine = None
         if self.audio_stream is not None:
             self.audio_stream.close()
+            self.audio_stream = None
         if self.audio_interface is not None:
             self.audio_interface.terminate()
+            self.audio_interface = None
         if self.prints: print("Resources have been cleaned up.")
 
 if __name__ == "__main__":
@@ -4,6 +4,10 @@ os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame
 import threading
 import time
+from typing import Optional
+
+try: from TOOLS.cancellation import CancelToken
+except ModuleNotFoundError: CancelToken = threading.Event
 
 try: from TOOLS.AUDIO.Hotword_Detection import HotwordDetector
 except ModuleNotFoundError: from Hotword_Detection import HotwordDetector
@@ -24,7 +28,7 @@ def play_audio_Event(file_path: str, stop_event: threading.Event, prints: bool =
     if prints: print(f"Playing audio: {file_path}")
     
     while pygame.mixer.music.get_busy() and not stop_event.is_set():
-        time.sleep(0.1)  # Small sleep to prevent busy-waiting
+        time.sleep(0.01)  # Small sleep to prevent busy-waiting, short enough for a prompt barge-in
     
     if stop_event.is_set():
         pygame.mixer.music.stop()
@@ -47,15 +51,20 @@ def detect_hotword(detector: HotwordDetector, stop_event: threading.Event, print
         stop_event.set()
         if prints: print("Hotword detected, Setting Stop Event.")
 
-def play_audio(audio_file_path: str, prints: bool = False) -> None:
+def play_audio(audio_file_path: str, prints: bool = False, cancel_token: Optional[CancelToken] = None) -> None:
     """
     play_audio function to run audio playback and hotword detection concurrently.
     
     Args:
         audio_file_path (str): The path to the audio file.
         prints (bool): If True, enables print statements. Defaults to False.
+        cancel_token (Optional[CancelToken]): The token of the current turn. A detected hotword cancels it, so
+                                              the rest of the turn is torn down too, and cancelling it from
+                                              elsewhere stops the playback. Defaults to None (playback only).
     """
-    stop_event = threading.Event()
+    stop_event = cancel_token if cancel_token is not None else threading.Event()
+    if stop_event.is_set():
+        return
     detector = HotwordDetector()
 
     audio_thread = threading.Thread(target=play_audio_Event, args=(audio_file_path, stop_event, prints))
@@ -1,80 +1,165 @@
-import json
+import collections
+import itertools
 import os
 
+from TOOLS.conversation_log import ConversationLog, migrate_json, read_history
+from TOOLS.retrieval_memory import as_message
+from TOOLS.token_counter import get_tokenizer, message_tokens
+
+# Messages read back from the end of the log at startup; the token budget (history_offset) trims them further
+LOAD_MESSAGES = 400
+
 class ConversationHistoryManager:
-    def __init__(self, conversation_file="ASSETS/conversation_history.json", history_offset=400):
+    def __init__(self, conversation_file="ASSETS/conversation_history.jsonl", history_offset=1000, model=None, tokenizer=None, store=None, summarizer=None, retriever=None):
+        # history_offset is the prompt budget of the history in tokens of the target model; the tokenizer
+        # defaults to the one registered for model in TOOLS/token_counter.py, or a fast approximation
         self.history_offset = history_offset
+        # An optional SQLite_DS_Converser.ConversationStore that keeps every turn searchable after it leaves the prompt window
+        self.store = store
+        # An optional history_summarizer.HistorySummarizer that folds evicted messages into a summary sent ahead of the
+        # history; the summary counts against history_offset, so the prompt stays within the budget
+        self.summarizer = summarizer
+        self._memory = (None, None, 0)
+        # An optional retrieval_memory.RetrievalMemory over the store; the past exchanges most similar to the current
+        # query are sent ahead of the recent window
+        self.retriever = retriever
+        self.tokenizer = tokenizer or get_tokenizer(model)
+        # The history is an append-only JSON-lines log; a history saved by older versions as one JSON array is converted once
+        base, extension = os.path.splitext(conversation_file)
+        if extension == ".json":
+            conversation_file = base + ".jsonl"
         self.conversation_file = conversation_file
-        if os.path.exists(conversation_file):
-            # If conversation file exists, check if it's empty
-            if os.stat(conversation_file).st_size == 0:
-                # If file is empty, initialize self.history to an empty list
-                self.history = []
-            else:
-                # If file is not empty, load the list from the file
-                with open(conversation_file, "r") as file:
-                    self.history = json.load(file)
-                
-                # Check if the last entry in history is a user entry
-                if self.history and self.history[-1].get("role") == "user":
-                    print("Deleted")
-                    # If the last entry is a user entry, pop it out from both history and file
-                    self.history.pop()
-                    with open(conversation_file, "w") as file:
-                        json.dump(self.history, file, indent=4)
-        else:
-            # If conversation file doesn't exist, initialize self.history to an empty list
-            self.history = []
+        if not os.path.exists(conversation_file) and os.path.exists(base + ".json"):
+            migrated = migrate_json(base + ".json", conversation_file)
+            print(f"Migrated {migrated} messages from {base}.json to {conversation_file}")
+        self._seed()
+
+        # Only the newest messages are read, from the end of the file, however long the log has grown
+        self.log = ConversationLog(conversation_file, tail_messages=LOAD_MESSAGES)
+
+        # Check if the last entry in history is a user entry
+        if self.log.tail and self.log.tail[-1].get("role") == "user":
+            print("Deleted")
+            # If the last entry is a user entry, cut it off the end of the log
+            self.log.truncate_last()
+        self.load_history()
+
+    def _seed(self):
+        # A store added to a conversation that has been going for a while starts out empty; it is filled once
+        # from the whole log, so recall() and the retriever, which indexes the store, also cover the earlier turns
+        if self.store is None or self.store.last_turns(1) or not os.path.exists(self.conversation_file):
+            return
+        seeded = self.store.import_messages(read_history(self.conversation_file))
+        if seeded:
+            print(f"Seeded the conversation store with {seeded} turns from {self.conversation_file}")
+            if self.retriever is not None:
+                self.store.flush()
+                self.retriever.catch_up()
+
+    def _reset(self, history):
+        # Every message's token count is computed once, when it enters the history, and kept next to it
+        self.history = collections.deque(history)
+        self.token_counts = collections.deque(message_tokens(entry, self.tokenizer) for entry in self.history)
+        self.total_tokens = sum(self.token_counts)
+
+    def add_message(self, message):
+        self.history.append(message)
+        self.token_counts.append(message_tokens(message, self.tokenizer))
+        self.total_tokens += self.token_counts[-1]
+        self.strip_history()
+
+    def count_tokens(self):
+        return self.total_tokens
 
     def count_words(self):
         return sum(len(entry["content"].split()) for entry in self.history)
 
+    def memory_message(self):
+        # The summary of the evicted messages and its token count, recounted only when a new version arrives
+        if self.summarizer is None:
+            return None, 0
+        message = self.summarizer.memory_message()
+        if self._memory[0] != self.summarizer.version:
+            self._memory = (self.summarizer.version, message, message_tokens(message, self.tokenizer) if message else 0)
+        return self._memory[1], self._memory[2]
+
+    def _evict(self):
+        # Drops the oldest messages until the running total fits the budget, each in O(1)
+        budget = self.history_offset - self.memory_message()[1]
+        evicted = []
+        while self.total_tokens > budget and self.history:
+            evicted.append(self.history.popleft())
+            self.total_tokens -= self.token_counts.popleft()
+        return evicted
+
     def strip_history(self):
-        total_words = self.count_words()
-        while total_words > self.history_offset and self.history:
-            total_words -= len(self.history.pop(0)["content"].split())
+        evicted = self._evict()
+        if evicted and self.summarizer is not None:
+            self.summarizer.submit(evicted)
         return self.history
 
+    def prompt_history(self, query=None):
+        # The messages to send: the summary of the evicted turns and the earlier exchanges relevant to the query,
+        # if there are any, followed by the history. Always a snapshot: the request may be built on another thread
+        # while the next turn appends to the live deque
+        context = [self.memory_message()[0]]
+        if self.retriever is not None and query:
+            # Exchanges still in the window are not repeated
+            context.append(as_message(self.retriever.search(query, exclude_last=len(self.history) // 2)))
+        context = [message for message in context if message]
+        return [*context, *self.history]
+
     def store_history(self, history):
-        self.history = history
-        self.strip_history()
+        # Accepts any iterable of messages; the history itself is a deque, which cannot be concatenated with a list
+        history = list(history)
+        current = len(self.history)
+        if current and len(history) >= current and history[0] is self.history[0] and history[current - 1] is self.history[-1]:
+            # The usual call, store_history([*manager.history, message]): only the new messages are counted
+            for message in itertools.islice(history, current, None):
+                self.add_message(message)
+        else:
+            self._reset(history)
+            self.strip_history()
 
     def update_file(self, user_query, assistant_response):
-        conversation_json = [{"role": "user", "content": user_query}, {"role": "assistant", "content": assistant_response}]
-        data = []
-        if os.path.exists(self.conversation_file) and os.path.getsize(self.conversation_file) > 0:
-            with open(self.conversation_file, "r") as file:
-                try:
-                    data = json.load(file)
-                except json.JSONDecodeError:
-                    pass
-
-        for entry in conversation_json:
-            if isinstance(entry, dict):
-                data.append(entry)
-
-        with open(self.conversation_file, "w") as file:
-            json.dump(data, file, indent=4)
-
-        self.store_history(self.history + [{"role": "assistant", "content": assistant_response}])
+        # Appends the turn to the log instead of re-reading and rewriting the whole history
+        self.log.append([{"role": "user", "content": user_query}, {"role": "assistant", "content": assistant_response}])
+        self.add_message({"role": "assistant", "content": assistant_response})
+        if self.store is not None:
+            turn_id = self.store.add_turn(user_query, assistant_response)
+            if self.retriever is not None:
+                self.retriever.add(turn_id, user_query)
+
+    def recall(self, query, k=5):
+        # Earlier turns matching the query, from the whole history rather than just the prompt window
+        return self.store.recall(query, k) if self.store is not None else []
 
     def load_history(self):
-        with open(self.conversation_file, "r") as file:
-            self.history = json.load(file)
+        self._reset(self.log.last(LOAD_MESSAGES))
+        # Messages that did not fit at startup were evicted, and summarized, in an earlier session
+        self._evict()
+
+    def flush(self):
+        # Forces the turns appended so far to disk; they are otherwise fsynced in batches every second
+        self.log.flush()
+        if self.summarizer is not None:
+            self.summarizer.flush()
+        if self.retriever is not None:
+            self.retriever.flush()
 
     def strip_history_by_word_limit(self, word_limit):
         total_words = 0
-        trimmed_history = []
+        trimmed_history = collections.deque()
 
         # Traverse the history from the end to the beginning
         for entry in reversed(self.history):
             entry_words = len(entry["content"].split())
             if total_words + entry_words > word_limit:
                 break
-            trimmed_history.insert(0, entry)
+            trimmed_history.appendleft(entry)
             total_words += entry_words
 
-        self.history = trimmed_history
+        self._reset(trimmed_history)
 
 
 
@@ -88,6 +173,7 @@ if __name__ == "__main__":
             print("Exiting chat...")
             break
 
-        history_manager.store_history(history_manager.history + [{"role": "user", "content": user_query}])
-        print("\n\n\033[93m" + str(history_manager.history) + "\033[0m\n\n")
+        history_manager.add_message({"role": "user", "content": user_query})
+        print("\n\n\033[93m" + str(list(history_manager.history)) + "\033[0m\n\n")
+        print(f"\033[94m{history_manager.count_tokens()} of {history_manager.history_offset} tokens\033[0m")
         history_manager.update_file(user_query, "THIS IS THE ASSISTANT RESPONSE")
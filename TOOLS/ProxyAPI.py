@@ -1,11 +1,16 @@
 import requests
 import time
+from typing import List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from TOOLS.persistence import get_writer
+
 def get_proxies(filename: str = "ASSETS/available_working_proxies.txt", number_of_proxies: int = 100, verbose: bool = False,
-                max_workers: int = 100, timeout: int = 2,) -> None:
+                max_workers: int = 100, timeout: int = 2,) -> List[str]:
     """
     Fetches proxies, checks validity concurrently, and stores them sorted by response time.
+    The file is written atomically in the background by TOOLS.persistence; use the returned list
+    instead of reading it back right away.
 
     Args:
         filename (str, optional): File for storing proxies. Defaults to "available_working_proxies.txt".
@@ -13,6 +18,9 @@ def get_proxies(filename: str = "ASSETS/available_working_proxies.txt", number_o
         verbose (bool, optional): Verbosity flag. Defaults to False.
         max_workers (int, optional): Maximum concurrent worker threads. Defaults to 100.
         timeout (int, optional): Proxy check timeout in seconds. Defaults to 2.
+
+    Returns:
+        List[str]: The working proxies, fastest first.
     """
     start_time = time.perf_counter()
 
@@ -40,14 +48,15 @@ def get_proxies(filename: str = "ASSETS/available_working_proxies.txt", number_o
         print(f"Working Proxies Percentage: {round(len(working_proxies) / len(proxies) * 100)}%")
         print(f"Storing proxies in {filename}...")
 
-    with open(filename, "w") as f:
-        f.writelines(f"{proxy}\n" for proxy, _ in working_proxies)
+    working_proxies = [proxy for proxy, _ in working_proxies]
+    get_writer().write(filename, "".join(f"{proxy}\n" for proxy in working_proxies))
 
     total_time = time.perf_counter() - start_time
 
     if verbose:
         print(f"Updated all proxies in {filename}")
         print(f"Total execution time: {total_time:.2f} seconds")
+    return working_proxies
 
 def check_proxy(proxy, timeout):
     start_time = time.perf_counter()
@@ -0,0 +1,295 @@
+import atexit
+import collections
+import itertools
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from TOOLS.conversation_log import pair_turns
+
+DATABASE_FILE = os.path.join("ASSETS", "conversation_history.sqlite3")
+# The writer thread commits whatever has queued up at most every BATCH_INTERVAL seconds, BATCH_SIZE turns per transaction
+BATCH_INTERVAL = 0.5
+BATCH_SIZE = 512
+RECALL_RESULTS = 5
+# recall() ranks at most this many of the newest matching turns, which bounds its cost when a word occurs in
+# a large share of the history; rarer words still match across every stored turn
+RECALL_CANDIDATES = 2000
+_INSERT = "INSERT INTO turns (id, created_at, user, assistant) VALUES (:id, :created_at, :user, :assistant)"
+
+# Words too common to say anything about which turn is meant; leaving them out of the MATCH keeps
+# recall from ranking half of a million-turn history
+STOPWORDS = frozenset(
+    "a an the is are was were be am to of in on at for with about me my i you your it its this that these those "
+    "what whats tell please can could would will do does did give lets just hey hi hello ok okay so and or "
+    "how when where who why which there here have has had not no yes".split()
+)
+_WORD_RE = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    user TEXT NOT NULL,
+    assistant TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(user, assistant, content='turns', content_rowid='id', tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS turns_insert AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts(rowid, user, assistant) VALUES (new.id, new.user, new.assistant);
+END;
+CREATE TRIGGER IF NOT EXISTS turns_delete AFTER DELETE ON turns BEGIN
+    INSERT INTO turns_fts(turns_fts, rowid, user, assistant) VALUES ('delete', old.id, old.user, old.assistant);
+END;
+"""
+
+
+def match_query(text: str) -> Optional[str]:
+    """
+    Turns free text into an FTS5 query that matches turns containing any of its content words.
+
+    Every word is quoted, so user text can never be parsed as FTS5 syntax (AND, NEAR, column filters).
+
+    Returns:
+        Optional[str]: The MATCH expression, or None when the text has no content words.
+    """
+    words = dict.fromkeys(word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS)
+    return " OR ".join(f'"{word}"' for word in words) or None
+
+
+class ConversationStore:
+    """
+    Searchable conversation history in SQLite, one row per user/assistant turn.
+
+    The database runs in WAL mode, so reads never wait for the writer. add_turn() only queues the
+    turn; a background thread inserts the queue in one transaction per batch, so a turn costs the
+    voice loop a queue put instead of a commit. A turn's id is assigned when it is queued, so other
+    indexes such as RetrievalMemory can refer to it right away. Every turn is indexed by an FTS5 table kept in sync by
+    triggers, and both lookups are index reads whose cost does not grow with the number of stored turns:
+    last_turns() walks the primary key backwards and recall() ranks only the newest turns containing
+    the query's words.
+    """
+
+    def __init__(self, path: str = DATABASE_FILE, batch_interval: float = BATCH_INTERVAL, batch_size: int = BATCH_SIZE) -> None:
+        """
+        Args:
+            path (str, optional): The SQLite file. Defaults to DATABASE_FILE.
+            batch_interval (float, optional): Longest a queued turn waits for its commit, in seconds. Defaults to BATCH_INTERVAL.
+            batch_size (int, optional): Most turns inserted per transaction. Defaults to BATCH_SIZE.
+        """
+        self.path = path
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._writer_db = self._connect()
+        self._writer_db.executescript(_SCHEMA)
+        self._reader_db = self._connect()
+        self._read_lock = threading.Lock()
+
+        # Queued turns that are not committed yet, so last_turns() already returns them
+        self._pending: "collections.deque[Dict]" = collections.deque()
+        self._pending_lock = threading.Lock()
+        self._next_id = (self._writer_db.execute("SELECT max(id) FROM turns").fetchone()[0] or 0) + 1
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="conversation-store", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only syncs at checkpoints: a power cut can lose the last batch, never corrupt the file
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def add_turn(self, user: str, assistant: str) -> int:
+        """Queues a turn for the next batched insert and returns its id; it is searchable by recall() once committed."""
+        if self._closed:
+            raise RuntimeError("ConversationStore is closed")
+        if not isinstance(user, str) or not isinstance(assistant, str):
+            raise TypeError(f"A turn needs the user and assistant text as str, got {type(user).__name__} and {type(assistant).__name__}")
+        with self._pending_lock:
+            turn = {"id": self._next_id, "created_at": time.time(), "user": user, "assistant": assistant}
+            self._next_id += 1
+            self._pending.append(turn)
+        self._queue.put(turn)
+        return turn["id"]
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_interval
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            turns = [turn for turn in batch if turn is not None]
+            if turns:
+                self._insert(turns)
+            for _ in batch:
+                self._queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def _insert(self, turns: List[Dict]) -> None:
+        """
+        Inserts a batch in one transaction. If the batch fails, its turns are retried one by one and those
+        that still fail are logged and dropped, so one bad turn never stops the writer thread.
+        """
+        # Committed and dequeued under one lock, so last_turns() never sees a turn in both places
+        try:
+            with self._pending_lock, self._writer_db:
+                self._writer_db.executemany(_INSERT, turns)
+                for _ in turns:
+                    self._pending.popleft()
+            return
+        except Exception as e:
+            print(f"\033[91mConversation store could not insert a batch of {len(turns)} turns ({e}), retrying them one by one\033[0m")
+        for turn in turns:
+            with self._pending_lock:
+                try:
+                    with self._writer_db:
+                        self._writer_db.execute(_INSERT, turn)
+                except Exception as e:
+                    print(f"\033[91mConversation store dropped the turn {turn['user'][:40]!r}: {e}\033[0m")
+                self._pending.popleft()
+
+    def flush(self) -> None:
+        """Blocks until every queued turn is committed or dropped."""
+        self._queue.join()
+
+    def import_messages(self, messages: Iterable[Dict]) -> int:
+        """
+        Stores a chat history, e.g. ConversationHistoryManager.history, pairing each user message with
+        the assistant reply after it.
+
+        Returns:
+            int: The number of turns queued.
+        """
+        count = 0
+        for user, assistant in pair_turns(messages):
+            self.add_turn(user, assistant)
+            count += 1
+        return count
+
+    def last_turns(self, count: int) -> List[Dict]:
+        """
+        Returns the newest count turns, oldest first, including those still waiting for their commit.
+
+        Args:
+            count (int): Number of turns.
+
+        Returns:
+            List[Dict]: Turns with "id", "created_at", "user" and "assistant".
+        """
+        if count <= 0:
+            return []
+        rows = []
+        with self._pending_lock:
+            pending = [dict(turn) for turn in itertools.islice(self._pending, max(0, len(self._pending) - count), None)]
+            needed = count - len(pending)
+            if needed:
+                with self._read_lock:
+                    rows = self._reader_db.execute("SELECT id, created_at, user, assistant FROM turns ORDER BY id DESC LIMIT ?",
+                                                   (needed,)).fetchall()
+        committed = [{"id": row[0], "created_at": row[1], "user": row[2], "assistant": row[3]} for row in reversed(rows)]
+        return committed + pending
+
+    def turns_by_id(self, ids: Iterable[int]) -> Dict[int, Dict]:
+        """
+        Looks turns up by id, including those still waiting for their commit.
+
+        Returns:
+            Dict[int, Dict]: The turns found, by id, with "id", "created_at", "user" and "assistant"; dropped turns are missing.
+        """
+        wanted = set(ids)
+        with self._pending_lock:
+            found = {turn["id"]: dict(turn) for turn in self._pending if turn["id"] in wanted}
+            missing = list(wanted - found.keys())
+            if missing:
+                with self._read_lock:
+                    rows = self._reader_db.execute(f"SELECT id, created_at, user, assistant FROM turns WHERE id IN ({','.join('?' * len(missing))})",
+                                                   missing).fetchall()
+                found.update({row[0]: {"id": row[0], "created_at": row[1], "user": row[2], "assistant": row[3]} for row in rows})
+        return found
+
+    def user_texts_after(self, turn_id: int) -> List[Tuple[int, str]]:
+        """Returns (id, user) of every committed turn newer than turn_id, oldest first, e.g. to build an index over them."""
+        with self._read_lock:
+            return self._reader_db.execute("SELECT id, user FROM turns WHERE id > ? ORDER BY id", (turn_id,)).fetchall()
+
+    def recall(self, query: str, k: int = RECALL_RESULTS) -> List[Dict]:
+        """
+        Returns the k committed turns that best match a query, ranked by BM25 over the user and assistant
+        text among the newest RECALL_CANDIDATES turns containing any of its words.
+
+        Args:
+            query (str): Free text, e.g. the user's current utterance.
+            k (int, optional): Number of turns. Defaults to RECALL_RESULTS.
+
+        Returns:
+            List[Dict]: Turns with "id", "created_at", "user", "assistant" and "score" (lower is a better match), best first.
+        """
+        expression = match_query(query)
+        if expression is None or k <= 0:
+            return []
+        with self._read_lock:
+            rows = self._reader_db.execute(
+                "SELECT turns.id, turns.created_at, turns.user, turns.assistant, ranked.rank FROM "
+                "(SELECT rowid, bm25(turns_fts) AS rank FROM turns_fts WHERE turns_fts MATCH ? ORDER BY rowid DESC LIMIT ?) AS ranked "
+                "JOIN turns ON turns.id = ranked.rowid ORDER BY ranked.rank LIMIT ?",
+                (expression, RECALL_CANDIDATES, k)).fetchall()
+        return [{"id": row[0], "created_at": row[1], "user": row[2], "assistant": row[3], "score": row[4]} for row in rows]
+
+    def count(self) -> int:
+        """Returns the number of committed turns (the newest id, read from the primary key instead of counting rows)."""
+        with self._read_lock:
+            return self._reader_db.execute("SELECT max(id) FROM turns").fetchone()[0] or 0
+
+    def close(self) -> None:
+        """Commits the queued turns and closes the database; safe to call more than once."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._writer_db.close()
+        with self._read_lock:
+            self._reader_db.close()
+
+
+def as_messages(turns: Iterable[Dict]) -> List[Dict]:
+    """Converts turns from last_turns() or recall() into chat messages for a prompt."""
+    messages = []
+    for turn in turns:
+        messages.append({"role": "user", "content": turn["user"]})
+        messages.append({"role": "assistant", "content": turn["assistant"]})
+    return messages
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ConversationStore(os.path.join(directory, "history.sqlite3"))
+        store.add_turn("My sister's wedding is in Jaipur on the 14th of December", "How exciting! Shall I remind you a week before?")
+        store.add_turn("What should I cook tonight?", "Maybe a nice dal with rice.")
+        for turn in range(20_000):
+            store.add_turn(f"Question number {turn} about the weather", "It will be sunny.")
+        print("Before the first commit, last turn:", store.last_turns(1)[0]["user"])
+        store.flush()
+
+        start = time.perf_counter()
+        last = store.last_turns(10)
+        print(f"\033[92mlast_turns(10) in {(time.perf_counter() - start) * 1000:.2f} ms\033[0m")
+        start = time.perf_counter()
+        found = store.recall("when is the wedding?", k=3)
+        print(f"\033[92mrecall() in {(time.perf_counter() - start) * 1000:.2f} ms:\033[0m {as_messages(found[:1])}")
+        print(f"{store.count()} turns stored")
+        store.close()
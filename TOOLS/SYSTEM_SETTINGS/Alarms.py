@@ -4,6 +4,7 @@ import datetime
 import threading
 import json
 import os
+from TOOLS.persistence import get_writer
 
 class AlarmManager:
     """
@@ -46,10 +47,10 @@ class AlarmManager:
 
     def _save_alarms(self) -> None:
         """
-        Saves the current alarms to the JSON file.
+        Saves the current alarms to the JSON file. The file is written atomically by the background
+        persistence writer, so setting or ringing an alarm never waits for the disk.
         """
-        with open(self._alarm_file, 'w') as f:
-            json.dump(self._alarms, f)
+        get_writer().write_json(self._alarm_file, list(self._alarms))
 
     def _is_duplicate_alarm(self, alarm_time: str, alarm_type: str) -> bool:
         """
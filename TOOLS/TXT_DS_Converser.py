@@ -1,32 +1,58 @@
+import collections
 import os
 
+from TOOLS.persistence import atomic_write
+
 class ConversationHistoryManager:
-    def __init__(self, conversation_file="ASSETS/conversation_history.txt", max_lines=50):
+    def __init__(self, conversation_file="ASSETS/conversation_history.txt", max_lines=50, compact_factor=2):
         self.conversation_file = conversation_file
         self.max_lines = max_lines
+        # The file is only appended to and is cut back to max_lines once it holds compact_factor times as many,
+        # so the rewrite happens every (compact_factor - 1) * max_lines lines instead of on every turn
+        self.compact_factor = compact_factor
         self.load_history()
 
     def load_history(self):
-        """Loads conversation history from file, if it exists."""
-        self.history = []
+        """Loads the last max_lines lines of the conversation history from file, if it exists."""
+        # A ring buffer of the newest lines; appending to a full buffer drops the oldest line in O(1)
+        self.history = collections.deque(maxlen=self.max_lines)
+        self.file_lines = 0
         if os.path.exists(self.conversation_file):
             with open(self.conversation_file, 'r') as f:
-                self.history = f.readlines()
+                for line in f:
+                    self.history.append(line)
+                    self.file_lines += 1
+        # The lines are only joined when the formatted history is read, and the result is reused until the next turn
+        self._formatted = None
+
+    def _append(self, line):
+        self.history.append(line)
+        self._formatted = None
 
     def save_history(self):
-        """Saves conversation history to file, truncating if necessary."""
-        with open(self.conversation_file, 'w') as f:
-            f.writelines(self.history[-self.max_lines:])
+        """Rewrites the file with the last max_lines lines of the history."""
+        atomic_write(self.conversation_file, "".join(self.history))
+        # A multi-line response is one entry in the history but several lines in the file
+        self.file_lines = sum(line.count("\n") for line in self.history)
 
     def update_history(self, user_input, assistant_response):
-        """Adds an entry to the history with the specified role and content."""
-        self.history.append(f"User : {user_input}\n")
-        self.history.append(f"Assistant : {assistant_response}\n")
-        self.save_history()
+        """Adds a user and an assistant entry to the history and appends them to the file."""
+        lines = [f"User : {user_input}\n", f"Assistant : {assistant_response}\n"]
+        for line in lines:
+            self._append(line)
+        added = sum(line.count("\n") for line in lines)
+        if self.file_lines + added > self.max_lines * self.compact_factor:
+            self.save_history()
+        else:
+            with open(self.conversation_file, 'a') as f:
+                f.writelines(lines)
+            self.file_lines += added
 
     def get_formatted_history(self, user_input):
         """Returns the history formatted as a single string."""
-        return "".join(self.history) + f"User : {user_input}\nAssistant :" 
+        if self._formatted is None:
+            self._formatted = "".join(self.history)
+        return self._formatted + f"User : {user_input}\nAssistant :"
 
 # Example usage:
 if __name__ == "__main__":
@@ -41,9 +67,9 @@ if __name__ == "__main__":
         print(history_manager.history)
         # Here you would call your AI model, passing the formatted history
         # assistant_response = your_ai_model.generate(history_manager.get_formatted_history())
-        
+
         # For demonstration purposes, let's simulate an assistant response:
-        assistant_response = "This is a simulated response based on your input." 
+        assistant_response = "This is a simulated response based on your input."
 
         history_manager.update_history(user_query, assistant_response)
-        print(f"Assistant: {assistant_response}") 
\ No newline at end of file
+        print(f"Assistant: {assistant_response}")
@@ -7,7 +7,7 @@ from dotenv import load_dotenv; load_dotenv()
 from googlesearch import search as google_search
 from duckduckgo_search import DDGS
 
-import requests
+from TOOLS import http_transport
 import json
 import concurrent.futures
 
@@ -76,7 +76,7 @@ def fetch_search_results(query: str, max_results: int = 5, verbose: bool = False
                 'X-API-KEY': os.getenv('SERPER_API_KEY'),
                 'Content-Type': 'application/json'
             }
-            response = requests.post(url, headers=headers, data=payload)
+            response = http_transport.post(url, headers=headers, data=payload)
             if response.status_code == 200:
                 data = response.json()
                 for j, result in enumerate(data.get('organic', [])):
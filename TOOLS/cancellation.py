@@ -0,0 +1,166 @@
+import atexit
+import socket
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class CancelToken:
+    """
+    A cancellation signal shared by every stage of one turn: the LLM stream, the TTS syntheses and
+    the audio playback. Stages register a callback that tears down their own work (close a socket,
+    cancel futures, stop the mixer); cancel() runs all of them at once from the thread that noticed
+    the interruption, so nothing has to poll for it.
+
+    The token also answers is_set()/set() like a threading.Event, so it can be passed wherever the
+    existing code expects a stop event, e.g. HotwordDetector.listen_for_hotwords(stop_event=token).
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.cancelled_at: Optional[float] = None
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> bool:
+        """
+        Cancels the turn and runs every registered callback once.
+
+        Returns:
+            bool: True if this call cancelled the token, False if it was already cancelled.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.cancelled_at = time.perf_counter()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"\033[91mCancel callback failed: {e}\033[0m")
+        return True
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Registers a callback to run on cancel(). If the token is already cancelled, it runs immediately.
+
+        Args:
+            callback (Callable[[], None]): Tears down one piece of in-flight work.
+
+        Returns:
+            Callable[[], None]: Unregisters the callback; call it once the work has finished normally.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the token is cancelled or timeout expires, and returns is_cancelled."""
+        return self._event.wait(timeout)
+
+    def is_set(self) -> bool:
+        """threading.Event compatible alias of is_cancelled."""
+        return self._event.is_set()
+
+    def set(self) -> None:
+        """threading.Event compatible alias of cancel()."""
+        self.cancel()
+
+
+def abort_response(response) -> None:
+    """
+    Aborts a streamed requests/urllib3 response from another thread. Shutting the socket down wakes
+    a reader blocked in recv() immediately, which closing the response alone does not guarantee.
+
+    Args:
+        response: A requests.Response or urllib3 HTTPResponse opened with stream=True.
+    """
+    raw = getattr(response, "raw", response)
+    connection = getattr(raw, "connection", None) or getattr(raw, "_connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        response.close()
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector():
+    """
+    Returns the process-wide HotwordDetector used for barge-in, creating it on first use. Porcupine and
+    the microphone stream are opened once and kept for every turn; they are released at exit.
+    """
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            from TOOLS.AUDIO.Hotword_Detection import HotwordDetector
+            _detector = HotwordDetector()
+            atexit.register(_detector.close)
+        return _detector
+
+
+def watch_hotword(token: CancelToken, detector=None) -> Callable[[], None]:
+    """
+    Listens for a hotword in the background and cancels the token when one is heard (barge-in).
+    A single detector is used for the whole turn, instead of one per played file, and is kept open
+    for the next turn.
+
+    Args:
+        token (CancelToken): The token of the turn being spoken.
+        detector (HotwordDetector, optional): The detector to use; it is left open. Defaults to get_detector().
+
+    Returns:
+        Callable[[], None]: Stops listening; call it once the turn has been spoken.
+    """
+    detector = detector or get_detector()
+    # A stop event of this turn only, so stopping never leaves the shared detector stopped for the next one
+    stopped = threading.Event()
+    unregister = token.add_callback(stopped.set)
+
+    def listen() -> None:
+        if detector.listen_for_hotwords(stop_event=stopped, keep_open=True):
+            token.cancel()
+
+    thread = threading.Thread(target=listen, daemon=True)
+    thread.start()
+
+    def stop() -> None:
+        stopped.set()
+        unregister()
+        thread.join(timeout=1)
+
+    return stop
+
+
+if __name__ == "__main__":
+    token = CancelToken()
+    token.add_callback(lambda: print("Closing the LLM stream"))
+    token.add_callback(lambda: print("Cancelling pending TTS jobs"))
+    hotword = threading.Timer(0.5, token.cancel)
+    hotword.start()
+
+    start = time.perf_counter()
+    token.wait()
+    hotword.join()
+    print(f"Cancelled after {time.perf_counter() - start:.2f} seconds")
@@ -0,0 +1,285 @@
+import atexit
+import collections
+import glob
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from TOOLS.persistence import COMMIT_INTERVAL, PersistenceWriter, atomic_write, get_writer
+
+# The live file is rotated into an archive once it grows past MAX_BYTES; the newest KEEP_MESSAGES
+# messages are carried over so the next start still finds its prompt window in the live file
+MAX_BYTES = 8 * 1024 * 1024
+KEEP_MESSAGES = 400
+TAIL_MESSAGES = 400
+BLOCK_SIZE = 64 * 1024
+
+
+def read_reverse(path: str, block_size: int = BLOCK_SIZE) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yields the lines of a file from last to first, with the byte offset each line starts at, reading
+    only as many blocks from the end as the caller consumes.
+
+    Args:
+        path (str): The file to read.
+        block_size (int, optional): Bytes read per step. Defaults to 64 KiB.
+    """
+    with open(path, "rb") as file:
+        position = file.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            file.seek(position)
+            lines = (file.read(step) + remainder).split(b"\n")
+            remainder = lines.pop(0)
+            offset = position + len(remainder) + 1
+            ends = []
+            for line in lines:
+                ends.append((offset, line))
+                offset += len(line) + 1
+            for line_offset, line in reversed(ends):
+                if line.strip():
+                    yield line_offset, line
+        if remainder.strip():
+            yield 0, remainder
+
+
+class ConversationLog:
+    """
+    Append-only JSON-lines store of conversation messages.
+
+    Appending a turn writes two short lines instead of re-reading and rewriting the whole history.
+    Writes are flushed and fsynced in batches by the persistence writer's group commit, every
+    COMMIT_INTERVAL seconds (and on flush()/close()), so at most that much history is lost on a power cut. The newest
+    messages are kept in an in-memory tail, and starting up reads only that tail from the end of the
+    file, so the cost per turn and at startup does not depend on how much history has piled up.
+    Once the live file grows past MAX_BYTES it is rotated into a timestamped archive in the background.
+    """
+
+    def __init__(self, path: str, tail_messages: int = TAIL_MESSAGES, writer: Optional[PersistenceWriter] = None,
+                 max_bytes: int = MAX_BYTES, keep_messages: int = KEEP_MESSAGES) -> None:
+        """
+        Args:
+            path (str): The .jsonl file.
+            tail_messages (int, optional): Number of newest messages kept in memory. Defaults to TAIL_MESSAGES.
+            writer (Optional[PersistenceWriter], optional): Whose group commits flush + fsync the log. Defaults to get_writer().
+            max_bytes (int, optional): Size of the live file that triggers a rotation. Defaults to MAX_BYTES.
+            keep_messages (int, optional): Newest messages copied into the new live file on rotation. Defaults to KEEP_MESSAGES.
+        """
+        self.path = path
+        self.writer = writer or get_writer()
+        self.max_bytes = max_bytes
+        self.keep_messages = keep_messages
+        self.tail: "collections.deque[Dict]" = collections.deque(maxlen=max(tail_messages, keep_messages))
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._closed = False
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            self.tail.extendleft(self._read_tail(self.tail.maxlen))
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        self.writer.register(self._sync)
+        atexit.register(self.close)
+
+    def _read_tail(self, count: int) -> List[Dict]:
+        """Returns the newest count messages, newest first; an incomplete last line (crash mid-write) is cut off."""
+        messages = []
+        for offset, line in read_reverse(self.path):
+            try:
+                messages.append(json.loads(line))
+            except json.JSONDecodeError:
+                if not messages:
+                    with open(self.path, "r+b") as file:
+                        file.truncate(offset)
+                continue
+            if len(messages) >= count:
+                break
+        return messages
+
+    def append(self, messages: Iterable[Dict]) -> None:
+        """Appends messages; they are durable after the next batched fsync."""
+        data = b"".join(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n" for message in messages)
+        with self._lock:
+            self._file.write(data)
+            self._size += len(data)
+            self._dirty = True
+            self.tail.extend(json.loads(line) for line in data.splitlines())
+
+    def last(self, count: int) -> List[Dict]:
+        """Returns the newest count messages, oldest first, from memory when the tail holds them."""
+        with self._lock:
+            if count <= len(self.tail) or self._size == 0:
+                return list(self.tail)[-count:] if count else []
+            self._flush(fsync=False)
+        return list(reversed(self._read_tail(count)))
+
+    def truncate_last(self) -> Optional[Dict]:
+        """Removes the newest message from the file and the tail, e.g. an unanswered user query after a crash."""
+        with self._lock:
+            if not self.tail:
+                return None
+            self._flush(fsync=False)
+            offset, _ = next(read_reverse(self.path))
+            self._file.truncate(offset)
+            self._file.seek(offset)
+            self._size = offset
+            self._dirty = True
+            return self.tail.pop()
+
+    def _flush(self, fsync: bool = True) -> None:
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+        self._dirty = False
+
+    def flush(self) -> None:
+        """Writes and fsyncs everything appended so far."""
+        with self._lock:
+            if not self._closed:
+                self._flush()
+
+    def _sync(self) -> None:
+        # Runs in every commit of the persistence writer
+        with self._lock:
+            if self._closed:
+                return
+            if self._dirty:
+                self._flush()
+            rotate = self._size > self.max_bytes
+        if rotate:
+            self.rotate()
+
+    def rotate(self) -> Optional[str]:
+        """
+        Moves the live file into an archive next to it and starts a new live file with the newest
+        keep_messages messages.
+
+        Returns:
+            Optional[str]: The archive's path, or None if the live file was empty.
+        """
+        with self._lock:
+            if self._closed or self._size == 0:
+                return None
+            self._flush()
+            keep = list(self.tail)[-self.keep_messages:]
+            base, extension = os.path.splitext(self.path)
+            archive = f"{base}-{time.strftime('%Y%m%d-%H%M%S')}{extension}"
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(b"".join(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n" for message in keep))
+                file.flush()
+                os.fsync(file.fileno())
+            self._file.close()
+            os.replace(self.path, archive)
+            os.replace(temp_path, self.path)
+            self._file = open(self.path, "ab")
+            self._size = self._file.tell()
+            return archive
+
+    def close(self) -> None:
+        """Flushes and closes the file; safe to call more than once."""
+        self.writer.unregister(self._sync)
+        with self._lock:
+            if self._closed:
+                return
+            self._flush()
+            self._file.close()
+            self._closed = True
+
+
+def pair_turns(messages: Iterable[Dict]) -> Iterator[Tuple[str, str]]:
+    """Yields (user, assistant) for every user message followed by an assistant reply; unanswered messages are skipped."""
+    user = None
+    for message in messages:
+        if message.get("role") == "user":
+            user = message.get("content") or ""
+        elif message.get("role") == "assistant" and user is not None:
+            yield user, message.get("content") or ""
+            user = None
+
+
+def _read_messages(path: str) -> List[Dict]:
+    messages = []
+    with open(path, "rb") as file:
+        for line in file:
+            try:
+                messages.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return messages
+
+
+def _carried_over(previous: List[Dict], messages: List[Dict]) -> int:
+    # rotate() starts the next file with the newest messages of the archived one; finds how many that were
+    for start in range(len(previous)):
+        if previous[start:] == messages[:len(previous) - start]:
+            return len(previous) - start
+    return 0
+
+
+def read_history(path: str, keep_messages: int = KEEP_MESSAGES) -> Iterator[Dict]:
+    """
+    Yields every message of a conversation log, oldest first: the archives rotate() created, then the
+    live file. The messages each rotation carried over into the next file are only yielded once.
+
+    Args:
+        path (str): The live .jsonl file.
+        keep_messages (int, optional): The log's keep_messages. Defaults to KEEP_MESSAGES.
+    """
+    base, extension = os.path.splitext(path)
+    archives = sorted(glob.glob(f"{glob.escape(base)}-{'[0-9]' * 8}-{'[0-9]' * 6}{glob.escape(extension)}"))
+    previous: List[Dict] = []
+    for file_path in [*archives, path]:
+        if not os.path.exists(file_path):
+            continue
+        messages = _read_messages(file_path)
+        yield from messages[_carried_over(previous, messages):]
+        previous = (previous + messages)[-keep_messages:]
+
+
+def migrate_json(json_path: str, jsonl_path: str) -> int:
+    """
+    Converts a conversation history saved as one JSON array into the JSON-lines format.
+
+    Args:
+        json_path (str): The old .json file.
+        jsonl_path (str): The .jsonl file to create.
+
+    Returns:
+        int: The number of messages migrated.
+    """
+    messages = []
+    if os.path.getsize(json_path) > 0:
+        with open(json_path, "r") as file:
+            try:
+                messages = json.load(file)
+            except json.JSONDecodeError:
+                print(f"\033[91mCould not migrate unreadable history: {json_path}\033[0m")
+    atomic_write(jsonl_path, b"".join(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n" for message in messages))
+    return len(messages)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.jsonl")
+        log = ConversationLog(path, max_bytes=200_000)
+        start = time.perf_counter()
+        for turn in range(20_000):
+            log.append([{"role": "user", "content": f"Question {turn}"}, {"role": "assistant", "content": "An answer " * 5}])
+        elapsed = time.perf_counter() - start
+        print(f"Appended 20,000 turns in {elapsed:.2f} s ({elapsed / 20_000 * 1e6:.1f} µs per turn)")
+        time.sleep(COMMIT_INTERVAL * 1.5)  # Let the persistence writer fsync and rotate the oversized file
+        log.close()
+
+        start = time.perf_counter()
+        reopened = ConversationLog(path)
+        print(f"Reopened in {(time.perf_counter() - start) * 1000:.2f} ms, last message: {reopened.last(1)}")
+        print(f"Archive after rotation: {sorted(os.listdir(directory))}")
+        reopened.close()
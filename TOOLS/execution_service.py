@@ -0,0 +1,191 @@
+import atexit
+import concurrent.futures
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class _PoolStats:
+    """Counters for one worker pool. All access goes through ExecutionService._lock."""
+
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_latency = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        finished = max(self.completed, 1)
+        return {
+            "submitted": self.submitted,
+            "running": self.started - self.completed,
+            "queue_depth": self.submitted - self.started - self.cancelled,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait / finished * 1000, 2),
+            "avg_run_ms": round(self.total_run / finished * 1000, 2),
+            "max_latency_ms": round(self.max_latency * 1000, 2),
+        }
+
+
+class TaskGroup:
+    """
+    A named set of futures that belong together, e.g. the classifier and default-answer requests
+    of a single turn. Once the router has decided, the siblings that are no longer needed can be
+    cancelled in one call.
+    """
+
+    def __init__(self, service: "ExecutionService", name: str) -> None:
+        self.service = service
+        self.name = name
+        self.futures: List[concurrent.futures.Future] = []
+
+    def submit(self, fn: Callable, *args, cpu: bool = False, **kwargs) -> concurrent.futures.Future:
+        """Submits fn to the shared pools and tracks it as part of this group."""
+        future = self.service.submit(fn, *args, cpu=cpu, group=self.name, **kwargs)
+        self.futures.append(future)
+        return future
+
+    def cancel(self, keep: Iterable[concurrent.futures.Future] = ()) -> int:
+        """
+        Cancels every future of the group that has not started yet, except those in keep.
+
+        Returns:
+            int: The number of futures that were actually cancelled.
+        """
+        keep = set(keep)
+        return sum(future.cancel() for future in self.futures if future not in keep)
+
+    def wait(self, timeout: Optional[float] = None, return_when: str = concurrent.futures.ALL_COMPLETED):
+        """Waits for the futures of the group, see concurrent.futures.wait."""
+        return concurrent.futures.wait(self.futures, timeout=timeout, return_when=return_when)
+
+
+class ExecutionService:
+    """
+    Process-wide executor with a fixed pool of I/O workers (HTTP requests, audio, file access)
+    and a separate, smaller pool for CPU-bound work, so bursts of turns reuse the same threads
+    instead of spawning new ones for every submit.
+    """
+
+    def __init__(self, io_workers: int = 16, cpu_workers: Optional[int] = None) -> None:
+        """
+        Args:
+            io_workers (int, optional): Number of threads for I/O-bound tasks. Defaults to 16.
+            cpu_workers (Optional[int], optional): Number of threads for CPU-bound tasks. Defaults to os.cpu_count().
+        """
+        self._pools = {
+            "io": concurrent.futures.ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="jarvis-io"),
+            "cpu": concurrent.futures.ThreadPoolExecutor(max_workers=cpu_workers or os.cpu_count() or 1, thread_name_prefix="jarvis-cpu"),
+        }
+        self._stats = {name: _PoolStats() for name in self._pools}
+        self._group_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _instrument(self, pool: str, fn: Callable, args: tuple, kwargs: dict) -> Callable[[], Any]:
+        """Wraps fn so that queue wait and run time are recorded for the given pool."""
+        submitted_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            with self._lock:
+                stats = self._stats[pool]
+                stats.started += 1
+                stats.total_wait += started_at - submitted_at
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self._stats[pool].failed += 1
+                raise
+            finally:
+                finished_at = time.perf_counter()
+                with self._lock:
+                    stats = self._stats[pool]
+                    stats.completed += 1
+                    stats.total_run += finished_at - started_at
+                    stats.max_latency = max(stats.max_latency, finished_at - submitted_at)
+
+        return task
+
+    def submit(self, fn: Callable, *args, cpu: bool = False, group: Optional[str] = None, **kwargs) -> concurrent.futures.Future:
+        """
+        Submits fn(*args, **kwargs) to the I/O pool, or to the CPU pool when cpu is True.
+
+        Args:
+            fn (Callable): The callable to execute.
+            cpu (bool, optional): Whether the task is CPU-bound. Defaults to False.
+            group (Optional[str], optional): Name of the task group, used for the per-group counters.
+
+        Returns:
+            concurrent.futures.Future: The future of the submitted task.
+        """
+        pool = "cpu" if cpu else "io"
+        with self._lock:
+            self._stats[pool].submitted += 1
+            if group:
+                self._group_counts[group] = self._group_counts.get(group, 0) + 1
+
+        future = self._pools[pool].submit(self._instrument(pool, fn, args, kwargs))
+        future.add_done_callback(lambda f: self._on_done(pool, f))
+        return future
+
+    def _on_done(self, pool: str, future: concurrent.futures.Future) -> None:
+        if future.cancelled():
+            with self._lock:
+                self._stats[pool].cancelled += 1
+
+    def group(self, name: str) -> TaskGroup:
+        """Creates a new named task group backed by this service."""
+        return TaskGroup(self, name)
+
+    def executor(self, pool: str = "io") -> concurrent.futures.ThreadPoolExecutor:
+        """Returns the raw executor of a pool, for APIs such as loop.run_in_executor."""
+        return self._pools[pool]
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns a snapshot of the queue depth, latency and group counters of every pool."""
+        with self._lock:
+            snapshot = {name: stats.as_dict() for name, stats in self._stats.items()}
+            snapshot["groups"] = dict(self._group_counts)
+        return snapshot
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops both pools, cancelling tasks that have not started yet."""
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_service: Optional[ExecutionService] = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> ExecutionService:
+    """Returns the process-wide ExecutionService, creating it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ExecutionService()
+            atexit.register(_service.shutdown, wait=False)
+        return _service
+
+
+if __name__ == "__main__":
+    service = get_service()
+    turn = service.group("turn")
+
+    slow = turn.submit(time.sleep, 1.0)
+    fast = [turn.submit(time.sleep, 0.05) for _ in range(40)]
+    checksum = service.submit(sum, range(10_000_000), cpu=True)
+
+    fast[0].result()
+    print("Cancelled siblings:", turn.cancel(keep=[slow]))
+    print("CPU result:", checksum.result())
+    slow.result()
+    print(service.stats())
@@ -0,0 +1,306 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from TOOLS.cancellation import CancelToken
+from TOOLS.lazy_import import lazy_module
+from TOOLS.provider_registry import ProviderRegistry
+from TOOLS.sentence_segmenter import SentenceSegmenter
+from TOOLS.tracing import NULL_TRACE
+
+deepInfra_TEXT = lazy_module("BRAIN.AI.TEXT.API.deepInfra_TEXT")
+openrouter = lazy_module("BRAIN.AI.TEXT.API.openrouter")
+Hugging_Face_TEXT = lazy_module("BRAIN.AI.TEXT.API.Hugging_Face_TEXT")
+
+# Seconds without a first token before the next provider is asked too. Set it around the primary's
+# p95 time-to-first-token (python -m TOOLS.tracing report), so only the slowest 5% of turns pay twice.
+HEDGE_DELAY = 0.8
+
+# A provider takes the conversation and the system prompt and returns an async iterator of deltas.
+# Providers are named "provider/model", the key their health is scored under in the ProviderRegistry.
+Provider = Callable[[List[Dict[str, str]], str], AsyncIterator[str]]
+
+DEFAULT_PROVIDERS: List[Tuple[str, Provider]] = [
+    ("deepinfra/Meta-Llama-3.1-405B-Instruct", lambda conversation, system_prompt: deepInfra_TEXT.agenerate(conversation, system_prompt=system_prompt)),
+    ("openrouter/llama-3-8b-instruct:free", lambda conversation, system_prompt: openrouter.agenerate(conversation, system_prompt=system_prompt)),
+    ("huggingface/Phi-3-mini-4k-instruct", lambda conversation, system_prompt: Hugging_Face_TEXT.agenerate(conversation[-1]["content"], system_prompt=system_prompt)),
+]
+
+
+async def _first_delta(name: str, start: Callable[[], AsyncIterator[str]]) -> Tuple[str, AsyncIterator[str], str]:
+    """Starts an attempt and waits for its first delta; an empty stream counts as a failed attempt."""
+    stream = start()
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        raise RuntimeError(f"{name} returned an empty response") from None
+    return name, stream, first
+
+
+async def _discard(stream: AsyncIterator[str]) -> None:
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception:
+            pass
+
+
+async def ahedge(attempts: Sequence[Tuple[str, Callable[[], AsyncIterator[str]]]], hedge_delay: float = HEDGE_DELAY,
+                 on_event: Optional[Callable[[str, str], None]] = None) -> AsyncIterator[str]:
+    """
+    Streams the response of whichever attempt produces a token first.
+
+    The first attempt is started immediately. Every time hedge_delay passes without a first token, or
+    as soon as a started attempt fails, the next attempt is started as well. The first attempt to
+    yield a delta wins: the others are cancelled, which closes their HTTP streams, and the rest of the
+    response is streamed from the winner only.
+
+    Args:
+        attempts (Sequence[Tuple[str, Callable[[], AsyncIterator[str]]]]): (name, start) pairs in order of preference.
+        hedge_delay (float, optional): Seconds to wait for a first token before starting the next attempt. Defaults to HEDGE_DELAY.
+        on_event (Optional[Callable[[str, str], None]], optional): Called with ("hedge" | "failed" | "won", name).
+
+    Yields:
+        str: The text deltas of the winning attempt. Raises the last error if every attempt failed.
+    """
+    on_event = on_event or (lambda event, name: None)
+    waiting = list(attempts)
+    pending: Dict[asyncio.Task, str] = {}
+    last_error: Optional[BaseException] = None
+
+    def start_next() -> None:
+        name, start = waiting.pop(0)
+        pending[asyncio.ensure_future(_first_delta(name, start))] = name
+
+    winner = None
+    try:
+        start_next()
+        while winner is None:
+            if not pending:
+                raise last_error or RuntimeError("No provider to generate with")
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay if waiting else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                on_event("hedge", waiting[0][0])
+                start_next()
+                continue
+            for task in done:
+                name = pending.pop(task)
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    on_event("failed", name)
+                    if waiting:
+                        start_next()
+                elif winner is None:
+                    winner = task.result()
+                else:
+                    # Two attempts produced a token in the same iteration; keep the first one
+                    await _discard(task.result()[1])
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    name, stream, first = winner
+    on_event("won", name)
+    try:
+        yield first
+        async for delta in stream:
+            yield delta
+    finally:
+        await _discard(stream)
+
+
+async def _measured(name: str, stream: AsyncIterator[str], registry: ProviderRegistry,
+                    cancel_token: Optional[CancelToken] = None) -> AsyncIterator[str]:
+    """
+    Passes a provider's deltas through and records its TTFT, speed or failure in the registry. An attempt
+    cancelled with its turn (cancel_token) before the first token is not counted as slow.
+    """
+    started = time.perf_counter()
+    first_at = None
+    tokens = 0
+    try:
+        async for delta in stream:
+            if first_at is None:
+                first_at = time.perf_counter()
+            tokens += 1
+            yield delta
+    except Exception:
+        registry.record_failure(name)
+        raise
+    except BaseException:
+        # Cancelled: either it lost the race before its first token, or the turn was cancelled
+        if first_at is not None:
+            registry.record_success(name, first_at - started, tokens, time.perf_counter() - first_at)
+        elif cancel_token is not None and cancel_token.is_cancelled:
+            registry.record_cancelled(name)
+        else:
+            registry.record_slow(name, time.perf_counter() - started)
+        raise
+    if first_at is None:
+        registry.record_failure(name)
+    else:
+        registry.record_success(name, first_at - started, tokens, time.perf_counter() - first_at)
+
+
+class HedgedRouter:
+    """
+    Sends each request to the currently fastest healthy provider and, when it is slow to answer, to
+    backups as well, streaming from whichever produces a token first.
+
+    The order of the providers comes from a ProviderRegistry, which every attempt reports its
+    time-to-first-token, speed or failure to; providers whose circuit is open are skipped.
+
+    The async providers run on one background event loop thread shared by every request, so
+    synchronous callers such as main.py get hedging without a thread per provider.
+    """
+
+    def __init__(self, providers: Optional[Sequence[Tuple[str, Provider]]] = None, hedge_delay: float = HEDGE_DELAY,
+                 max_attempts: Optional[int] = None, registry: Optional[ProviderRegistry] = None, prints: bool = True) -> None:
+        """
+        Args:
+            providers (Optional[Sequence[Tuple[str, Provider]]], optional): (name, provider) pairs in order of preference. Defaults to DEFAULT_PROVIDERS.
+            hedge_delay (float, optional): Seconds to wait for a first token before asking the next provider. Defaults to HEDGE_DELAY.
+            max_attempts (Optional[int], optional): Maximum number of providers asked per request. Defaults to all of them.
+            registry (Optional[ProviderRegistry], optional): Scores and circuit breakers of the providers. Defaults to one persisted to ASSETS/provider_scores.json.
+            prints (bool, optional): Whether to print hedges, failures and the winning provider. Defaults to True.
+        """
+        self.providers = list(providers or DEFAULT_PROVIDERS)
+        self.hedge_delay = hedge_delay
+        self.max_attempts = max_attempts
+        self.registry = registry or ProviderRegistry()
+        self.prints = prints
+        self.wins: Dict[str, int] = {}
+        self.hedges = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _log(self, trace, event: str, name: str) -> None:
+        if event == "hedge":
+            self.hedges += 1
+        elif event == "won":
+            self.wins[name] = self.wins.get(name, 0) + 1
+        trace.mark(f"llm.{event}", provider=name)
+        if self.prints and event != "won":
+            print(f"\033[93m{'Hedging with' if event == 'hedge' else 'Provider failed:'} {name}\033[0m")
+
+    def agenerate(self, conversation: List[Dict[str, str]], system_prompt: str, trace=NULL_TRACE,
+                  cancel_token: Optional[CancelToken] = None) -> AsyncIterator[str]:
+        """
+        Streams the response deltas of the fastest provider, trying them in the registry's order.
+
+        Args:
+            conversation (List[Dict[str, str]]): The conversation history, without the system prompt. It is not modified.
+            system_prompt (str): The system prompt.
+            trace (Trace, optional): The turn's TOOLS.tracing trace; records hedges, failures and the winner.
+            cancel_token (Optional[CancelToken], optional): The turn's token; attempts cancelled with the turn do not count as slow.
+
+        Returns:
+            AsyncIterator[str]: The text deltas. Raises the last provider error if every provider failed.
+        """
+        conversation = list(conversation)
+        providers = dict(self.providers)
+        attempts = [(name, lambda name=name: _measured(name, providers[name](conversation, system_prompt), self.registry, cancel_token))
+                    for name in self.registry.rank(list(providers))[:self.max_attempts]]
+        return ahedge(attempts, self.hedge_delay, on_event=lambda event, name: self._log(trace, event, name))
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-hedging", daemon=True).start()
+        return self._loop
+
+    def stream(self, conversation: List[Dict[str, str]], system_prompt: str, cancel_token: Optional[CancelToken] = None,
+               trace=NULL_TRACE) -> Iterator[str]:
+        """
+        Synchronous counterpart of agenerate() for threaded callers.
+
+        Args:
+            conversation (List[Dict[str, str]]): The conversation history, without the system prompt. It is not modified.
+            system_prompt (str): The system prompt.
+            cancel_token (Optional[CancelToken], optional): Cancels every in-flight provider request when the turn is cancelled; the iterator then ends.
+            trace (Trace, optional): The turn's TOOLS.tracing trace; also records the first and last token.
+
+        Yields:
+            str: The text deltas. If every provider fails the error is printed and the iterator ends.
+        """
+        deltas: queue.Queue = queue.Queue()
+        done = object()
+
+        async def pump() -> None:
+            try:
+                async for delta in self.agenerate(conversation, system_prompt, trace, cancel_token):
+                    deltas.put(delta)
+            except Exception as e:
+                deltas.put(e)
+            finally:
+                deltas.put(done)
+
+        if cancel_token is not None and cancel_token.is_cancelled:
+            return
+        future = asyncio.run_coroutine_threadsafe(pump(), self._event_loop())
+        unregister = cancel_token.add_callback(future.cancel) if cancel_token is not None else (lambda: None)
+        tokens = 0
+        try:
+            while True:
+                delta = deltas.get()
+                if delta is done:
+                    break
+                if isinstance(delta, Exception):
+                    if self.prints:
+                        print(f"\033[91mEvery provider failed: {delta}\033[0m")
+                    break
+                tokens += 1
+                if tokens == 1:
+                    trace.mark("llm.first_token")
+                yield delta
+            trace.mark("llm.last_token", tokens=tokens)
+        finally:
+            unregister()
+            future.cancel()
+
+    def sentences(self, conversation: List[Dict[str, str]], system_prompt: str, cancel_token: Optional[CancelToken] = None,
+                  trace=NULL_TRACE) -> Iterator[str]:
+        """Like stream(), but prints the deltas and yields complete sentences, for the streaming voice pipeline."""
+        segmenter = SentenceSegmenter()
+        for delta in self.stream(conversation, system_prompt, cancel_token, trace):
+            print(delta, end="", flush=True)
+            yield from segmenter.feed(delta)
+        if cancel_token is None or not cancel_token.is_cancelled:
+            yield from segmenter.flush()
+
+    def generate(self, conversation: List[Dict[str, str]], system_prompt: str, cancel_token: Optional[CancelToken] = None) -> str:
+        """Returns the complete response of the fastest provider, or an empty string if every provider failed."""
+        return "".join(self.stream(conversation, system_prompt, cancel_token)).strip()
+
+
+if __name__ == "__main__":
+    async def fake_provider(ttft: float, text: str, fail: bool = False) -> AsyncIterator[str]:
+        await asyncio.sleep(ttft)
+        if fail:
+            raise ConnectionError("HTTP 503")
+        for word in text.split():
+            yield word + " "
+            await asyncio.sleep(0.01)
+
+    router = HedgedRouter([
+        ("slow primary", lambda conversation, system_prompt: fake_provider(2.0, "Paris, from the slow primary.")),
+        ("failing backup", lambda conversation, system_prompt: fake_provider(0.1, "", fail=True)),
+        ("fast backup", lambda conversation, system_prompt: fake_provider(0.3, "Paris, from the fast backup.")),
+    ], hedge_delay=0.5, registry=ProviderRegistry(path=None))
+
+    start = time.perf_counter()
+    print(router.generate([{"role": "user", "content": "What is the capital of France?"}], "Be concise"))
+    print(f"\033[92m{time.perf_counter() - start:.2f} seconds, wins: {router.wins}, hedges: {router.hedges}\033[0m")
+
+    # The registry now knows the fast backup is fastest, so the next request goes to it first
+    start = time.perf_counter()
+    print(router.generate([{"role": "user", "content": "What is the capital of France?"}], "Be concise"))
+    print(f"\033[92m{time.perf_counter() - start:.2f} seconds, wins: {router.wins}, hedges: {router.hedges}\033[0m")
+    router.registry.report()
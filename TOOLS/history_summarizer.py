@@ -0,0 +1,209 @@
+import atexit
+import concurrent.futures
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from BRAIN.AI.TEXT.API import deepInfra_TEXT
+from PROMPTS import INSTRUCTIONS
+from TOOLS.conversation_log import read_reverse
+from TOOLS.execution_service import get_service
+from TOOLS.persistence import get_writer
+
+SUMMARY_FILE = os.path.join("ASSETS", "conversation_summaries.jsonl")
+# A small, fast model is plenty for condensing a few turns; the chat model stays free for answers
+SUMMARY_MODEL = "meta-llama/Meta-Llama-3.1-8B-Instruct"
+MAX_SUMMARY_WORDS = 150
+# Evicted messages are summarized in batches of this many (three turns), not one call per eviction
+BATCH_MESSAGES = 6
+# Evicted messages kept while the summary model keeps failing; older ones are dropped beyond this
+MAX_PENDING_MESSAGES = 60
+# Longest the exit hook waits for a running compaction before saving the unsummarized messages as they are
+EXIT_TIMEOUT = 10.0
+
+
+class HistorySummarizer:
+    """
+    Folds the messages the history manager evicts into a running summary, in the background.
+
+    ConversationHistoryManager hands every message that no longer fits the prompt budget to submit().
+    Once BATCH_MESSAGES have piled up, a task on the shared I/O pool asks a cheap model to rewrite the
+    current summary so it also covers them, so the voice loop never waits for a summary. Every
+    summary is appended to a JSON-lines file as a new version, next to the conversation history, and
+    fsynced by the persistence writer's group commit; the newest one is loaded at startup and sent
+    ahead of the history by memory_message(). Messages that are still waiting for a batch at exit are
+    saved to a sidecar file by flush() and queued again at the next startup.
+    """
+
+    def __init__(self, path: str = SUMMARY_FILE, generate: Optional[Callable[..., Optional[str]]] = None,
+                 model: str = SUMMARY_MODEL, max_words: int = MAX_SUMMARY_WORDS, batch_messages: int = BATCH_MESSAGES) -> None:
+        """
+        Args:
+            path (str, optional): The JSON-lines file the summary versions are appended to. Defaults to SUMMARY_FILE.
+            generate (Optional[Callable[..., Optional[str]]], optional): Called like deepInfra_TEXT.generate. Defaults to deepInfra_TEXT.generate.
+            model (str, optional): The summary model. Defaults to SUMMARY_MODEL.
+            max_words (int, optional): Length limit of the summary. Defaults to MAX_SUMMARY_WORDS.
+            batch_messages (int, optional): Evicted messages that trigger a compaction. Defaults to BATCH_MESSAGES.
+        """
+        self.path = path
+        self.generate = generate or deepInfra_TEXT.generate
+        self.model = model
+        self.max_words = max_words
+        self.batch_messages = batch_messages
+        self.summary = ""
+        self.version = 0
+        self.pending_path = os.path.splitext(path)[0] + ".pending.json"
+        self._pending: List[Dict] = []
+        # Messages submit() has dropped from the front of _pending so far; _compact() uses it to find its batch
+        self._trimmed = 0
+        # Whether _pending changed since it was last saved or loaded
+        self._dirty = False
+        self._running = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = False
+        if os.path.exists(path):
+            self._load()
+        if os.path.exists(self.pending_path):
+            self._load_pending()
+        # The writer is started first, so its exit hook commits what flush() hands it at exit
+        self.writer = get_writer()
+        self.writer.register(self._sync)
+        atexit.register(self.flush, EXIT_TIMEOUT)
+
+    def _load(self) -> None:
+        for _, line in read_reverse(self.path):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self.summary, self.version = record["summary"], record["version"]
+            return
+
+    def _load_pending(self) -> None:
+        try:
+            with open(self.pending_path, encoding="utf-8") as file:
+                pending = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"\033[91mCould not read the unsummarized messages in {self.pending_path}: {e}\033[0m")
+            return
+        self.submit(pending)
+        self._dirty = False
+
+    def memory_message(self) -> Optional[Dict[str, str]]:
+        """Returns the current summary as a message to send before the history, or None before the first summary."""
+        summary = self.summary
+        if not summary:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+
+    def submit(self, messages: Iterable[Dict]) -> None:
+        """Queues evicted messages; a compaction starts in the background once a batch is complete."""
+        with self._lock:
+            self._pending.extend(messages)
+            self._dirty = True
+            if len(self._pending) > MAX_PENDING_MESSAGES:
+                dropped = len(self._pending) - MAX_PENDING_MESSAGES
+                del self._pending[:dropped]
+                self._trimmed += dropped
+                print(f"\033[91mHistory summarizer is behind, {dropped} evicted messages were not summarized\033[0m")
+            self._schedule()
+
+    def _schedule(self) -> None:
+        # Called with self._lock held; one compaction at a time, so versions never race each other
+        if self._running is None and len(self._pending) >= self.batch_messages:
+            self._running = get_service().submit(self._compact, group="summarizer")
+
+    def _compact(self) -> None:
+        with self._lock:
+            batch = list(self._pending)
+            previous = self.summary
+            trimmed = self._trimmed
+        try:
+            summary = self._summarize(previous, batch)
+        except Exception as e:
+            summary = None
+            print(f"\033[91mHistory summarizer failed: {e}\033[0m")
+        with self._lock:
+            self._running = None
+            if summary:
+                self._save(summary, len(batch))
+                # submit() may have dropped the oldest messages of the batch meanwhile; only the rest are still queued
+                del self._pending[:max(0, len(batch) - (self._trimmed - trimmed))]
+                self._dirty = True
+                self._schedule()
+
+    def _summarize(self, previous: str, batch: List[Dict]) -> Optional[str]:
+        transcript = "\n".join(f"{message.get('role', 'user').capitalize()}: {message.get('content') or ''}" for message in batch)
+        prompt = f"Current memory:\n{previous or '(empty)'}\n\nNew turns:\n{transcript}"
+        summary = self.generate(prompt, model=self.model, system_prompt=INSTRUCTIONS.conversation_summarizer_v1.format(max_words=self.max_words),
+                                max_tokens=self.max_words * 2, temperature=0.2, stream=False)
+        if not summary or not summary.strip():
+            return None
+        words = summary.split()
+        return " ".join(words[:self.max_words]) if len(words) > self.max_words else summary.strip()
+
+    def _save(self, summary: str, messages: int) -> None:
+        # Appended, never rewritten: every earlier version stays in the file for inspection or rollback
+        self.version += 1
+        self.summary = summary
+        record = {"version": self.version, "created_at": time.time(), "messages": messages, "model": self.model, "summary": summary}
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._unsynced = True
+
+    def _sync(self) -> None:
+        # Runs in every commit of the persistence writer
+        with self._lock:
+            if self._unsynced:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._unsynced = False
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Waits until no compaction is running, e.g. before exiting, then saves the messages that are not
+        summarized yet, so the next startup queues them again instead of losing them, and commits the
+        summaries and those messages through the persistence writer.
+
+        Args:
+            timeout (Optional[float], optional): Longest to wait for a running compaction, in seconds. Defaults to no limit.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            running = self._running
+            while running is not None:
+                running.result(None if deadline is None else max(0.0, deadline - time.monotonic()))
+                running = self._running
+        except concurrent.futures.TimeoutError:
+            print("\033[91mHistory summarizer is still running, saving its messages unsummarized\033[0m")
+        with self._lock:
+            if self._dirty:
+                self.writer.write_json(self.pending_path, list(self._pending), ensure_ascii=False)
+                self._dirty = False
+        self.writer.flush()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    def fake_generate(prompt, **kwargs):
+        time.sleep(0.5)  # A summary request takes a while; submit() does not wait for it
+        return "The user asked " + ", ".join(line.split(": ", 1)[1] for line in prompt.splitlines() if line.startswith("User: "))
+
+    with tempfile.TemporaryDirectory() as directory:
+        summarizer = HistorySummarizer(os.path.join(directory, "summaries.jsonl"), generate=fake_generate, batch_messages=4)
+        for turn in range(4):
+            start = time.perf_counter()
+            summarizer.submit([{"role": "user", "content": f"question {turn}"}, {"role": "assistant", "content": "an answer"}])
+            print(f"submit() returned in {(time.perf_counter() - start) * 1000:.2f} ms")
+        summarizer.flush()
+        print(f"\033[92mVersion {summarizer.version}:\033[0m {summarizer.memory_message()}")
+        summarizer.submit([{"role": "user", "content": "one question too few for a batch"}])
+        summarizer.flush()
+        reloaded = HistorySummarizer(summarizer.path, generate=fake_generate)
+        print(f"Reloaded: version {reloaded.version}, {len(reloaded._pending)} message waiting for the next batch")
@@ -0,0 +1,238 @@
+import asyncio
+import http.cookiejar
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # Only the async provider clients need it
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+POOL_SIZE = 16
+KEEPALIVE_INTERVAL = 30
+PREWARM_HOSTS = (
+    "https://api.deepinfra.com",
+    "https://audio.api.speechify.com",
+)
+
+_sessions: Dict[str, requests.Session] = {}
+_last_used: Dict[str, float] = {}
+_lock = threading.Lock()
+_keepalive: Optional[threading.Thread] = None
+_async_clients = weakref.WeakKeyDictionary()
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def session(url: str) -> requests.Session:
+    """
+    Returns the pooled session of a host, creating it on first use.
+
+    All requests to one host share a pool of up to POOL_SIZE kept-alive connections, so DNS, TCP and
+    TLS setup is paid once instead of on every turn, and the parallel requests of a turn (classifier,
+    default answer, TTS) each reuse a warm connection. Cookies are not persisted between requests,
+    matching the module-level requests.post() calls this replaces.
+
+    Args:
+        url (str): Any URL of the host.
+
+    Returns:
+        requests.Session: The host's session.
+    """
+    origin = _origin(url)
+    host_session = _sessions.get(origin)
+    if host_session is None:
+        with _lock:
+            host_session = _sessions.get(origin)
+            if host_session is None:
+                host_session = requests.Session()
+                host_session.mount(origin, HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
+                host_session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                _sessions[origin] = host_session
+    _last_used[origin] = time.monotonic()
+    return host_session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Drop-in replacement for requests.request() that goes through the host's pooled session."""
+    return session(url).request(method, url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """Drop-in replacement for requests.post() that goes through the host's pooled session."""
+    return request("POST", url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Drop-in replacement for requests.get() that goes through the host's pooled session."""
+    return request("GET", url, **kwargs)
+
+
+def async_client() -> "httpx.AsyncClient":
+    """
+    Returns the httpx.AsyncClient shared by the async provider clients on the running event loop.
+
+    One client per loop keeps up to POOL_SIZE connections per host alive, and multiplexes every
+    in-flight request to a host over a single connection when the h2 package is installed.
+    Cookies are not persisted, like the pooled sessions.
+
+    Returns:
+        httpx.AsyncClient: The running loop's client.
+    """
+    if httpx is None:
+        raise ImportError("The async provider clients require httpx: pip install httpx (and h2 for HTTP/2)")
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2,
+            timeout=httpx.Timeout(60, connect=10),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=POOL_SIZE),
+            cookies=http.cookiejar.CookieJar(http.cookiejar.DefaultCookiePolicy(allowed_domains=[])),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def semaphore(name: str, limit: int) -> asyncio.Semaphore:
+    """
+    Returns the semaphore that caps the in-flight requests of a provider on the running event loop.
+
+    Args:
+        name (str): The provider, e.g. "deepinfra".
+        limit (int): Maximum number of concurrent requests; only used when the semaphore is created.
+
+    Returns:
+        asyncio.Semaphore: The provider's semaphore.
+    """
+    loop_semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    provider_semaphore = loop_semaphores.get(name)
+    if provider_semaphore is None:
+        provider_semaphore = loop_semaphores[name] = asyncio.Semaphore(limit)
+    return provider_semaphore
+
+
+async def aclose() -> None:
+    """Closes the running loop's async client, e.g. before the loop shuts down."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _ping(origin: str) -> None:
+    """Opens (or keeps open) a connection to the host; the response status does not matter."""
+    try:
+        session(origin).head(origin, timeout=5).close()
+    except requests.RequestException:
+        pass
+
+
+def prewarm(*urls: str) -> None:
+    """
+    Opens a connection to every host in the background, so the first turn does not pay for the handshake.
+
+    Args:
+        *urls (str): URLs of the hosts to connect to. Defaults to PREWARM_HOSTS.
+    """
+    for url in urls or PREWARM_HOSTS:
+        threading.Thread(target=_ping, args=(_origin(url),), daemon=True).start()
+
+
+def start_keepalive(interval: float = KEEPALIVE_INTERVAL) -> None:
+    """
+    Pings every host that has been idle for interval seconds, so servers and NATs do not drop the
+    pooled connections between turns. Safe to call more than once.
+
+    Args:
+        interval (float, optional): Idle seconds before a host is pinged. Defaults to 30.
+    """
+    global _keepalive
+
+    def loop() -> None:
+        while True:
+            time.sleep(interval)
+            now = time.monotonic()
+            for origin, last_used in list(_last_used.items()):
+                if now - last_used >= interval:
+                    _ping(origin)
+
+    with _lock:
+        if _keepalive is None:
+            _keepalive = threading.Thread(target=loop, name="http-keepalive", daemon=True)
+            _keepalive.start()
+
+
+def stats() -> Dict[str, Dict[str, float]]:
+    """
+    Returns, per host, the number of requests, the connections that had to be opened for them and
+    the connection-reuse ratio, read from the urllib3 pool counters.
+    """
+    snapshot = {}
+    for origin, host_session in list(_sessions.items()):
+        requests_made = connections = 0
+        for adapter in host_session.adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    requests_made += pool.num_requests
+                    connections += pool.num_connections
+        snapshot[origin] = {"requests": requests_made, "connections": connections,
+                            "reuse_ratio": round(1 - connections / requests_made, 3) if requests_made else 0.0}
+    return snapshot
+
+
+def report() -> None:
+    """Prints the connection-reuse ratio of every host."""
+    for origin, host_stats in stats().items():
+        print(f"\033[94m{origin}: {host_stats['requests']} requests over {host_stats['connections']} connections "
+              f"(reuse {host_stats['reuse_ratio']:.0%})\033[0m")
+
+
+if __name__ == "__main__":
+    import http.server
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        wbufsize = -1  # Send headers and body in one segment
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.do_HEAD()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/chat"
+
+    prewarm(url)
+    time.sleep(0.2)
+    for _ in range(20):
+        start = time.perf_counter()
+        post(url, json={"prompt": "hi"}).json()
+    print(f"Last request took {(time.perf_counter() - start) * 1000:.2f} ms")
+    report()
@@ -0,0 +1,107 @@
+import importlib
+import threading
+from typing import Any, Callable, Optional
+
+
+class LazyObject:
+    """
+    Stands in for a module or object that is expensive to create, and creates it on first use.
+
+    Attribute access, calls and repr() are forwarded to the real object, so a proxy can replace a
+    module name in IMPORTS.py (deepInfra_VISION.generate(...)) or an instance (listener.listen())
+    without changing the code that uses it. Creation happens once, under a lock, in whichever thread
+    touches the proxy first.
+    """
+
+    __slots__ = ("_factory", "_name", "_lock", "_target")
+
+    def __init__(self, factory: Callable[[], Any], name: Optional[str] = None) -> None:
+        """
+        Args:
+            factory (Callable[[], Any]): Creates the real object.
+            name (Optional[str], optional): Shown in repr() until the object exists. Defaults to the factory's name.
+        """
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name or getattr(factory, "__name__", "object"))
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_target", None)
+
+    def resolve(self) -> Any:
+        """Creates the real object if needed and returns it."""
+        target = object.__getattribute__(self, "_target")
+        if target is None:
+            with object.__getattribute__(self, "_lock"):
+                target = object.__getattribute__(self, "_target")
+                if target is None:
+                    target = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    @property
+    def is_resolved(self) -> bool:
+        return object.__getattribute__(self, "_target") is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.resolve(), name, value)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        if self.is_resolved:
+            return repr(self.resolve())
+        return f"<lazy {object.__getattribute__(self, '_name')}>"
+
+
+def lazy_module(name: str) -> LazyObject:
+    """
+    Returns a proxy that imports the module on first attribute access.
+
+    Args:
+        name (str): The dotted module path, e.g. "BRAIN.AI.VISION.deepInfra_VISION".
+    """
+    return LazyObject(lambda: importlib.import_module(name), name)
+
+
+def lazy_attr(module: str, attr: str) -> LazyObject:
+    """
+    Returns a proxy for "from module import attr" that imports the module on first use.
+
+    Args:
+        module (str): The dotted module path, e.g. "ENGINE.TTS.speechify".
+        attr (str): The name to take from the module, e.g. "speak".
+    """
+    return LazyObject(lambda: getattr(importlib.import_module(module), attr), f"{module}.{attr}")
+
+
+def preload(*proxies: LazyObject, executor=None) -> None:
+    """
+    Resolves proxies in the background, e.g. the modules every turn needs, so that the first use
+    does not pay for the import while startup still does not wait for it.
+
+    Args:
+        *proxies (LazyObject): The proxies to resolve.
+        executor (Executor, optional): Where to resolve them. Defaults to the shared I/O pool.
+    """
+    if executor is None:
+        from TOOLS.execution_service import get_service
+        executor = get_service().executor("io")
+    for proxy in proxies:
+        future = executor.submit(proxy.resolve)
+        future.add_done_callback(lambda f, proxy=proxy: f.exception() and
+                                 print(f"\033[91mFailed to preload {proxy!r}: {f.exception()}\033[0m"))
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    sqlite3 = lazy_module("sqlite3")
+    print(sqlite3, f"created in {(time.perf_counter() - start) * 1e6:.0f} µs")
+    print(sqlite3.sqlite_version, "->", sqlite3)
+
+    dumps = lazy_attr("json", "dumps")
+    print(dumps({"lazy": True}))
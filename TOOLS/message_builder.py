@@ -0,0 +1,53 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Union
+
+Message = Mapping[str, str]
+
+
+def build_messages(history: Union[str, Iterable[Message]], system_prompt: Optional[str] = None, query: Optional[str] = None,
+                   role_key: str = "role") -> List[Message]:
+    """
+    Assembles the message list of a request from a conversation history without modifying it.
+
+    The returned list is new, but the message dicts in it are the history's own, so assembling a
+    request costs one pointer per message and never copies their content. The caller's history,
+    e.g. ConversationHistoryManager.history, keeps exactly the messages it had, no matter how often
+    it is sent.
+
+    Args:
+        history (Union[str, Iterable[Message]]): The conversation so far (a list, tuple, deque or any
+            iterable of messages), or a single user query.
+        system_prompt (Optional[str], optional): Sent as the first message when given. Defaults to None.
+        query (Optional[str], optional): A user message appended after the history. Defaults to None.
+        role_key (str, optional): The key holding the speaker; OpenGPTs calls it "type". Defaults to "role".
+
+    Returns:
+        List[Message]: The messages to send.
+    """
+    if isinstance(history, str):
+        history = [{role_key: "user", "content": history}]
+    messages: List[Message] = [{role_key: "system", "content": system_prompt}] if system_prompt else []
+    messages.extend(history)
+    if query is not None:
+        messages.append({role_key: "user", "content": query})
+    return messages
+
+
+def prompt_size(messages: Iterable[Message]) -> Dict[str, int]:
+    """Returns the number of messages and content characters of a request, e.g. to watch prompt growth."""
+    count = characters = 0
+    for message in messages:
+        count += 1
+        characters += len(message.get("content") or "")
+    return {"messages": count, "characters": characters}
+
+
+if __name__ == "__main__":
+    history = [
+        {"role": "user", "content": "My name is Sreejan."},
+        {"role": "assistant", "content": "Nice to meet you, Sreejan."},
+    ]
+    for _ in range(3):
+        messages = build_messages(history, system_prompt="Be concise", query="What is my name?")
+    print(messages)
+    print("History is untouched:", len(history) == 2, "| messages shared:", messages[1] is history[0])
+    print(prompt_size(messages))
@@ -0,0 +1,206 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+# Seconds between group commits; a file written many times within one interval hits the disk once
+COMMIT_INTERVAL = 1.0
+
+Content = Union[str, bytes, Callable[[], Union[str, bytes]]]
+
+
+def _encode(data: Union[str, bytes]) -> bytes:
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _write_temp(path: str, data: bytes, fsync: bool = True) -> str:
+    """Writes data to a new, uniquely named temporary file next to path and returns its name."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # A unique name per write, so two writers of the same path never share a temporary file
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+    except BaseException:
+        _remove(temp_path)
+        raise
+    return temp_path
+
+
+def atomic_write(path: str, data: Union[str, bytes], fsync: bool = True) -> None:
+    """
+    Replaces a file in one step: the data goes to a temporary file next to it, which is renamed over
+    the original, so readers and crashes only ever see the old or the new content.
+
+    Args:
+        path (str): The file to write.
+        data (Union[str, bytes]): The new content; str is written as UTF-8.
+        fsync (bool, optional): Whether to fsync the data before the rename. Defaults to True.
+    """
+    temp_path = _write_temp(path, _encode(data), fsync)
+    try:
+        os.replace(temp_path, path)
+    except BaseException:
+        _remove(temp_path)
+        raise
+
+
+class PersistenceWriter:
+    """
+    Background group-commit writer for the assistant's persistent state.
+
+    write() only records the newest content of a file and returns; a background thread commits every
+    pending file once per COMMIT_INTERVAL. All files of a commit are written to temporary files first,
+    fsynced together and then renamed over the originals, so a burst of updates costs one write per
+    file and one round of fsyncs instead of a synchronous rewrite on the caller's thread for every
+    change. Components with their own file handles, such as ConversationLog, register a sync callback
+    that runs in the same commit. flush() commits everything immediately, e.g. on shutdown.
+    """
+
+    def __init__(self, interval: float = COMMIT_INTERVAL) -> None:
+        """
+        Args:
+            interval (float, optional): Seconds between group commits. Defaults to COMMIT_INTERVAL.
+        """
+        self.interval = interval
+        self._pending: Dict[str, Content] = {}
+        self._syncs: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._closed = threading.Event()
+        self.counters = {"requested": 0, "written": 0, "commits": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._commit_loop, name="persistence", daemon=True)
+        self._thread.start()
+
+    def write(self, path: str, content: Content) -> None:
+        """
+        Schedules a file to be replaced with new content at the next commit; a later write() of the same
+        file before then supersedes this one.
+
+        Args:
+            path (str): The file to write.
+            content (Content): The new content, or a callable that renders it on the writer thread. The
+                callable must only read state that the caller does not modify afterwards.
+        """
+        with self._lock:
+            self._pending[path] = content
+            self.counters["requested"] += 1
+
+    def write_json(self, path: str, obj: Any, **dumps_kwargs) -> None:
+        """Schedules a JSON file; obj is serialized on the writer thread, so pass a snapshot, e.g. list(items)."""
+        self.write(path, lambda: json.dumps(obj, **dumps_kwargs))
+
+    def register(self, sync: Callable[[], None]) -> None:
+        """Runs sync, e.g. a log's flush + fsync, in every commit."""
+        with self._lock:
+            self._syncs.append(sync)
+
+    def unregister(self, sync: Callable[[], None]) -> None:
+        with self._lock:
+            if sync in self._syncs:
+                self._syncs.remove(sync)
+
+    def _commit_loop(self) -> None:
+        while not self._closed.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Commits every pending file and runs the registered syncs now, on the calling thread."""
+        with self._commit_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                syncs = list(self._syncs)
+            written = []
+            for path, content in pending.items():
+                try:
+                    written.append((_write_temp(path, _encode(content() if callable(content) else content)), path))
+                except Exception as e:
+                    print(f"\033[91mCould not write {path}: {e}\033[0m")
+                    self._retry(path, content)
+            # The renames only happen after every file of the commit is on disk
+            for temp_path, path in written:
+                try:
+                    os.replace(temp_path, path)
+                except OSError as e:
+                    print(f"\033[91mCould not replace {path}: {e}\033[0m")
+                    _remove(temp_path)
+                    self._retry(path, pending[path])
+                    continue
+                self.counters["written"] += 1
+            for sync in syncs:
+                try:
+                    sync()
+                except Exception as e:
+                    self.counters["failed"] += 1
+                    print(f"\033[91mPersistence sync failed: {e}\033[0m")
+            self.counters["commits"] += 1
+
+    def _retry(self, path: str, content: Content) -> None:
+        # Kept for the next commit unless a newer write() of the file has arrived since
+        self.counters["failed"] += 1
+        with self._lock:
+            self._pending.setdefault(path, content)
+
+    def close(self) -> None:
+        """Stops the background thread after a final commit; safe to call more than once."""
+        if not self._closed.is_set():
+            self._closed.set()
+            self.flush()
+
+    def report(self) -> None:
+        counters = self.counters
+        print(f"\033[94mPersistence: {counters['requested']} writes requested, {counters['written']} performed "
+              f"in {counters['commits']} commits, {counters['failed']} failed\033[0m")
+
+
+_writer: Optional[PersistenceWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> PersistenceWriter:
+    """Returns the process-wide PersistenceWriter, starting it on first use; it commits everything at exit."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = PersistenceWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        writer = PersistenceWriter()
+        alarms_path = os.path.join(directory, "alarms.json")
+        alarms = []
+        start = time.perf_counter()
+        for minute in range(1000):
+            alarms.append({"time": f"2026-10-18 07:{minute % 60:02d}:00", "type": "alarm"})
+            writer.write_json(alarms_path, list(alarms))
+        print(f"1000 updates queued in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        start = time.perf_counter()
+        for minute in range(1000):
+            atomic_write(os.path.join(directory, "sync.json"), json.dumps(alarms[:minute + 1]))
+        print(f"1000 synchronous atomic rewrites took {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        writer.flush()
+        with open(alarms_path) as file:
+            print(f"\033[92m{len(json.load(file))} alarms on disk\033[0m")
+        writer.close()
+        writer.report()
@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from TOOLS.persistence import get_writer
+
+SCORES_FILE = os.path.join("ASSETS", "provider_scores.json")
+# Weight of the newest sample in the moving averages
+ALPHA = 0.3
+# Consecutive failures that open a provider's circuit, and seconds before it is probed again
+FAILURE_THRESHOLD = 3
+OPEN_SECONDS = 60
+# Assumed time-to-first-token of a provider that has never answered, so untried providers are neither
+# preferred over nor starved behind measured ones
+PRIOR_TTFT = 1.5
+SAVE_INTERVAL = 10
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def _ewma(average: Optional[float], sample: float, alpha: float) -> float:
+    return sample if average is None else alpha * sample + (1 - alpha) * average
+
+
+class ProviderRegistry:
+    """
+    Keeps a health score per provider/model and decides which one a request goes to first.
+
+    Time-to-first-token, tokens per second and error rate are tracked as exponentially weighted moving
+    averages. After FAILURE_THRESHOLD consecutive failures a provider's circuit opens and it is skipped;
+    once OPEN_SECONDS have passed the circuit is half-open and a single request probes the provider,
+    closing the circuit again if it succeeds. Scores are saved to ASSETS/provider_scores.json, so the
+    routing is already informed on the first turn after a restart.
+    """
+
+    def __init__(self, path: Optional[str] = SCORES_FILE, alpha: float = ALPHA, failure_threshold: int = FAILURE_THRESHOLD,
+                 open_seconds: float = OPEN_SECONDS) -> None:
+        """
+        Args:
+            path (Optional[str], optional): JSON file the scores are loaded from and saved to; None keeps them in memory. Defaults to SCORES_FILE.
+            alpha (float, optional): Weight of the newest sample in the moving averages. Defaults to ALPHA.
+            failure_threshold (int, optional): Consecutive failures that open the circuit. Defaults to FAILURE_THRESHOLD.
+            open_seconds (float, optional): Seconds an open circuit waits before a probe. Defaults to OPEN_SECONDS.
+        """
+        self.path = path
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._scores: Dict[str, Dict] = {}
+        self._probing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+        # Started now, so its exit hook runs after any save() registered at exit later on
+        self.writer = get_writer() if path else None
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as file:
+                    self._scores = json.load(file)
+            except (OSError, ValueError):
+                print(f"\033[91mIgnoring unreadable provider scores: {path}\033[0m")
+
+    def _entry(self, name: str) -> Dict:
+        entry = self._scores.get(name)
+        if entry is None:
+            entry = self._scores[name] = {"ttft": None, "tokens_per_second": None, "error_rate": 0.0, "requests": 0,
+                                          "consecutive_failures": 0, "state": CLOSED, "opened_at": None}
+        return entry
+
+    def _state(self, entry: Dict) -> str:
+        if entry["state"] == OPEN and time.time() - entry["opened_at"] >= self.open_seconds:
+            entry["state"] = HALF_OPEN
+        return entry["state"]
+
+    def record_success(self, name: str, ttft: float, tokens: int = 0, duration: float = 0.0) -> None:
+        """
+        Records an answered request and closes the provider's circuit.
+
+        Args:
+            name (str): The provider/model, e.g. "deepinfra/Meta-Llama-3.1-405B-Instruct".
+            ttft (float): Seconds from sending the request to the first token.
+            tokens (int, optional): Number of deltas received. Defaults to 0.
+            duration (float, optional): Seconds from the first to the last token. Defaults to 0.0.
+        """
+        with self._lock:
+            entry = self._entry(name)
+            entry["requests"] += 1
+            entry["ttft"] = _ewma(entry["ttft"], ttft, self.alpha)
+            if tokens > 1 and duration > 0:
+                entry["tokens_per_second"] = _ewma(entry["tokens_per_second"], (tokens - 1) / duration, self.alpha)
+            entry["error_rate"] = _ewma(entry["error_rate"], 0.0, self.alpha)
+            entry["consecutive_failures"] = 0
+            entry["state"], entry["opened_at"] = CLOSED, None
+            self._probing.pop(name, None)
+        self._autosave()
+
+    def record_failure(self, name: str) -> None:
+        """Records a failed request; opens the circuit after failure_threshold in a row, or when a probe fails."""
+        with self._lock:
+            entry = self._entry(name)
+            entry["requests"] += 1
+            entry["error_rate"] = _ewma(entry["error_rate"], 1.0, self.alpha)
+            entry["consecutive_failures"] += 1
+            if self._state(entry) == HALF_OPEN or entry["consecutive_failures"] >= self.failure_threshold:
+                if entry["state"] != OPEN:
+                    print(f"\033[91mCircuit opened for {name} after {entry['consecutive_failures']} failures\033[0m")
+                entry["state"], entry["opened_at"] = OPEN, time.time()
+            self._probing.pop(name, None)
+        self._autosave()
+
+    def record_slow(self, name: str, elapsed: float) -> None:
+        """
+        Records a request that was abandoned before its first token, e.g. because another provider won
+        the race. Its TTFT is only known to exceed elapsed, so the average is raised to at least that.
+        """
+        with self._lock:
+            entry = self._entry(name)
+            if entry["ttft"] is None or elapsed > entry["ttft"]:
+                entry["ttft"] = _ewma(entry["ttft"], elapsed, self.alpha)
+            self._probing.pop(name, None)
+
+    def record_cancelled(self, name: str) -> None:
+        """
+        Records a request that was abandoned before its first token because its turn was cancelled, e.g.
+        by a barge-in. That says nothing about the provider, so only a half-open probe it held is released.
+        """
+        with self._lock:
+            self._probing.pop(name, None)
+
+    def score(self, name: str) -> float:
+        """Expected seconds to a first token, counting the failed attempts; lower is better."""
+        entry = self._scores.get(name)
+        if entry is None:
+            return PRIOR_TTFT
+        ttft = entry["ttft"] if entry["ttft"] is not None else PRIOR_TTFT
+        return ttft / max(1.0 - entry["error_rate"], 0.05)
+
+    def _probe_in_flight(self, name: str) -> bool:
+        # A probe that was never sent (its request was won by another provider first) expires after open_seconds
+        started = self._probing.get(name)
+        return started is not None and time.time() - started < self.open_seconds
+
+    def available(self, name: str) -> bool:
+        """Whether a request may go to the provider: its circuit is closed, or half-open without a probe in flight."""
+        with self._lock:
+            entry = self._scores.get(name)
+            if entry is None:
+                return True
+            state = self._state(entry)
+            return state == CLOSED or (state == HALF_OPEN and not self._probe_in_flight(name))
+
+    def rank(self, names: Sequence[str]) -> List[str]:
+        """
+        Orders providers fastest first and drops those whose circuit is open. A half-open provider is put
+        first for exactly one probe, so it is actually tried; with hedging the probe costs at most the hedge
+        delay. If every circuit is open, all providers are returned in their given order.
+
+        Args:
+            names (Sequence[str]): The candidate providers, in order of preference for ties.
+
+        Returns:
+            List[str]: The providers to try, best first.
+        """
+        with self._lock:
+            ranked = []
+            for index, name in enumerate(names):
+                entry = self._scores.get(name)
+                state = self._state(entry) if entry is not None else CLOSED
+                if state == OPEN or (state == HALF_OPEN and self._probe_in_flight(name)):
+                    continue
+                if state == HALF_OPEN:
+                    self._probing[name] = time.time()
+                ranked.append((0.0 if state == HALF_OPEN else self.score(name), index, name))
+        return [name for _, _, name in sorted(ranked)] or list(names)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Returns a copy of the scores of every provider."""
+        with self._lock:
+            return {name: dict(entry, score=round(self.score(name), 3)) for name, entry in self._scores.items()}
+
+    def _autosave(self) -> None:
+        if time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+            self.save()
+
+    def save(self) -> None:
+        """Hands a snapshot of the scores to the persistence writer, which replaces the JSON file atomically at its next commit."""
+        if not self.path:
+            return
+        with self._lock:
+            self._saved_at = time.monotonic()
+            scores = {name: dict(entry) for name, entry in self._scores.items()}
+        self.writer.write_json(self.path, scores, indent=4)
+
+    def report(self) -> None:
+        """Prints the scores and circuit state of every provider."""
+        for name, entry in sorted(self.snapshot().items(), key=lambda item: item[1]["score"]):
+            ttft = f"{entry['ttft']:.2f} s" if entry["ttft"] is not None else "-"
+            speed = f"{entry['tokens_per_second']:.1f} tok/s" if entry["tokens_per_second"] is not None else "-"
+            color = "\033[92m" if entry["state"] == CLOSED else "\033[91m"
+            print(f"{color}{name}: ttft {ttft}, {speed}, errors {entry['error_rate']:.0%}, {entry['state']}\033[0m")
+
+
+if __name__ == "__main__":
+    registry = ProviderRegistry(path=None, open_seconds=0.5)
+    providers = ["deepinfra/llama-3.1-405b", "openrouter/llama-3-8b", "huggingface/phi-3-mini"]
+    for _ in range(5):
+        registry.record_success("deepinfra/llama-3.1-405b", ttft=0.9, tokens=120, duration=2.0)
+        registry.record_success("openrouter/llama-3-8b", ttft=0.4, tokens=120, duration=1.0)
+    print("Ranked:", registry.rank(providers))
+
+    for _ in range(3):
+        registry.record_failure("openrouter/llama-3-8b")
+    print("After 3 failures:", registry.rank(providers))
+    time.sleep(0.6)
+    print("Half-open probe:", registry.rank(providers), "| second request:", registry.rank(providers))
+    registry.record_success("openrouter/llama-3-8b", ttft=0.5, tokens=100, duration=1.0)
+    print("Probe succeeded:", registry.rank(providers))
+    registry.report()
@@ -0,0 +1,155 @@
+import concurrent.futures
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from TOOLS.lazy_import import LazyObject
+
+
+class _Resource:
+    """One registered resource: its factory, dependencies and the future its value is delivered through."""
+
+    def __init__(self, name: str, factory: Callable[[], Any], autostart: bool, depends: Iterable[str]) -> None:
+        self.name = name
+        self.factory = factory
+        self.autostart = autostart
+        self.depends = tuple(depends)
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+
+
+class ResourceManager:
+    """
+    Initializes heavy resources (the browser listener, the conversation history, local models ...)
+    concurrently in the background instead of one after another before the first listen().
+
+    Every resource gets a readiness future. Code that needs a resource blocks on that resource only,
+    either explicitly through get() or implicitly through the proxy returned by register(), so the
+    main loop can start as soon as the resources of the current turn are ready. Optional resources
+    are registered with autostart=False and only initialized when first requested.
+    """
+
+    def __init__(self, prints: bool = True) -> None:
+        """
+        Args:
+            prints (bool, optional): Whether to print when a resource is ready or failed. Defaults to True.
+        """
+        self.prints = prints
+        self._resources: Dict[str, _Resource] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], autostart: bool = True,
+                 depends: Iterable[str] = ()) -> LazyObject:
+        """
+        Registers a resource without initializing it.
+
+        Args:
+            name (str): The name the resource is requested by.
+            factory (Callable[[], Any]): Creates the resource; runs on its own background thread.
+            autostart (bool, optional): Whether start() without arguments initializes it. Defaults to True.
+            depends (Iterable[str], optional): Resources that must be ready before factory runs. Defaults to ().
+
+        Returns:
+            LazyObject: A proxy that waits for the resource on first use, for code that uses it like the real object.
+        """
+        with self._lock:
+            if name in self._resources:
+                raise ValueError(f"Resource '{name}' is already registered")
+            self._resources[name] = _Resource(name, factory, autostart, depends)
+        return self.proxy(name)
+
+    def start(self, *names: str) -> None:
+        """
+        Starts initializing resources (and their dependencies) in the background. Already started ones are skipped.
+
+        Args:
+            *names (str): The resources to start. Defaults to every resource registered with autostart=True.
+        """
+        with self._lock:
+            resources = [self._resources[name] for name in names] if names else \
+                [resource for resource in self._resources.values() if resource.autostart]
+            pending = list(resources)
+            while pending:
+                resource = pending.pop()
+                if resource.started_at is not None:
+                    continue
+                resource.started_at = time.perf_counter()
+                resource.future.set_running_or_notify_cancel()
+                threading.Thread(target=self._initialize, args=(resource,), name=f"init-{resource.name}", daemon=True).start()
+                pending.extend(self._resources[dependency] for dependency in resource.depends)
+
+    def _initialize(self, resource: _Resource) -> None:
+        try:
+            for dependency in resource.depends:
+                self._resources[dependency].future.result()
+            value = resource.factory()
+        except BaseException as e:
+            resource.ready_at = time.perf_counter()
+            if self.prints:
+                print(f"\033[91mFailed to initialize {resource.name}: {e}\033[0m")
+            resource.future.set_exception(e)
+            return
+        resource.ready_at = time.perf_counter()
+        if self.prints:
+            print(f"\033[92m{resource.name} ready in {resource.ready_at - resource.started_at:.2f} seconds\033[0m")
+        resource.future.set_result(value)
+
+    def future(self, name: str) -> concurrent.futures.Future:
+        """Returns the readiness future of a resource, starting it if nobody has yet."""
+        self.start(name)
+        return self._resources[name].future
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Returns a resource, blocking until it is ready. Optional resources are started on demand.
+
+        Args:
+            name (str): The resource name.
+            timeout (Optional[float], optional): Seconds to wait before raising TimeoutError. Defaults to no limit.
+
+        Returns:
+            Any: The initialized resource. Re-raises the exception its factory raised.
+        """
+        return self.future(name).result(timeout)
+
+    def is_ready(self, name: str) -> bool:
+        """Whether a resource has been initialized successfully, without blocking."""
+        future = self._resources[name].future
+        return future.done() and future.exception() is None
+
+    def proxy(self, name: str) -> LazyObject:
+        """Returns a proxy that waits for the resource on first use."""
+        return LazyObject(lambda: self.get(name), name)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the state ("registered", "starting", "ready", "failed") and init time of every resource."""
+        snapshot = {}
+        for name, resource in list(self._resources.items()):
+            if resource.started_at is None:
+                state = "registered"
+            elif not resource.future.done():
+                state = "starting"
+            else:
+                state = "failed" if resource.future.exception() else "ready"
+            seconds = (resource.ready_at or time.perf_counter()) - resource.started_at if resource.started_at else None
+            snapshot[name] = {"state": state, "seconds": round(seconds, 3) if seconds is not None else None}
+        return snapshot
+
+
+if __name__ == "__main__":
+    def slow(seconds: float, value: str) -> Callable[[], str]:
+        return lambda: (time.sleep(seconds), value)[1]
+
+    resources = ResourceManager()
+    listener = resources.register("listener", slow(1.5, "browser"))
+    history = resources.register("history", slow(0.3, "history"))
+    agent = resources.register("agent", slow(0.8, "agent"), depends=["history"])
+    gguf = resources.register("gguf", slow(5, "local model"), autostart=False)
+
+    start = time.perf_counter()
+    resources.start()
+    print("History:", resources.get("history"), f"after {time.perf_counter() - start:.2f} s")
+    print("Agent:", agent.upper(), f"after {time.perf_counter() - start:.2f} s")
+    print("Listener:", listener.upper(), f"after {time.perf_counter() - start:.2f} s")
+    print(resources.status())
@@ -0,0 +1,247 @@
+import collections
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+CACHE_FILE = os.path.join("ASSETS", "response_cache.sqlite3")
+MEMORY_ENTRIES = 512
+# Above this temperature a response is a sample rather than the answer, so it is neither served from nor stored in the cache
+MAX_TEMPERATURE = 0.5
+# Seconds a response stays valid, per prompt class
+TTLS = {
+    "classifier": 7 * 24 * 3600,
+    "chat": 3600,
+    "default": 600,
+}
+# Arguments that change how a response is delivered, not what it is
+IGNORED_ARGUMENTS = {"stream", "chunk_size", "verbose", "prints", "cancel_token", "trace", "max_concurrent"}
+
+_prompt_classes: Dict[str, str] = {}
+
+
+def register_prompt_class(system_prompt: str, prompt_class: str) -> None:
+    """
+    Assigns the responses to a system prompt a class, which picks their TTL from TTLS.
+
+    Args:
+        system_prompt (str): The system prompt, e.g. BISECTORS.routing_classifier_v1.
+        prompt_class (str): A key of TTLS, e.g. "classifier".
+    """
+    _prompt_classes[system_prompt] = prompt_class
+
+
+def _stable(value: Any) -> Any:
+    # A deque history (ConversationHistoryManager.history) is keyed like the list it holds
+    if isinstance(value, (collections.deque, tuple)):
+        return list(value)
+    # Callables such as until= are keyed by name, which is stable across runs
+    return getattr(value, "__qualname__", None) or repr(value)
+
+
+def cache_key(payload: Dict[str, Any]) -> str:
+    """Returns the sha256 of the canonical JSON of a request payload: sorted keys, no whitespace."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_stable)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Exact-match cache of LLM responses with an in-memory LRU tier in front of an SQLite tier.
+
+    A response is only reused for a byte-identical request: same provider, model, system prompt,
+    messages and sampling parameters. Entries expire after the TTL of their prompt class, and the
+    on-disk tier keeps the classifier verdicts across restarts. Only the memory tier is touched under
+    the cache lock; SQLite reads and writes hold a lock of their own, so a disk lookup or commit never
+    stalls a memory hit on another thread.
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_FILE, memory_entries: int = MEMORY_ENTRIES,
+                 max_temperature: float = MAX_TEMPERATURE, ttls: Optional[Dict[str, float]] = None) -> None:
+        """
+        Args:
+            path (Optional[str], optional): SQLite file of the on-disk tier; None keeps only the memory tier. Defaults to CACHE_FILE.
+            memory_entries (int, optional): Size of the in-memory LRU tier. Defaults to MEMORY_ENTRIES.
+            max_temperature (float, optional): Requests sampled above this temperature bypass the cache. Defaults to MAX_TEMPERATURE.
+            ttls (Optional[Dict[str, float]], optional): Seconds an entry stays valid per prompt class. Defaults to TTLS.
+        """
+        self.memory_entries = memory_entries
+        self.max_temperature = max_temperature
+        self.ttls = dict(TTLS, **(ttls or {}))
+        self._memory: "collections.OrderedDict[str, Tuple[str, float, float]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes the shared SQLite connection, separately from the memory tier
+        self._db_lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "saved_seconds": 0.0}
+        self.path = path
+        self._db = None
+
+    def _database(self) -> Optional[sqlite3.Connection]:
+        """Opens the on-disk tier on first use, so processes that never look anything up do not create it. Called with _db_lock held."""
+        if self._db is None and self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # The cache can always be refilled, so a commit does not wait for an fsync of the WAL
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                             "prompt_class TEXT, expires_at REAL NOT NULL, seconds REAL NOT NULL)")
+            self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response of a key, or None when it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] >= now:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                self.counters["saved_seconds"] += entry[2]
+                return entry[0]
+            if entry is not None:
+                del self._memory[key]
+        row = None
+        if self.path:
+            with self._db_lock:
+                database = self._database()
+                row = database.execute("SELECT response, expires_at, seconds FROM responses WHERE key = ? AND expires_at >= ?",
+                                       (key, now)).fetchone()
+        with self._lock:
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            self._remember(key, row)
+            self.counters["disk_hits"] += 1
+            self.counters["saved_seconds"] += row[2]
+            return row[0]
+
+    def put(self, key: str, response: str, prompt_class: str = "default", seconds: float = 0.0) -> None:
+        """
+        Stores a response in both tiers.
+
+        Args:
+            key (str): The cache_key() of the request.
+            response (str): The response text.
+            prompt_class (str, optional): A key of ttls, picks the expiry. Defaults to "default".
+            seconds (float, optional): How long the request took, counted as saved on every hit. Defaults to 0.0.
+        """
+        entry = (response, time.time() + self.ttls.get(prompt_class, self.ttls["default"]), seconds)
+        with self._lock:
+            self._remember(key, entry)
+        if self.path:
+            with self._db_lock:
+                database = self._database()
+                database.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", (key, response, prompt_class, entry[1], seconds))
+                database.commit()
+
+    def _remember(self, key: str, entry: Tuple[str, float, float]) -> None:
+        # Called with _lock held
+        self._memory[key] = tuple(entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def bypass(self) -> None:
+        """Counts a request that skipped the cache."""
+        with self._lock:
+            self.counters["bypassed"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the hit/miss counters, the hit ratio and the seconds of provider latency the hits saved."""
+        with self._lock:
+            snapshot = dict(self.counters)
+        hits = snapshot["memory_hits"] + snapshot["disk_hits"]
+        lookups = hits + snapshot["misses"]
+        snapshot["hit_ratio"] = round(hits / lookups, 3) if lookups else 0.0
+        snapshot["saved_seconds"] = round(snapshot["saved_seconds"], 3)
+        return snapshot
+
+    def report(self) -> None:
+        """Prints the counters."""
+        stats = self.stats()
+        print(f"\033[94mResponse cache: {stats['memory_hits']} memory + {stats['disk_hits']} disk hits, {stats['misses']} misses "
+              f"({stats['hit_ratio']:.0%}), {stats['bypassed']} bypassed, {stats['saved_seconds']:.2f} s saved\033[0m")
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Returns the process-wide response cache, opening it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def cached(provider: str, valid: Callable[[Any], bool] = lambda response: isinstance(response, str) and bool(response),
+           cache: Optional[ResponseCache] = None) -> Callable:
+    """
+    Decorates a provider's generate() so identical requests are answered from the response cache.
+
+    The key is the hash of the provider name and every argument of the call after defaults are applied,
+    except the delivery options in IGNORED_ARGUMENTS. The prompt class, and so the TTL, is looked up
+    from the system_prompt argument (see register_prompt_class()).
+
+    Args:
+        provider (str): The provider's name, part of the key.
+        valid (Callable[[Any], bool], optional): Whether a response may be stored; by default non-empty strings, so errors returning None are not cached.
+        cache (Optional[ResponseCache], optional): The cache to use. Defaults to get_cache().
+    """
+    def decorator(generate: Callable) -> Callable:
+        signature = inspect.signature(generate)
+
+        @functools.wraps(generate)
+        def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            response_cache = cache or get_cache()
+            temperature = arguments.arguments.get("temperature") or 0.0
+            if temperature > response_cache.max_temperature:
+                response_cache.bypass()
+                return generate(*args, **kwargs)
+
+            payload = {name: value for name, value in arguments.arguments.items() if name not in IGNORED_ARGUMENTS}
+            key = cache_key({"provider": provider, "payload": payload})
+            response = response_cache.get(key)
+            if response is not None:
+                if arguments.arguments.get("stream") or arguments.arguments.get("verbose"):
+                    print(response, end="", flush=True)
+                return response
+
+            start = time.perf_counter()
+            response = generate(*args, **kwargs)
+            if valid(response):
+                prompt_class = _prompt_classes.get(arguments.arguments.get("system_prompt"), "default")
+                response_cache.put(key, response, prompt_class, time.perf_counter() - start)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+if __name__ == "__main__":
+    demo_cache = ResponseCache(path=None)
+
+    @cached("demo", cache=demo_cache)
+    def generate(prompt: str, system_prompt: str = "Classify", temperature: float = 0.0, stream: bool = False) -> str:
+        time.sleep(0.5)
+        return f"verdict for {prompt}"
+
+    register_prompt_class("Classify", "classifier")
+    for temperature, stream in ((0.0, False), (0.0, False), (0.0, True), (0.9, False)):
+        start = time.perf_counter()
+        generate("open youtube", temperature=temperature, stream=stream)
+        print(f"temperature {temperature}, stream {stream}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    demo_cache.report()
@@ -0,0 +1,240 @@
+import atexit
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from BRAIN.AI.TEXT.LOCAL.intent_classifier import hash_ngrams
+from TOOLS.semantic_cache import normalize
+
+MEMORY_DIR = os.path.join("ASSETS", "retrieval_memory")
+# Turns are embedded into DIM signed hashed features: small enough that scanning 100k turns reads
+# 50 MB and takes a few milliseconds on one core, large enough to tell topics apart
+DIM = 128
+INITIAL_CAPACITY = 1024
+RECALL_RESULTS = 3
+# Cosine similarity below which a past exchange is not worth a place in the prompt; unrelated
+# utterances stay under it even among 100k turns, a shared topic word or two clears it
+MIN_SIMILARITY = 0.4
+# Words that ask about a memory rather than name it ("when did I say ..."), on top of semantic_cache.STOPWORDS
+QUESTION_WORDS = frozenset("when where who whom why how which remember remind recall said say told tell mentioned".split())
+# Id of an empty row; turns are stored under their ConversationStore ids, which start at 1 and only grow
+EMPTY = 0
+
+
+def embed(texts: Sequence[str], dim: int = DIM) -> np.ndarray:
+    """
+    Embeds texts as L2-normalized signed hashed n-gram vectors of their content words.
+
+    Every n-gram of hash_ngrams() lands in one of dim buckets with a sign taken from the hash, so
+    colliding n-grams tend to cancel out instead of piling up, and the dot product of two vectors
+    stays a good estimate of their n-gram overlap at a fraction of semantic_cache.embed()'s size.
+    Question words are dropped as well, so "when is the wedding" is embedded as just "wedding".
+
+    Args:
+        texts (Sequence[str]): The texts.
+        dim (int, optional): Size of the vectors, a power of two. Defaults to DIM.
+
+    Returns:
+        np.ndarray: A (len(texts), dim) float32 matrix; rows of texts without content words are zero.
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        normalized = " ".join(word for word in normalize(text).split() if word not in QUESTION_WORDS)
+        if normalized:
+            features = hash_ngrams(normalized, dim * 2)
+            np.add.at(vectors[row], features & (dim - 1), np.where(features < dim, 1.0, -1.0))
+            norm = np.linalg.norm(vectors[row])
+            if norm:
+                vectors[row] /= norm
+    return vectors
+
+
+class RetrievalMemory:
+    """
+    Long-term memory of every exchange, searchable by similarity to the current utterance.
+
+    The text of the turns stays in the ConversationStore; the memory only keeps one vector per turn, of
+    what the user said, as a row of vectors.f32, and the turn's store id as the same row of ids.i64.
+    Both are raw memory-mapped files, so startup maps them instead of loading them, adding a turn writes
+    one row in place, and a search is a single matrix-vector product over the mapped rows followed by a
+    lookup of the few best turns in the store. When full, the maps are closed, the files are extended to
+    twice their size and mapped again. Stored turns that are not indexed yet, e.g. all of them when the
+    memory is new, are indexed at startup.
+    """
+
+    def __init__(self, store, directory: str = MEMORY_DIR, dim: int = DIM, min_similarity: float = MIN_SIMILARITY) -> None:
+        """
+        Args:
+            store (ConversationStore): The SQLite_DS_Converser.ConversationStore holding the turns' text.
+            directory (str, optional): Where vectors.f32 and ids.i64 live. Defaults to MEMORY_DIR.
+            dim (int, optional): Size of the turn vectors. Defaults to DIM.
+            min_similarity (float, optional): Minimum cosine similarity of a search result. Defaults to MIN_SIMILARITY.
+        """
+        self.store = store
+        self.directory = directory
+        self.dim = dim
+        self.min_similarity = min_similarity
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.ids_path = os.path.join(directory, "ids.i64")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) % (dim * 4):
+            raise ValueError(f"{self.vectors_path} does not hold {dim}-dimensional vectors")
+        self._resize(INITIAL_CAPACITY)
+        self._map()
+        # Ids only grow and unused rows are zero, so the filled rows are the nonzero ids
+        self.size = int(np.count_nonzero(self._ids))
+        self.catch_up()
+        atexit.register(self.flush)
+
+    def _resize(self, capacity: int) -> None:
+        # Extending a file fills it with zeros: zero vectors and EMPTY ids
+        for path, row_bytes in ((self.vectors_path, self.dim * 4), (self.ids_path, 8)):
+            with open(path, "ab") as file:
+                if file.tell() < capacity * row_bytes:
+                    file.truncate(capacity * row_bytes)
+
+    def _map(self) -> None:
+        # A crash between extending the two files leaves the vectors longer; the ids decide the capacity
+        capacity = min(os.path.getsize(self.vectors_path) // (self.dim * 4), os.path.getsize(self.ids_path) // 8)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._ids = np.memmap(self.ids_path, dtype=np.int64, mode="r+", shape=(capacity,))
+
+    def _grow(self) -> None:
+        capacity = len(self._ids) * 2
+        self._vectors.flush()
+        self._ids.flush()
+        # The maps are the only references to the mapped files; dropping them unmaps the files, which
+        # Windows requires before a mapped file can be resized
+        self._vectors = self._ids = None
+        self._resize(capacity)
+        self._map()
+
+    def _index(self, turn_id: int, vector: np.ndarray) -> None:
+        if self.size == len(self._ids):
+            self._grow()
+        self._vectors[self.size] = vector
+        self._ids[self.size] = turn_id
+        self.size += 1
+
+    def _last_id(self) -> int:
+        return int(self._ids[self.size - 1]) if self.size else EMPTY
+
+    def catch_up(self) -> int:
+        """
+        Indexes the committed turns of the store that are newer than the newest indexed one, e.g. every turn
+        when the memory is new, or the rows lost when a crash came before the maps were flushed.
+
+        Returns:
+            int: The number of turns indexed.
+        """
+        with self._lock:
+            rows = self.store.user_texts_after(self._last_id())
+        if not rows:
+            return 0
+        vectors = embed([user for _, user in rows], self.dim)
+        indexed = 0
+        with self._lock:
+            last_id = self._last_id()
+            for (turn_id, _), vector in zip(rows, vectors):
+                if turn_id > last_id:
+                    self._index(turn_id, vector)
+                    indexed += 1
+        return indexed
+
+    def add(self, turn_id: int, user: str) -> None:
+        """
+        Indexes a turn for search() by what the user said, where the facts worth recalling come from.
+
+        Args:
+            turn_id (int): The id ConversationStore.add_turn() returned for the turn.
+            user (str): What the user said.
+        """
+        vector = embed([user], self.dim)[0]
+        with self._lock:
+            if turn_id > self._last_id():
+                self._index(turn_id, vector)
+
+    def search(self, query: str, k: int = RECALL_RESULTS, exclude_last: int = 0) -> List[Dict]:
+        """
+        Returns the stored exchanges most similar to a query.
+
+        Args:
+            query (str): The user's utterance.
+            k (int, optional): Maximum number of exchanges. Defaults to RECALL_RESULTS.
+            exclude_last (int, optional): Newest exchanges to skip, e.g. those still in the prompt window. Defaults to 0.
+
+        Returns:
+            List[Dict]: Turns with "id", "created_at", "user", "assistant" and "similarity", oldest first.
+        """
+        vector = embed([query], self.dim)[0]
+        if not vector.any() or k <= 0:
+            return []
+        with self._lock:
+            rows = self.size - exclude_last
+            if rows <= 0:
+                return []
+            similarities = self._vectors[:rows] @ vector
+            top = np.argpartition(similarities, -k)[-k:] if rows > k else np.arange(rows)
+            matches = [(int(self._ids[row]), float(similarities[row])) for row in sorted(top) if similarities[row] >= self.min_similarity]
+        turns = self.store.turns_by_id(turn_id for turn_id, _ in matches)
+        return [dict(turns[turn_id], similarity=similarity) for turn_id, similarity in matches if turn_id in turns]
+
+    def flush(self) -> None:
+        """Writes the memory-mapped rows to disk."""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._ids.flush()
+
+    def close(self) -> None:
+        """Flushes the rows and unmaps the files."""
+        self.flush()
+        with self._lock:
+            self._vectors = self._ids = None
+
+
+def as_message(exchanges: List[Dict]) -> Optional[Dict[str, str]]:
+    """Formats exchanges from search() as one message to send ahead of the recent history, or None if there are none."""
+    if not exchanges:
+        return None
+    lines = [f"On {time.strftime('%d %b %Y', time.localtime(turn['created_at']))} the user said: {turn['user']}\n"
+             f"You answered: {turn['assistant']}" for turn in exchanges]
+    return {"role": "system", "content": "Earlier exchanges that may be relevant:\n" + "\n".join(lines)}
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from TOOLS.SQLite_DS_Converser import ConversationStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ConversationStore(os.path.join(directory, "history.sqlite3"))
+        memory = RetrievalMemory(store, directory)
+        turns = [("My sister's wedding is in Jaipur on the 14th of December", "How exciting! Shall I remind you a week before?"),
+                 ("I'm allergic to peanuts", "Noted, I'll keep that in mind for recipes.")]
+        turns += [(f"Question number {turn} about the cricket score", "India won by 5 wickets.") for turn in range(100_000)]
+        start = time.perf_counter()
+        for user, assistant in turns:
+            memory.add(store.add_turn(user, assistant), user)
+        print(f"Added 100,000 turns in {time.perf_counter() - start:.1f} s")
+        store.flush()
+
+        for query in ("when is the wedding in Jaipur?", "what am I allergic to?", "play some music"):
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                found = memory.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"\033[92m{query!r} in {sorted(timings)[10]:.2f} ms (median):\033[0m {[turn['user'] for turn in found]}")
+        memory.close()
+
+        start = time.perf_counter()
+        reopened = RetrievalMemory(store, directory)
+        print(f"Reopened {reopened.size} turns in {(time.perf_counter() - start) * 1000:.1f} ms")
+        reopened.close()
+        store.close()
@@ -0,0 +1,212 @@
+import re
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from BRAIN.AI.TEXT.LOCAL.intent_classifier import hash_ngrams
+
+DIM = 4096
+CAPACITY = 1024
+# Cosine similarity above which two utterances count as the same question
+THRESHOLD = 0.85
+# Seconds a cached answer stays valid; chat answers about "now" (time, weather) go stale quickly
+TTL = 15 * 60
+# Fewer content words than this ("why", "tell me more") say too little to be answered from the cache
+MIN_CONTENT_WORDS = 2
+
+# Question scaffolding that paraphrases differ in without changing what is asked; directional prepositions
+# (to, from, into) are kept, since "10 rupees to dollars" and "10 dollars to rupees" are different questions
+STOPWORDS = frozenset(
+    "a an the is are was were be am of in on at for with about me my i you your it its this that these those "
+    "what what's whats tell please can could would will do does did show give let's lets just hey hi hello ok okay "
+    "so and or now right currently".split()
+)
+# Words that make an utterance refer back to the previous exchange ("why is that", "how old is he")
+FOLLOW_UP_WORDS = frozenset(
+    "it its that this these those he she him his her they them their there more why again else also too then "
+    "same other another".split()
+)
+DIRECTIONS = frozenset("to from into onto towards".split())
+NUMBER_WORDS = frozenset(
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen fifteen sixteen seventeen "
+    "eighteen nineteen twenty thirty forty fifty sixty seventy eighty ninety hundred thousand million billion lakh crore "
+    "half quarter double twice".split()
+)
+_WORD_RE = re.compile(r"[\w']+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,:]\d+)*")
+
+
+def normalize(utterance: str) -> str:
+    """
+    Reduces an utterance to its content words in their original order, so "what's the capital of France"
+    and "capital of France please" both become "capital france".
+    """
+    return " ".join(word for word in _WORD_RE.findall(utterance.lower()) if word not in STOPWORDS)
+
+
+def exact_key(utterance: str, context: Optional[str]) -> int:
+    """
+    Returns the part of an utterance's key that has to match exactly, 0 when there is none: its numbers in
+    order ("4 times 25", "at 5 pm"), the word after every directional preposition ("to dollars") and, for a
+    follow-up that refers back to the previous exchange, a fingerprint of that exchange. Paraphrases share
+    it, but questions that differ in these details never hit each other's answers however similar they read.
+    """
+    words = _WORD_RE.findall(utterance.lower())
+    numbers = tuple(word for word in words if _NUMBER_RE.fullmatch(word) or word in NUMBER_WORDS)
+    directions = tuple(f"{word} {target}" for word, target in zip(words, words[1:]) if word in DIRECTIONS)
+    follow_up = normalize(context) if context and not FOLLOW_UP_WORDS.isdisjoint(words) else None
+    if not numbers and not directions and follow_up is None:
+        return 0
+    return hash((numbers, directions, follow_up)) or 1
+
+
+def embed(texts: Sequence[str], dim: int = DIM) -> np.ndarray:
+    """
+    Embeds utterances as L2-normalized hashed n-gram vectors (see intent_classifier.hash_ngrams).
+
+    Args:
+        texts (Sequence[str]): The utterances.
+        dim (int, optional): Size of the vectors, a power of two. Defaults to DIM.
+
+    Returns:
+        np.ndarray: A (len(texts), dim) float32 matrix; rows of utterances with fewer than MIN_CONTENT_WORDS
+                    content words are zero.
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        normalized = normalize(text)
+        if len(normalized.split()) >= MIN_CONTENT_WORDS:
+            features = hash_ngrams(normalized, dim)
+            vectors[row, features] = 1.0 / np.sqrt(len(features))
+    return vectors
+
+
+class SemanticCache:
+    """
+    Answers paraphrases of recently asked questions without calling the LLM.
+
+    Utterance vectors live in one preallocated, contiguous float32 matrix, so a lookup is a single
+    matrix-vector product over every entry followed by an argmax. An entry only matches lookups with
+    the same exact_key, so numbers, directions and the exchange a follow-up refers to must agree. When
+    the cache is full, the least recently used entry is overwritten.
+    """
+
+    def __init__(self, threshold: float = THRESHOLD, capacity: int = CAPACITY, ttl: float = TTL, dim: int = DIM) -> None:
+        """
+        Args:
+            threshold (float, optional): Minimum cosine similarity of a hit. Defaults to THRESHOLD.
+            capacity (int, optional): Maximum number of cached answers. Defaults to CAPACITY.
+            ttl (float, optional): Seconds an answer stays valid. Defaults to TTL.
+            dim (int, optional): Size of the utterance vectors. Defaults to DIM.
+        """
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl = ttl
+        self.dim = dim
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._answers: List[Optional[str]] = [None] * capacity
+        self._keys = np.zeros(capacity, dtype=np.int64)
+        self._expires_at = np.zeros(capacity, dtype=np.float64)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def lookup_many(self, utterances: Sequence[str], context: Optional[str] = None) -> List[Tuple[Optional[str], float]]:
+        """
+        Finds the closest cached question of every utterance in one batched product.
+
+        Args:
+            utterances (Sequence[str]): The user utterances.
+            context (Optional[str], optional): The previous exchange, e.g. the last assistant message. Defaults to None.
+
+        Returns:
+            List[Tuple[Optional[str], float]]: Per utterance, the cached answer (None below the threshold) and the best similarity.
+        """
+        queries = embed(utterances, self.dim)
+        keys = np.array([exact_key(utterance, context) for utterance in utterances], dtype=np.int64)
+        now = time.time()
+        results = []
+        with self._lock:
+            if self._size == 0:
+                self.misses += len(utterances)
+                return [(None, 0.0)] * len(utterances)
+            similarities = self._vectors[:self._size] @ queries.T
+            similarities[self._expires_at[:self._size] < now] = -1.0
+            similarities[self._keys[:self._size, None] != keys[None, :]] = -1.0
+            best_rows = similarities.argmax(axis=0)
+            for column, row in enumerate(best_rows):
+                similarity = float(similarities[row, column])
+                if similarity >= self.threshold:
+                    self._last_used[row] = now
+                    self.hits += 1
+                    results.append((self._answers[row], similarity))
+                else:
+                    self.misses += 1
+                    results.append((None, max(similarity, 0.0)))
+        return results
+
+    def lookup(self, utterance: str, context: Optional[str] = None) -> Optional[str]:
+        """Returns the cached answer of a paraphrase of the utterance asked in the same context, or None."""
+        return self.lookup_many([utterance], context)[0][0]
+
+    def add(self, utterance: str, answer: str, context: Optional[str] = None) -> None:
+        """
+        Caches the answer to an utterance. Utterances with fewer than MIN_CONTENT_WORDS content words
+        ("how are you", "why") are not cached.
+
+        Args:
+            utterance (str): The user utterance.
+            answer (str): The assistant's answer.
+            context (Optional[str], optional): The exchange the utterance followed, as passed to lookup(). Defaults to None.
+        """
+        vector = embed([utterance], self.dim)[0]
+        if not vector.any() or not answer:
+            return
+        now = time.time()
+        with self._lock:
+            if self._size < self.capacity:
+                row = self._size
+                self._size += 1
+            else:
+                row = int(self._last_used.argmin())
+            self._vectors[row] = vector
+            self._answers[row] = answer
+            self._keys[row] = exact_key(utterance, context)
+            self._expires_at[row] = now + self.ttl
+            self._last_used[row] = now
+
+    def stats(self) -> dict:
+        """Returns the number of entries, hits and misses."""
+        with self._lock:
+            return {"entries": self._size, "hits": self.hits, "misses": self.misses}
+
+
+if __name__ == "__main__":
+    cache = SemanticCache()
+    cache.add("What's the time in Tokyo?", "It is 9 PM in Tokyo.")
+    cache.add("What is the capital of France?", "Paris.")
+
+    cache.add("Convert 10 dollars to rupees", "10 dollars are about 835 rupees.")
+
+    queries = ["tell me Tokyo time", "what's the time in Toronto", "whats the capital of France", "what is the capital of Germany", "why",
+               "convert 10 dollars to rupees please", "convert 10 rupees to dollars", "convert 100 dollars to rupees"]
+    start = time.perf_counter()
+    results = cache.lookup_many(queries)
+    print(f"Batched lookup took {(time.perf_counter() - start) * 1000:.2f} ms")
+    for query, (answer, similarity) in zip(queries, results):
+        color = "\033[92m" if answer else "\033[91m"
+        print(f"{color}{query!r} -> {answer!r} ({similarity:.2f})\033[0m")
+
+    # A follow-up is only answered from the cache after the exchange it was first asked about
+    cache.add("Who is the president of that country?", "Emmanuel Macron.", context="Paris.")
+    print(cache.lookup("who is the president of that country", context="Paris."),
+          cache.lookup("who is the president of that country", context="Berlin."))
+
+    for i in range(CAPACITY):
+        cache.add(f"question number {i}", f"answer {i}")
+    start = time.perf_counter()
+    cache.lookup("question number 500")
+    print(f"Lookup over {cache.stats()['entries']} entries took {(time.perf_counter() - start) * 1000:.2f} ms", cache.stats())
@@ -0,0 +1,117 @@
+from typing import List, Optional
+
+TERMINATORS = ".?!।॥"
+CLOSERS = "\"'”’)]"
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "approx",
+    "e.g", "i.e", "a.m", "p.m", "u.s", "u.k", "inc", "ltd", "co", "jan", "feb", "apr",
+    "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec", "rs",
+}
+# Abbreviations that are also everyday words ("No.", "a fig.", "to mar."): only one when a number follows ("No. 5", "Mar. 14")
+NUMBERED_ABBREVIATIONS = {"no", "fig", "mar"}
+
+
+class SentenceSegmenter:
+    """
+    Stateful sentence splitter for streamed LLM output.
+
+    Text is fed in as it arrives and only the newly appended characters are scanned, so splitting
+    a whole response costs O(n) instead of re-running a regex over the growing buffer on every token.
+    A sentence ends at '.', '?', '!' or the Hindi danda ('।', '॥') followed by whitespace (optionally
+    after closing quotes or brackets). Periods of abbreviations (Mr., e.g., No. 5), initials (J.),
+    numbered list markers (1.) and decimals (3.14) do not end a sentence.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._pos = 0
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Appends streamed text and returns the sentences it completed, in order.
+
+        Args:
+            text (str): The next piece of the response, e.g. a single token.
+
+        Returns:
+            List[str]: The completed, stripped sentences (possibly empty).
+        """
+        self._buffer += text
+        buffer = self._buffer
+        sentences = []
+        start = 0
+        i = self._pos
+        length = len(buffer)
+
+        while i < length:
+            if buffer[i] not in TERMINATORS:
+                i += 1
+                continue
+            end = i + 1
+            while end < length and (buffer[end] in TERMINATORS or buffer[end] in CLOSERS):
+                end += 1
+            if end >= length:
+                # The character after the terminator has not arrived yet
+                break
+            boundary = buffer[end].isspace() and self._is_boundary(start, end - 1, end)
+            if boundary is None:
+                # Whether this period ends the sentence depends on text that has not arrived yet
+                break
+            if boundary:
+                sentence = buffer[start:end].strip()
+                if sentence:
+                    sentences.append(sentence)
+                start = end
+            i = end
+
+        if start:
+            self._buffer = buffer[start:]
+            i -= start
+        self._pos = i
+        return sentences
+
+    def _is_boundary(self, start: int, index: int, after: int) -> Optional[bool]:
+        """
+        Decides whether the terminator run ending at index closes the sentence that begins at start; after is
+        the position of the whitespace following it. Returns None while the answer depends on the next word.
+        """
+        # Walk back over closers and repeated terminators to the first terminator of the run
+        while index > start and (self._buffer[index] in CLOSERS or self._buffer[index - 1] in TERMINATORS):
+            index -= 1
+        if self._buffer[index] != ".":
+            return True
+        word_start = max(self._buffer.rfind(" ", start, index), self._buffer.rfind("\n", start, index), start - 1) + 1
+        word = self._buffer[word_start:index].lstrip("(\"'“‘")
+        if not word:
+            return True
+        # A single letter is an initial ("A. P. J. Kalam"); a single digit ending a sentence is not
+        if (len(word) == 1 and word.isalpha()) or word.lower() in ABBREVIATIONS:
+            return False
+        if word.lower() in NUMBERED_ABBREVIATIONS:
+            following = self._buffer[after:].lstrip()
+            return None if not following else not following[0].isdigit()
+        # A bare number opening the sentence is a list marker ("2. Delhi is ..."), not a full stop
+        return not (word.isdigit() and len(word) <= 2 and not self._buffer[start:word_start].strip())
+
+    def flush(self) -> List[str]:
+        """Returns whatever is left in the buffer as a final sentence and resets the segmenter."""
+        rest = self._buffer.strip()
+        self._buffer, self._pos = "", 0
+        return [rest] if rest else []
+
+
+def split_sentences(text: str) -> List[str]:
+    """Splits a complete text into sentences with the same rules as SentenceSegmenter."""
+    segmenter = SentenceSegmenter()
+    return segmenter.feed(text) + segmenter.flush()
+
+
+if __name__ == "__main__":
+    sample = ("Dr. Kalam was born in 1931. He studied at St. Joseph's College, e.g. physics! "
+              "1. India has 28 states. 2. Its GDP grew 7.2 percent... Really? "
+              "भारत एक विशाल देश है। इसकी राजधानी नई दिल्ली है। He said \"Yes.\" Then left.")
+    segmenter = SentenceSegmenter()
+    streamed = [s for i in range(0, len(sample), 3) for s in segmenter.feed(sample[i:i + 3])] + segmenter.flush()
+    assert streamed == split_sentences(sample)
+    for sentence in streamed:
+        print(repr(sentence))
@@ -0,0 +1,148 @@
+import json
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+
+
+class SSEDecoder:
+    """
+    Incremental decoder for server-sent event streams.
+
+    Raw network chunks are appended to a single bytearray and split on newlines in place; the lines
+    are inspected through a memoryview, and only the payload of "data:" lines is ever copied out.
+    Every data line is emitted as soon as its newline arrives, which is how the OpenAI-compatible
+    chat APIs (DeepInfra, OpenRouter, Phind) send one delta per line.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._scan_from = 0
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """
+        Adds a chunk of the stream and returns the data payloads it completed.
+
+        Args:
+            chunk (bytes): The next bytes received from the server, of any size.
+
+        Returns:
+            List[bytes]: The payloads of the "data:" lines completed by this chunk, without the prefix.
+        """
+        buffer = self._buffer
+        buffer += chunk
+        newline = buffer.find(b"\n", self._scan_from)
+        if newline == -1:
+            self._scan_from = len(buffer)
+            return []
+
+        payloads = []
+        start = 0
+        with memoryview(buffer) as view:
+            while newline != -1:
+                if buffer.startswith(b"data:", start):
+                    begin = start + 6 if view[start + 5:start + 6] == b" " else start + 5
+                    end = newline - 1 if newline > begin and view[newline - 1] == 13 else newline
+                    payloads.append(bytes(view[begin:end]))
+                start = newline + 1
+                newline = buffer.find(b"\n", start)
+        del buffer[:start]
+        self._scan_from = len(buffer)
+        return payloads
+
+    def flush(self) -> List[bytes]:
+        """Returns the payload of a final data line that was not terminated by a newline."""
+        return self.feed(b"\n") if self._buffer else []
+
+
+def iter_chunks(response, buffer_size: int = 65536) -> Iterator[bytes]:
+    """
+    Yields the body of a streamed requests response in chunks of whatever size has arrived,
+    up to buffer_size, instead of blocking until a full buffer (or a single byte at a time).
+
+    Args:
+        response (requests.Response): A response obtained with stream=True.
+        buffer_size (int, optional): Maximum number of bytes returned per chunk. Defaults to 65536.
+    """
+    read1 = getattr(response.raw, "read1", None)
+    if read1 is None:
+        # urllib3 < 2 has no read1; chunk_size=None yields each transfer chunk as it arrives
+        yield from response.iter_content(chunk_size=None)
+        return
+    while True:
+        chunk = read1(buffer_size, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_payloads(response, buffer_size: int = 65536) -> Iterator[bytes]:
+    """Yields the raw "data:" payloads of a streamed SSE response as they arrive."""
+    decoder = SSEDecoder()
+    for chunk in iter_chunks(response, buffer_size):
+        yield from decoder.feed(chunk)
+    yield from decoder.flush()
+
+
+def openai_delta(event: dict) -> Optional[str]:
+    """Extracts the text delta of an OpenAI-compatible chat.completion.chunk event."""
+    try:
+        return event["choices"][0]["delta"].get("content")
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+def iter_deltas(response, extract: Callable[[dict], Optional[str]] = openai_delta, buffer_size: int = 65536) -> Iterator[str]:
+    """
+    Yields the text deltas of a streamed chat completion. Only data payloads are JSON-decoded;
+    the terminating [DONE] marker and undecodable payloads are skipped.
+
+    Args:
+        response (requests.Response): A response obtained with stream=True.
+        extract (Callable[[dict], Optional[str]], optional): Pulls the text out of a decoded event. Defaults to openai_delta.
+        buffer_size (int, optional): Maximum number of bytes read from the socket at once. Defaults to 65536.
+    """
+    for payload in iter_payloads(response, buffer_size):
+        if payload == b"[DONE]":
+            return
+        try:
+            delta = extract(json.loads(payload))
+        except json.JSONDecodeError:
+            continue
+        if delta:
+            yield delta
+
+
+async def aiter_payloads(response) -> AsyncIterator[bytes]:
+    """Yields the raw "data:" payloads of a streamed httpx response as they arrive."""
+    decoder = SSEDecoder()
+    async for chunk in response.aiter_bytes():
+        for payload in decoder.feed(chunk):
+            yield payload
+    for payload in decoder.flush():
+        yield payload
+
+
+async def aiter_deltas(response, extract: Callable[[dict], Optional[str]] = openai_delta) -> AsyncIterator[str]:
+    """
+    Async counterpart of iter_deltas for a streamed httpx response.
+
+    Args:
+        response (httpx.Response): A response opened with client.stream().
+        extract (Callable[[dict], Optional[str]], optional): Pulls the text out of a decoded event. Defaults to openai_delta.
+    """
+    async for payload in aiter_payloads(response):
+        if payload == b"[DONE]":
+            return
+        try:
+            delta = extract(json.loads(payload))
+        except json.JSONDecodeError:
+            continue
+        if delta:
+            yield delta
+
+
+if __name__ == "__main__":
+    decoder = SSEDecoder()
+    stream = b'data: {"choices": [{"delta": {"content": "Hel"}}]}\r\n\r\ndata: {"choices": [{"delta": {"content": "lo"}}]}\n\ndata: [DONE]\n\n'
+    for size in (1, 7, len(stream)):
+        decoder = SSEDecoder()
+        payloads = [p for i in range(0, len(stream), size) for p in decoder.feed(stream[i:i + size])]
+        print(size, payloads)
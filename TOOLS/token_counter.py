@@ -0,0 +1,90 @@
+import functools
+import re
+from typing import Callable, Dict, Mapping, Optional
+
+try:
+    import tiktoken
+except ImportError:  # Exact counts for OpenAI models are optional
+    tiktoken = None
+
+Tokenizer = Callable[[str], int]
+
+# Tokens the chat template adds around every message (role header and separators)
+MESSAGE_OVERHEAD = 4
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_tokenizers: Dict[str, Tokenizer] = {}
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Estimates the number of BPE tokens of a text without a vocabulary.
+
+    Every word and every punctuation mark is one token, and long words are split further, one token per
+    six characters, roughly how Llama 3 and GPT-4 class tokenizers treat English text. It costs one
+    regex pass and needs no model files.
+
+    Args:
+        text (str): The text to count.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return sum(1 + len(piece) // 6 for piece in _PIECE_RE.findall(text))
+
+
+def register_tokenizer(model_prefix: str, tokenizer: Tokenizer) -> None:
+    """
+    Uses a tokenizer for every model whose name starts with model_prefix.
+
+    Args:
+        model_prefix (str): E.g. "meta-llama/" or "openai/gpt-4".
+        tokenizer (Tokenizer): Returns the token count of a text, e.g. lambda text: len(hf_tokenizer.encode(text)).
+    """
+    _tokenizers[model_prefix] = tokenizer
+
+
+def get_tokenizer(model: Optional[str] = None) -> Tokenizer:
+    """Returns the tokenizer registered for the longest matching model prefix, or approximate_tokens()."""
+    if model:
+        matches = [prefix for prefix in _tokenizers if model.startswith(prefix)]
+        if matches:
+            return _tokenizers[max(matches, key=len)]
+    return approximate_tokens
+
+
+def message_tokens(message: Mapping[str, str], tokenizer: Tokenizer = approximate_tokens) -> int:
+    """Returns the tokens a chat message costs in a prompt: its content plus the per-message template overhead."""
+    return tokenizer(message.get("content") or "") + MESSAGE_OVERHEAD
+
+
+@functools.lru_cache(maxsize=None)
+def _cl100k():
+    # Loaded on the first count, not at import: tiktoken may download the vocabulary the first time
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def cl100k_tokens(text: str) -> int:
+    """Counts the tokens of a text with tiktoken's cl100k_base vocabulary."""
+    return len(_cl100k().encode(text, disallowed_special=()))
+
+
+if tiktoken is not None:
+    register_tokenizer("openai/", cl100k_tokens)
+    register_tokenizer("gpt-", cl100k_tokens)
+    # Llama 3's vocabulary is cl100k_base plus 28k extra tokens, so cl100k counts it closely
+    register_tokenizer("meta-llama/Meta-Llama-3", cl100k_tokens)
+
+
+if __name__ == "__main__":
+    import time
+
+    text = ("The Taj Mahal is an ivory-white marble mausoleum on the right bank of the river Yamuna in Agra, "
+            "commissioned in 1631 by the Mughal emperor Shah Jahan to house the tomb of his favourite wife.")
+    start = time.perf_counter()
+    for _ in range(10_000):
+        approximate_tokens(text)
+    print(f"{approximate_tokens(text)} tokens (approximate), {len(text.split())} words, "
+          f"{(time.perf_counter() - start) / 10_000 * 1e6:.1f} µs per call")
+    print("gpt-4 tokenizer:", get_tokenizer("gpt-4")(text))
+    print("Llama 3.1 tokenizer:", get_tokenizer("meta-llama/Meta-Llama-3.1-405B-Instruct")(text))
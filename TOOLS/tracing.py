@@ -0,0 +1,237 @@
+import atexit
+import glob
+import itertools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+TRACE_DIR = "ASSETS/TRACES"
+TRACE_FILE = os.path.join(TRACE_DIR, "turns.jsonl")
+MAX_BYTES = 2 * 1024 * 1024
+BACKUPS = 5
+
+# Tracing is off unless JARVIS_TRACE=1 is set in the environment (or enable() is called)
+ENABLED = os.environ.get("JARVIS_TRACE", "") == "1"
+SESSION = time.strftime("%Y%m%d-%H%M%S")
+_turn_ids = itertools.count(1)
+
+
+class _Writer:
+    """Appends trace records to a JSONL file and rotates it (turns.jsonl -> turns.1.jsonl ...) once it grows past max_bytes."""
+
+    def __init__(self, path: str = TRACE_FILE, max_bytes: int = MAX_BYTES, backups: int = BACKUPS) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._file = None
+
+    def write(self, record: Dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        root, ext = os.path.splitext(self.path)
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{root}.{index}{ext}"):
+                os.replace(f"{root}.{index}{ext}", f"{root}.{index + 1}{ext}")
+        os.replace(self.path, f"{root}.1{ext}")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+
+_writer = _Writer()
+atexit.register(_writer.flush)
+
+
+class _Span:
+    """Times the enclosed block on the monotonic clock and records it when the block exits."""
+
+    __slots__ = ("trace", "stage", "attrs", "start")
+
+    def __init__(self, trace: "Trace", stage: str, attrs: Dict) -> None:
+        self.trace = trace
+        self.stage = stage
+        self.attrs = attrs
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace._record(self.stage, self.start, end - self.start, self.attrs)
+
+
+class Trace:
+    """
+    The timings of one turn. Spans measure a block (a classifier call, a synthesis), marks record a
+    single moment (first LLM token, first audio out). Both are stored relative to the start of the
+    turn, i.e. the moment the user stopped speaking, and are safe to record from any thread.
+    """
+
+    def __init__(self, started_at: Optional[float] = None, **attrs) -> None:
+        self.turn = next(_turn_ids)
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self._record("listen.end", self.started_at, None, attrs)
+
+    def span(self, stage: str, **attrs) -> _Span:
+        """
+        Times a block of code as one stage of the turn.
+
+        Args:
+            stage (str): The stage name, e.g. "classify.local" or "tts.synthesize".
+            **attrs: Extra JSON-serialisable fields stored with the span.
+
+        Returns:
+            _Span: A context manager.
+        """
+        return _Span(self, stage, attrs)
+
+    def mark(self, stage: str, **attrs) -> None:
+        """Records that the turn reached a stage now, e.g. "llm.first_token" or "audio.first"."""
+        self._record(stage, time.perf_counter(), None, attrs)
+
+    def _record(self, stage: str, at: float, duration: Optional[float], attrs: Dict) -> None:
+        record = {"session": SESSION, "turn": self.turn, "stage": stage, "at_ms": round((at - self.started_at) * 1000, 3)}
+        if duration is not None:
+            record["ms"] = round(duration * 1000, 3)
+        record.update(attrs)
+        _writer.write(record)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+class _NullTrace:
+    """Stands in for Trace while tracing is disabled; every call is a no-op returning shared objects."""
+
+    turn = 0
+    started_at = 0.0
+    _span = _NullSpan()
+
+    def span(self, stage: str, **attrs) -> _NullSpan:
+        return self._span
+
+    def mark(self, stage: str, **attrs) -> None:
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+def start_turn(started_at: Optional[float] = None, **attrs):
+    """
+    Starts tracing a new turn.
+
+    Args:
+        started_at (Optional[float], optional): time.perf_counter() at which the user stopped speaking. Defaults to now.
+        **attrs: Extra fields stored with the turn's first record, e.g. the route.
+
+    Returns:
+        Trace: A Trace, or NULL_TRACE while tracing is disabled.
+    """
+    return Trace(started_at, **attrs) if ENABLED else NULL_TRACE
+
+
+def enable(path: Optional[str] = None) -> None:
+    """Turns tracing on at runtime, optionally writing to another file."""
+    global ENABLED, _writer
+    ENABLED = True
+    if path is not None:
+        _writer = _Writer(path)
+        atexit.register(_writer.flush)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def load_records(path: str = TRACE_FILE) -> List[Dict]:
+    """Reads the trace file and its rotated backups, oldest first."""
+    root, ext = os.path.splitext(path)
+    backups = sorted(glob.glob(f"{root}.*{ext}"), key=lambda name: -int(name[len(root) + 1:-len(ext)] or 0))
+    records = []
+    for name in backups + [path]:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def report(path: str = TRACE_FILE, session: Optional[str] = None) -> None:
+    """
+    Prints p50/p95/p99 per stage. Spans are reported by their duration, marks by their offset from
+    the start of the turn (so "audio.first" is the time to first audio).
+
+    Args:
+        path (str, optional): The trace file. Defaults to ASSETS/TRACES/turns.jsonl.
+        session (Optional[str], optional): The session to report, "all" for every session. Defaults to the latest one.
+    """
+    records = load_records(path)
+    if not records:
+        print(f"\033[91mNo traces found in {path}. Run with JARVIS_TRACE=1 to record them.\033[0m")
+        return
+    session = session or records[-1]["session"]
+    if session != "all":
+        records = [record for record in records if record["session"] == session]
+
+    stages: Dict[str, List[float]] = {}
+    for record in records:
+        stages.setdefault(record["stage"], []).append(record.get("ms", record["at_ms"]))
+
+    turns = len({(record["session"], record["turn"]) for record in records})
+    print(f"\033[92mSession {session}: {turns} turns\033[0m")
+    print(f"{'stage':<24}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}")
+    for stage in sorted(stages, key=lambda name: percentile(sorted(stages[name]), 50)):
+        values = sorted(stages[stage])
+        print(f"{stage:<24}{len(values):>7}{percentile(values, 50):>11.1f}{percentile(values, 95):>11.1f}{percentile(values, 99):>11.1f}")
+
+
+if __name__ == "__main__":
+    # python -m TOOLS.tracing report [session|all]
+    if sys.argv[1:2] == ["report"]:
+        report(session=sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        import random
+        import tempfile
+
+        enable(os.path.join(tempfile.mkdtemp(), "turns.jsonl"))
+        for _ in range(50):
+            trace = start_turn(route="chat")
+            with trace.span("classify.local"):
+                time.sleep(random.uniform(0.0001, 0.0005))
+            time.sleep(random.uniform(0.005, 0.02))
+            trace.mark("llm.first_token")
+        _writer.flush()
+        report(_writer.path)
@@ -0,0 +1,148 @@
+import asyncio
+import concurrent.futures
+from typing import Any, Callable, Iterator, Optional
+
+_DONE = object()
+# Pause after a failed listen, so a microphone that keeps failing does not spin the stage
+LISTEN_RETRY_DELAY = 0.25
+
+
+class TurnOrchestrator:
+    """
+    Runs the assistant loop (listen -> classify -> respond -> speak) as four asyncio stages
+    connected by bounded queues, so capture, inference and playback of different turns overlap.
+
+    Every stage callable is blocking and is executed off the event loop. A stage may return None
+    to drop the item, and the respond stage may return an iterator to emit several utterances
+    (for example an acknowledgement followed by the real answer) which are spoken in order.
+    """
+
+    def __init__(self,
+                 listen: Callable[[], Any],
+                 classify: Callable[[Any], Any],
+                 respond: Callable[[Any], Any],
+                 speak: Callable[[str], Any],
+                 queue_size: int = 2,
+                 executor: Optional[concurrent.futures.Executor] = None) -> None:
+        """
+        Args:
+            listen (Callable[[], Any]): Blocks until the user has said something and returns it, e.g. the
+                                        transcribed text; a falsy result is dropped.
+            classify (Callable[[Any], Any]): Turns what listen returned into a routed turn.
+            respond (Callable[[Any], Any]): Produces the text (or an iterator of texts) to be spoken.
+            speak (Callable[[str], Any]): Speaks a single piece of text.
+            queue_size (int, optional): Capacity of each inter-stage queue. Defaults to 2.
+            executor (Optional[concurrent.futures.Executor], optional): Executor the blocking stages run on.
+                                                                          Defaults to a private four worker pool.
+        """
+        self.listen = listen
+        self.classify = classify
+        self.respond = respond
+        self.speak = speak
+        self.queue_size = queue_size
+        # A shared executor (e.g. ExecutionService.executor()) belongs to its owner and is left running by run()
+        self._owns_executor = executor is None
+        self.executor = executor or concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="turn-stage")
+        self._stop_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _call(self, func: Callable, *args) -> Any:
+        """Runs a blocking callable on the stage executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _listen_stage(self, outbox: asyncio.Queue) -> None:
+        """Keeps the microphone busy and feeds every utterance into the pipeline."""
+        while not self._stop_event.is_set():
+            # A failed capture (microphone unplugged, recognizer error) is logged and the stage listens again
+            try:
+                speech = await self._call(self.listen)
+            except Exception as e:
+                print(f"\033[91mListen failed: {type(e).__name__}: {e}\033[0m")
+                await asyncio.sleep(LISTEN_RETRY_DELAY)
+                continue
+            if speech:
+                await outbox.put(speech)
+        await outbox.put(_DONE)
+
+    async def _stage(self, func: Callable, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        """Pulls items from inbox, runs func on them and forwards every non-None result."""
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                await outbox.put(_DONE)
+                return
+            # A generator stage (respond) does its work while it is iterated, so the iteration is guarded
+            # too: a failing turn is logged and dropped, and the pipeline goes on serving the next one
+            try:
+                result = await self._call(func, item)
+                if result is None:
+                    continue
+                if isinstance(result, Iterator):
+                    while (part := await self._call(next, result, None)) is not None:
+                        await outbox.put(part)
+                else:
+                    await outbox.put(result)
+            except Exception as e:
+                print(f"\033[91mStage {func.__name__} failed: {type(e).__name__}: {e}\033[0m")
+
+    async def _speak_stage(self, inbox: asyncio.Queue) -> None:
+        """Speaks utterances in the order they were produced."""
+        while (text := await inbox.get()) is not _DONE:
+            try:
+                await self._call(self.speak, text)
+            except Exception as e:
+                print(f"\033[91mSpeak failed: {e}\033[0m")
+
+    async def run_async(self) -> None:
+        """Starts all stages and waits until the pipeline has drained after stop() was called."""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        speech_queue = asyncio.Queue(maxsize=self.queue_size)
+        turn_queue = asyncio.Queue(maxsize=self.queue_size)
+        speak_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        await asyncio.gather(
+            self._listen_stage(speech_queue),
+            self._stage(self.classify, speech_queue, turn_queue),
+            self._stage(self.respond, turn_queue, speak_queue),
+            self._speak_stage(speak_queue),
+        )
+
+    def stop(self) -> None:
+        """Stops listening for new utterances; turns already in flight still complete. Safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def run(self) -> None:
+        """Blocking entry point used by main.py."""
+        try:
+            asyncio.run(self.run_async())
+        finally:
+            if self._owns_executor:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    import time
+
+    utterances = iter(["jarvis what time is it", "tell me a joke", "jarvis open youtube"])
+
+    def listen():
+        time.sleep(0.5)
+        speech = next(utterances, None)
+        if speech is None:
+            orchestrator.stop()
+        return speech
+
+    def classify(speech):
+        time.sleep(0.5)
+        return speech
+
+    def respond(turn):
+        time.sleep(0.5)
+        return iter(["Sure Sir.", f"Answer to: {turn}"])
+
+    orchestrator = TurnOrchestrator(listen, classify, respond, lambda text: (time.sleep(0.5), print("SPEAK >>", text)))
+    start = time.perf_counter()
+    orchestrator.run()
+    print(f"Total time taken: {time.perf_counter() - start:.2f} seconds")
@@ -41,86 +41,199 @@
 #  got even better! Happy coding!
 #  ----------------------------------------------------------------------------
 
-from IMPORTS import *
+from typing import Optional
 
-while True:
+from IMPORTS import *
 
+# Below this confidence the utterance is re-classified by the LLM router (BISECTORS.routing_classifier_v1)
+LOCAL_CLASSIFIER_THRESHOLD = 0.7
+# Speak chat answers sentence by sentence while the LLM is still generating them
+STREAMING_RESPONSES = True
+# Classifier labels -> the route names respond() dispatches on
+TASK_ROUTES = {"chat": "chat", "vision": "vision", "website": "website", "call": "call", "system": "system control"}
+
+
+def classify_with_llm(speech: str) -> dict:
+    """Asks the LLM router for a {"image": bool, "task": str} verdict in a single, token-capped request."""
+    verdict_text = deepInfra_TEXT.generate(f"Text to Classify --> {speech}", system_prompt=BISECTORS.routing_classifier_v1,
+                                           max_tokens=24, temperature=0.0, stream=False, stop=["}"],
+                                           until=lambda text: "}" in text) or ""
+    if "{" in verdict_text and "}" not in verdict_text:
+        # The server ends the generation at the stop sequence and leaves the "}" itself out of the text
+        verdict_text += "}"
+    try:
+        verdict = json.loads(verdict_text[verdict_text.index("{"):verdict_text.index("}") + 1])
+        return {"image": verdict.get("image") is True, "task": TASK_ROUTES.get(str(verdict.get("task")).lower(), "chat")}
+    except (ValueError, AttributeError):
+        print("\033[91mUnparseable Router Verdict:", verdict_text, "\033[0m")
+        return {"image": False, "task": "chat"}
+
+
+def listen() -> Optional[dict]:
+    """Captures one utterance together with the moment the user stopped speaking."""
     speech = listener.listen()
+    if not speech:
+        return None
+    # Taken from the recogniser, so the time an utterance waits for the classify stage counts towards its latency
+    heard_at = listener.heard_at if listener.heard_at is not None else time.perf_counter()
+    return {"speech": speech, "heard_at": heard_at}
+
+
+def classify(heard: dict) -> dict:
+    """Routes an utterance: classifies "jarvis" commands into a handler and treats everything else as plain chat."""
+    speech, heard_at = heard["speech"], heard["heard_at"]
+    jarvis = speech.lower().startswith("jarvis") or speech.lower().endswith("jarvis")
+    # One token spans the whole turn: a hotword while it is being answered tears down all of its work
+    cancel_token = CancelToken()
+    trace = tracing.start_turn(heard_at, jarvis=jarvis)
+    if not jarvis:
+        return {"speech": speech, "jarvis": False, "heard_at": heard_at, "cancel": cancel_token, "trace": trace}
+
+    speech = speech[6:].strip()
+    print("Updated Speech:", speech)
+
+    turn_tasks = execution_service.group("turn")
+    cancel_token.add_callback(turn_tasks.cancel)
+    # The speculative default answer has its own token: cancelling it aborts the request even once it is running,
+    # which cancelling its future cannot do; a barge-in on the turn cancels it too
+    default_cancel = CancelToken()
+    cancel_token.add_callback(default_cancel.cancel)
+    default_response = turn_tasks.submit(deepInfra_TEXT.generate, history_manager.prompt_history(), system_prompt=INSTRUCTIONS.human_response_v3_AVA,
+                                         stream=False, cancel_token=default_cancel)
+
+    # The local classifier answers in well under a millisecond; the LLM router is only asked when it is unsure
+    with trace.span("classify.local"):
+        verdict = intent_classifier.predict(speech)
+    if verdict["confidence"] >= LOCAL_CLASSIFIER_THRESHOLD:
+        print("Local Classifier >> ", "\033[91m" + str(verdict) + "\033[0m")
+        verdict["task"] = TASK_ROUTES[verdict["task"]]
+    else:
+        with trace.span("classify.llm"):
+            verdict = classify_with_llm(speech)
+        print("Router Classifier >> ", "\033[91m" + str(verdict) + "\033[0m")
+    trace.mark("classify.done", task=verdict["task"], image=verdict["image"])
 
-    if speech.lower().startswith("jarvis") or speech.lower().endswith("jarvis"):
-        speech = speech[6:].strip()
-        print("Updated Speech:", speech)
+    return {"speech": speech, "jarvis": True, "image": verdict["image"], "task": verdict["task"],
+            "default_response": default_response, "default_cancel": default_cancel, "tasks": turn_tasks,
+            "heard_at": heard_at, "cancel": cancel_token, "trace": trace}
 
-        response_img_or_text = concurrent.futures.ThreadPoolExecutor().submit(deepInfra_TEXT.generate, [{"role": "user", "content": "Text to Classify -->" + speech}], system_prompt=BISECTORS.image_requests_v3)
-        response_classifier = concurrent.futures.ThreadPoolExecutor().submit(deepInfra_TEXT.generate, [{"role": "user", "content": "Text to Classify -->" + speech}], system_prompt=BISECTORS.complex_task_classifier_v6, stream=False)
-        default_response = concurrent.futures.ThreadPoolExecutor().submit(deepInfra_TEXT.generate, history_manager.history, system_prompt=INSTRUCTIONS.human_response_v3_AVA, stream=False)
-        
-        concurrent.futures.wait([response_img_or_text, response_classifier, default_response])
-        print("Response Classifier >> ", "\033[91m" + response_classifier.result() + "\033[0m")
-        print("Image or Text Classifier >> ", "\033[91m" + response_img_or_text.result() + "\033[0m")
-
-        if "yes" in response_img_or_text.result().lower():
-            speak("Sure Sir, Generating Your Image")
-            decohere_ai.generate(speech)
-            continue
-        
-        elif all(x in response_classifier.result().lower() for x in ("vision", "website", "call", "youtube")):
-            print("\033[91mConfused with Classification. Using Default Response\033[0m")
-            speak(default_response.result())
-
-        elif "system control" in response_classifier.result().lower():
-            # Create a ThreadPoolExecutor and submit the speak function
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                speak_future = executor.submit(speak, "Sure Sir. Setting the Required Settings")
-
-                speech_lower = speech.lower()
-                if "dark" in speech_lower or "light" in speech_lower:
-                    theme = 0 if "dark" in speech_lower else 1
-                    system_theme.WindowsThemeManager().set_theme(theme)
-                elif any(alignment in speech_lower for alignment in ["left", "center", "centre", "right"]):
-                    alignment = 0 if "left" in speech_lower else 1
-                    taskbar.TaskbarCustomizer().set_alignment(alignment)
-                elif "temperature" in speech_lower:
-                    taskbar.TaskbarCustomizer().set_temperature_display(1)
-
-                speak_future.result()
-
-        elif "vision" in response_classifier.result().lower():
-            concurrent.futures.ThreadPoolExecutor().submit(speak("Analysing, Please Wait"))
-            image_path = camera_vision.realtime_vision()
-            response_vison = deepInfra_VISION.generate(speech, system_prompt=INSTRUCTIONS.vison_realtime_v1, image_path=image_path)
-            print("AI>>", response_vison)
-            os.remove(image_path)
-            speak(response_vison)
-
-        elif "call" in response_classifier.result().lower():
-            speak("Sure Sir. Calling")
-            # make_call.call()
-
-        elif "website" in response_classifier.result().lower():
-            site_markdown = jenna_reader.fetch_website_content(chrome_latest_url.get_latest_chrome_url())
-            response = openrouter.generate(f"METEDATA: {site_markdown}\n\nQUERY: {speech}", system_prompt="Keep you responses very short and concise")
-            speak(response, voice="Salli")
-
-        else: 
-            # taskExecutor.process_query(speech)
-            print("AI>>", default_response.result())
-            speak(default_response.result())
 
-    else:
-        history_manager.store_history(history_manager.history + [{"role": "user", "content": speech}])
+def utterance(turn: dict, text: str) -> dict:
+    """Wraps a complete reply like a streamed one, so it reaches the speak stage with the turn's cancel token and trace."""
+    return {"sentences": split_sentences(text or ""), "heard_at": turn["heard_at"], "cancel": turn["cancel"], "trace": turn["trace"]}
+
+
+def respond(turn: dict):
+    """Executes a routed turn and yields every utterance that should be spoken, in order."""
+    speech = turn["speech"]
+
+    if not turn["jarvis"]:
+        # The answer the user may be following up on ("why", "tell me more about it")
+        previous_answer = history_manager.history[-1]["content"] if history_manager.history else None
+        history_manager.add_message({"role": "user", "content": speech})
         print("\033[93mHuman >> {}\033[0m".format(speech))
 
         # chat_response = Phind.generate(history_manager.history, system_prompt=INSTRUCTIONS.hindi_only_system_prompt_v3, stream=True)
         # chat_response = Phind.generate(history_manager.history, system_prompt=INSTRUCTIONS.human_response_v3_AVA, stream=True)
-        
+
         # chat_response = Pi_Ai.generate(speech, prints=False)
-        chat_response = Hugging_Face_TEXT.generate(speech)
+        cached_response = semantic_cache.lookup(speech, context=previous_answer)
+        if cached_response is not None:
+            # A paraphrase of a recent question: answer it without asking the LLM
+            turn["trace"].mark("llm.semantic_cache_hit")
+            chat_response = cached_response
+            yield utterance(turn, chat_response)
+        elif STREAMING_RESPONSES:
+            # The speak stage starts playing the first sentence while the rest is still being generated here
+            sentences = SentenceQueue()
+            turn["cancel"].add_callback(sentences.close)
+            yield {"sentences": sentences, "heard_at": turn["heard_at"], "cancel": turn["cancel"], "trace": turn["trace"]}
+            chat_response = []
+            try:
+                for sentence in llm_router.sentences(history_manager.prompt_history(speech), system_prompt=INSTRUCTIONS.human_response_v3_AVA,
+                                                     cancel_token=turn["cancel"], trace=turn["trace"]):
+                    sentences.put(sentence)
+                    chat_response.append(sentence)
+            finally:
+                sentences.close()
+            chat_response = " ".join(chat_response)
+        else:
+            with turn["trace"].span("llm.response"):
+                chat_response = Hugging_Face_TEXT.generate(speech)
+            yield utterance(turn, chat_response)
         print("\n\033[92mJARVIS >> {}\033[0m\n".format(chat_response))
         history_manager.update_file(speech, chat_response)
-        speak(chat_response)
-        
+        if cached_response is None and not turn["cancel"].is_cancelled:
+            semantic_cache.add(speech, chat_response, context=previous_answer)
+
         # engine.speak(chat_response, voice="hi-IN-Wavenet-D")
+        return
+
+    task = turn["task"]
+    if turn["image"] or task != "chat":
+        # A dedicated handler was picked, so the speculative default answer is no longer needed
+        turn["default_cancel"].cancel()
+        turn["tasks"].cancel()
+
+    if turn["image"]:
+        yield utterance(turn, "Sure Sir, Generating Your Image")
+        execution_service.submit(decohere_ai.generate, speech)
+
+    elif task == "system control":
+        yield utterance(turn, "Sure Sir. Setting the Required Settings")
+
+        speech_lower = speech.lower()
+        if "dark" in speech_lower or "light" in speech_lower:
+            theme = 0 if "dark" in speech_lower else 1
+            system_theme.WindowsThemeManager().set_theme(theme)
+        elif any(alignment in speech_lower for alignment in ["left", "center", "centre", "right"]):
+            alignment = 0 if "left" in speech_lower else 1
+            taskbar.TaskbarCustomizer().set_alignment(alignment)
+        elif "temperature" in speech_lower:
+            taskbar.TaskbarCustomizer().set_temperature_display(1)
+
+    elif task == "vision":
+        yield utterance(turn, "Analysing, Please Wait")
+        image_path = camera_vision.realtime_vision()
+        response_vison = deepInfra_VISION.generate(speech, system_prompt=INSTRUCTIONS.vison_realtime_v1, image_path=image_path)
+        print("AI>>", response_vison)
+        os.remove(image_path)
+        yield utterance(turn, response_vison)
+
+    elif task == "call":
+        yield utterance(turn, "Sure Sir. Calling")
+        # make_call.call()
+
+    elif task == "website":
+        site_markdown = jenna_reader.fetch_website_content(chrome_latest_url.get_latest_chrome_url())
+        response = openrouter.generate(f"METEDATA: {site_markdown}\n\nQUERY: {speech}", system_prompt="Keep you responses very short and concise")
+        yield utterance(turn, response)
+
+    else:
+        # taskExecutor.process_query(speech)
+        with turn["trace"].span("llm.default_response"):
+            turn["default_response"].result()
+        print("AI>>", turn["default_response"].result())
+        yield utterance(turn, turn["default_response"].result())
+
+
+def speak_utterance(utterance: dict) -> None:
+    """Speaks a reply sentence by sentence through the voice pipeline; saying a hotword aborts it (barge-in)."""
+    if utterance["cancel"].is_cancelled:
+        return
+    # Barge-in: saying a hotword aborts the LLM stream, the pending syntheses and the playback
+    stop_listening = watch_hotword(utterance["cancel"])
+    try:
+        voice_pipeline.speak(utterance["sentences"], started_at=utterance["heard_at"], cancel_token=utterance["cancel"],
+                             trace=utterance["trace"])
+    finally:
+        stop_listening()
+
+
+# Listening, routing, answering and speaking run as overlapping stages, so the microphone
+# keeps capturing the next utterance while the previous answer is still being spoken.
+TurnOrchestrator(listen=listen, classify=classify, respond=respond, speak=speak_utterance,
+                 executor=execution_service.executor()).run()
 
 
 
@@ -0,0 +1,42 @@
+import unittest
+
+from TOOLS.cancellation import CancelToken, watch_hotword
+
+
+class FakeDetector:
+    """Reports a hotword on the calls listed in hits, otherwise listens until it is stopped."""
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.calls = 0
+        self.closed = False
+
+    def listen_for_hotwords(self, stop_event=None, keep_open=False):
+        self.calls += 1
+        self.closed = not keep_open
+        if self.calls in self.hits:
+            return True
+        stop_event.wait()
+        return False
+
+    def stop(self):
+        raise AssertionError("stopping the shared detector would end the next turn's listening too")
+
+
+class WatchHotwordTest(unittest.TestCase):
+    def test_one_detector_serves_every_turn(self):
+        detector = FakeDetector(hits={2})
+        tokens = [CancelToken() for _ in range(3)]
+
+        for token in tokens:
+            stop = watch_hotword(token, detector)
+            token.wait(0.2)
+            stop()
+
+        self.assertEqual([token.is_cancelled for token in tokens], [False, True, False])
+        self.assertEqual(detector.calls, 3)
+        self.assertFalse(detector.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
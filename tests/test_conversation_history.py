@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from TOOLS.Alpaca_DS_Converser import ConversationHistoryManager
+
+
+class ConversationHistoryManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.manager = ConversationHistoryManager(os.path.join(self.directory.name, "conversation_history.jsonl"))
+
+    def tearDown(self):
+        self.manager.log.close()
+        self.directory.cleanup()
+
+    def test_prompt_history_is_a_snapshot(self):
+        self.manager.add_message({"role": "user", "content": "What is the capital of France?"})
+        prompt = self.manager.prompt_history()
+        self.manager.update_file("What is the capital of France?", "Paris.")
+
+        self.assertIsNot(prompt, self.manager.history)
+        self.assertEqual(prompt, [{"role": "user", "content": "What is the capital of France?"}])
+
+    def test_store_history_accepts_the_history_plus_a_message(self):
+        self.manager.add_message({"role": "user", "content": "Hi"})
+        message = {"role": "assistant", "content": "Hello! How can I help?"}
+        self.manager.store_history([*self.manager.history, message])
+        self.manager.store_history(list(self.manager.history))
+
+        self.assertEqual(list(self.manager.history), [{"role": "user", "content": "Hi"}, message])
+        self.assertEqual(self.manager.count_tokens(), sum(self.manager.token_counts))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from TOOLS.conversation_log import ConversationLog, read_history
+from TOOLS.persistence import PersistenceWriter
+
+
+def turn(number):
+    return [{"role": "user", "content": f"question {number}"}, {"role": "assistant", "content": f"answer {number}"}]
+
+
+class ConversationLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "history.jsonl")
+        self.writer = PersistenceWriter(interval=60)
+
+    def tearDown(self):
+        self.writer.close()
+        self.directory.cleanup()
+
+    def open_log(self, **kwargs):
+        log = ConversationLog(self.path, writer=self.writer, **kwargs)
+        self.addCleanup(log.close)
+        return log
+
+    def test_reopening_reads_the_tail_and_older_messages_from_the_file(self):
+        log = self.open_log(tail_messages=4, keep_messages=4)
+        for number in range(10):
+            log.append(turn(number))
+        log.close()
+
+        reopened = self.open_log(tail_messages=4, keep_messages=4)
+
+        self.assertEqual(list(reopened.tail), turn(8) + turn(9))
+        self.assertEqual(reopened.last(2), turn(9))
+        self.assertEqual(reopened.last(6), turn(7) + turn(8) + turn(9))
+
+    def test_truncate_last_removes_the_newest_message_from_the_file(self):
+        log = self.open_log()
+        log.append(turn(1) + [{"role": "user", "content": "unanswered"}])
+
+        self.assertEqual(log.truncate_last(), {"role": "user", "content": "unanswered"})
+        log.append(turn(2))
+        log.close()
+
+        self.assertEqual(self.open_log().last(10), turn(1) + turn(2))
+
+    def test_rotation_archives_the_file_and_keeps_the_newest_messages(self):
+        log = self.open_log(keep_messages=2)
+        for number in range(5):
+            log.append(turn(number))
+
+        archive = log.rotate()
+        log.append(turn(5))
+        log.close()
+
+        self.assertTrue(os.path.exists(archive))
+        self.assertEqual(self.open_log(keep_messages=2).last(10), turn(4) + turn(5))
+        self.assertEqual(list(read_history(self.path, keep_messages=2)), [message for number in range(6) for message in turn(number)])
+
+    def test_a_torn_last_line_is_cut_off_on_startup(self):
+        log = self.open_log()
+        log.append(turn(1))
+        log.close()
+        with open(self.path, "ab") as file:
+            file.write(b'{"role": "user", "content": "cut off mid-wr')
+
+        reopened = self.open_log()
+        reopened.append(turn(2))
+        reopened.close()
+
+        self.assertEqual(self.open_log().last(10), turn(1) + turn(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
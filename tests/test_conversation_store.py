@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from TOOLS.SQLite_DS_Converser import ConversationStore
+
+
+class ConversationStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ConversationStore(os.path.join(self.directory.name, "history.sqlite3"), batch_interval=0.05)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_a_failing_turn_is_dropped_and_the_writer_keeps_running(self):
+        self.store._writer_db.execute("CREATE TRIGGER reject BEFORE INSERT ON turns WHEN new.user = 'bad' "
+                                      "BEGIN SELECT RAISE(ABORT, 'rejected'); END")
+        for user in ["first", "bad", "second"]:
+            self.store.add_turn(user, "ok")
+        self.store.flush()
+
+        self.store.add_turn("third", "ok")
+        self.store.flush()
+
+        self.assertEqual([turn["user"] for turn in self.store.last_turns(10)], ["first", "second", "third"])
+        self.assertTrue(all(turn["id"] is not None for turn in self.store.last_turns(10)))
+
+    def test_add_turn_rejects_missing_text(self):
+        with self.assertRaises(TypeError):
+            self.store.add_turn("What time is it?", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+import unittest
+
+from TOOLS.cancellation import CancelToken
+from TOOLS.hedged_generation import HedgedRouter
+from TOOLS.provider_registry import ProviderRegistry
+
+
+async def fake_provider(ttft, text):
+    await asyncio.sleep(ttft)
+    for word in text.split():
+        yield word + " "
+
+
+class HedgedRouterTest(unittest.TestCase):
+    def test_losing_the_race_counts_as_slow(self):
+        registry = ProviderRegistry(path=None)
+        router = HedgedRouter([("slow", lambda conversation, system_prompt: fake_provider(5.0, "late")),
+                               ("fast", lambda conversation, system_prompt: fake_provider(0.1, "Paris."))],
+                              hedge_delay=0.05, registry=registry, prints=False)
+
+        self.assertEqual(router.generate([{"role": "user", "content": "capital of France"}], ""), "Paris.")
+        self.assertIsNotNone(registry._scores["slow"]["ttft"])
+
+    def test_barge_in_does_not_count_as_slow(self):
+        registry = ProviderRegistry(path=None)
+        router = HedgedRouter([("slow", lambda conversation, system_prompt: fake_provider(5.0, "late"))],
+                              registry=registry, prints=False)
+        token = CancelToken()
+        threading.Timer(0.2, token.cancel).start()
+
+        self.assertEqual(router.generate([{"role": "user", "content": "capital of France"}], "", token), "")
+        self.assertNotIn("slow", registry._scores)
+
+
+if __name__ == "__main__":
+    unittest.main()
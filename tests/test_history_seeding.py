@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+
+from TOOLS.Alpaca_DS_Converser import ConversationHistoryManager
+from TOOLS.SQLite_DS_Converser import ConversationStore
+from TOOLS.conversation_log import read_history
+from TOOLS.retrieval_memory import RetrievalMemory
+
+
+def turn(index):
+    return [{"role": "user", "content": f"Question {index} about Jaipur"}, {"role": "assistant", "content": f"Answer {index}"}]
+
+
+def write_log(path, messages):
+    with open(path, "w", encoding="utf-8") as file:
+        file.writelines(json.dumps(message) + "\n" for message in messages)
+
+
+class HistorySeedingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.directory.name, "conversation_history.jsonl")
+        # A rotated archive of turns 0-2 and the live file, which starts with the two messages rotate() carried over
+        write_log(os.path.join(self.directory.name, "conversation_history-20260101-120000.jsonl"), turn(0) + turn(1) + turn(2))
+        write_log(self.log_path, turn(2) + turn(3) + [{"role": "user", "content": "An unanswered question"}])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_history_yields_carried_over_messages_once(self):
+        self.assertEqual(list(read_history(self.log_path, keep_messages=2)),
+                         turn(0) + turn(1) + turn(2) + turn(3) + [{"role": "user", "content": "An unanswered question"}])
+
+    def test_empty_store_and_retriever_are_seeded_from_the_whole_log(self):
+        store = ConversationStore(os.path.join(self.directory.name, "history.sqlite3"))
+        retriever = RetrievalMemory(store, os.path.join(self.directory.name, "retrieval_memory"))
+        manager = ConversationHistoryManager(self.log_path, store=store, retriever=retriever)
+        store.flush()
+
+        self.assertEqual([turn["user"] for turn in store.last_turns(10)], [f"Question {index} about Jaipur" for index in range(4)])
+        self.assertEqual(retriever.size, 4)
+        self.assertEqual(retriever.search("when was the question 1 about Jaipur", k=1)[0]["assistant"], "Answer 1")
+
+        # A store that already holds turns is left alone
+        manager.log.close()
+        ConversationHistoryManager(self.log_path, store=store, retriever=retriever).log.close()
+        store.flush()
+        self.assertEqual(len(store.last_turns(10)), 4)
+        self.assertEqual(retriever.size, 4)
+        store.close()
+        retriever.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
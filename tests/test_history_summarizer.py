@@ -0,0 +1,52 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from TOOLS.history_summarizer import MAX_PENDING_MESSAGES, HistorySummarizer
+
+
+def messages(start, stop):
+    return [{"role": "user", "content": f"message {index}"} for index in range(start, stop)]
+
+
+class HistorySummarizerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "summaries.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_messages_trimmed_during_a_compaction_are_not_removed_twice(self):
+        started, release, calls = threading.Event(), threading.Event(), []
+
+        def generate(prompt, **kwargs):
+            calls.append(prompt)
+            if len(calls) > 1:
+                return None  # Later compactions fail, so the queue stays as the first one left it
+            started.set()
+            release.wait(5)
+            return "A summary."
+
+        summarizer = HistorySummarizer(self.path, generate=generate, batch_messages=2)
+        summarizer.submit(messages(0, 2))
+        self.assertTrue(started.wait(5))
+        # Overflows the queue while the first batch is being summarized: its two messages are dropped from the front
+        summarizer.submit(messages(2, MAX_PENDING_MESSAGES + 2))
+        release.set()
+        summarizer.flush()
+
+        self.assertEqual(summarizer.version, 1)
+        self.assertEqual(summarizer._pending, messages(2, MAX_PENDING_MESSAGES + 2))
+
+    def test_unsummarized_messages_survive_a_restart(self):
+        summarizer = HistorySummarizer(self.path, generate=lambda prompt, **kwargs: "A summary.", batch_messages=6)
+        summarizer.submit(messages(0, 3))
+        summarizer.flush()
+
+        self.assertEqual(HistorySummarizer(self.path, generate=lambda prompt, **kwargs: None)._pending, messages(0, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import unittest
+
+from TOOLS.persistence import PersistenceWriter
+
+
+class PersistenceWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.writer = PersistenceWriter(interval=60)
+
+    def tearDown(self):
+        self.writer.close()
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def read(self, name):
+        with open(self.path(name)) as file:
+            return file.read()
+
+    def test_a_commit_renames_only_after_every_file_is_written(self):
+        seen = []
+        self.writer.write(self.path("first.json"), "old")
+        self.writer.write(self.path("first.json"), "new")
+        self.writer.write(self.path("second.json"), lambda: seen.append(os.path.exists(self.path("first.json"))) or "second")
+        self.writer.register(lambda: seen.append(self.read("second.json")))
+
+        self.writer.flush()
+
+        self.assertEqual(seen, [False, "second"])
+        self.assertEqual((self.read("first.json"), self.read("second.json")), ("new", "second"))
+        self.assertEqual((self.writer.counters["requested"], self.writer.counters["written"]), (3, 2))
+
+    def test_close_commits_what_is_pending(self):
+        synced = []
+        self.writer.register(lambda: synced.append(True))
+        self.writer.write_json(self.path("alarms.json"), [{"time": "07:00"}])
+
+        self.writer.close()
+        self.writer.close()
+
+        self.assertEqual(json.loads(self.read("alarms.json")), [{"time": "07:00"}])
+        self.assertEqual(synced, [True])
+        self.writer._thread.join(1)
+        self.assertFalse(self.writer._thread.is_alive())
+
+    def test_a_failed_write_is_retried_at_the_next_commit(self):
+        # A directory in the way makes the rename fail until it is gone
+        os.mkdir(self.path("scores.json"))
+        self.writer.write(self.path("scores.json"), "scores")
+        self.writer.flush()
+
+        self.assertEqual(self.writer.counters["failed"], 1)
+        self.assertEqual(os.listdir(self.directory.name), ["scores.json"])
+
+        os.rmdir(self.path("scores.json"))
+        self.writer.flush()
+
+        self.assertEqual(self.read("scores.json"), "scores")
+        self.assertEqual(os.listdir(self.directory.name), ["scores.json"])
+
+    def test_a_newer_write_replaces_the_failed_one(self):
+        attempts = []
+
+        def render():
+            attempts.append(True)
+            raise ValueError("not serializable")
+
+        self.writer.write(self.path("state.json"), render)
+        self.writer.flush()
+        self.writer.write(self.path("state.json"), "fixed")
+        self.writer.flush()
+        self.writer.flush()
+
+        self.assertEqual(len(attempts), 1)
+        self.assertEqual(self.read("state.json"), "fixed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import collections
+import os
+import tempfile
+import time
+import unittest
+
+from TOOLS.response_cache import ResponseCache, cache_key, cached
+
+
+class CacheKeyTest(unittest.TestCase):
+    def test_key_ignores_argument_order_and_container_type(self):
+        history = [{"role": "user", "content": "open youtube"}]
+        first = cache_key({"provider": "demo", "payload": {"prompt": history, "temperature": 0.0}})
+        second = cache_key({"payload": {"temperature": 0.0, "prompt": collections.deque(history)}, "provider": "demo"})
+
+        self.assertEqual(first, second)
+
+    def test_key_changes_with_any_parameter(self):
+        base = {"provider": "demo", "payload": {"prompt": "open youtube", "temperature": 0.0}}
+
+        self.assertNotEqual(cache_key(base), cache_key({**base, "provider": "other"}))
+        self.assertNotEqual(cache_key(base), cache_key({**base, "payload": {"prompt": "open youtube", "temperature": 0.1}}))
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_entries_expire_after_their_ttl(self):
+        cache = ResponseCache(path=None, ttls={"default": 0.05, "classifier": 60})
+        cache.put("short", "gone soon")
+        cache.put("long", "still here", prompt_class="classifier")
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get("short"))
+        self.assertEqual(cache.get("long"), "still here")
+
+    def test_high_temperature_bypasses_the_cache(self):
+        cache = ResponseCache(path=None)
+        calls = []
+
+        @cached("demo", cache=cache)
+        def generate(prompt, temperature=0.0):
+            calls.append(prompt)
+            return f"answer {len(calls)}"
+
+        self.assertEqual([generate("hi"), generate("hi")], ["answer 1", "answer 1"])
+        self.assertEqual([generate("hi", temperature=0.9), generate("hi", temperature=0.9)], ["answer 2", "answer 3"])
+        self.assertEqual(cache.stats()["bypassed"], 2)
+
+    def test_disk_tier_survives_a_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.sqlite3")
+            ResponseCache(path).put("key", "verdict", prompt_class="classifier")
+
+            reopened = ResponseCache(path)
+
+            self.assertEqual(reopened.get("key"), "verdict")
+            self.assertEqual(reopened.get("key"), "verdict")
+            self.assertEqual((reopened.stats()["disk_hits"], reopened.stats()["memory_hits"]), (1, 1))
+            self.assertIsNone(reopened.get("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from TOOLS import retrieval_memory
+from TOOLS.SQLite_DS_Converser import ConversationStore
+from TOOLS.retrieval_memory import RetrievalMemory
+
+
+class RetrievalMemoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.memory_dir = os.path.join(self.directory.name, "retrieval_memory")
+        self.store = ConversationStore(os.path.join(self.directory.name, "history.sqlite3"), batch_interval=0.05)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def add(self, memory, user, assistant="Noted."):
+        memory.add(self.store.add_turn(user, assistant), user)
+
+    def test_grows_past_its_capacity_and_reopens_without_a_copy_of_the_text(self):
+        capacity, retrieval_memory.INITIAL_CAPACITY = retrieval_memory.INITIAL_CAPACITY, 4
+        try:
+            memory = RetrievalMemory(self.store, self.memory_dir)
+            self.add(memory, "My sister's wedding is in Jaipur on the 14th of December", "How exciting!")
+            for turn in range(10):
+                self.add(memory, f"Question number {turn} about the cricket score")
+            memory.close()
+        finally:
+            retrieval_memory.INITIAL_CAPACITY = capacity
+
+        self.assertEqual(sorted(os.listdir(self.memory_dir)), ["ids.i64", "vectors.f32"])
+        reopened = RetrievalMemory(self.store, self.memory_dir)
+        self.assertEqual(reopened.size, 11)
+        self.assertEqual([turn["assistant"] for turn in reopened.search("when is the wedding in Jaipur?", k=1)], ["How exciting!"])
+        reopened.close()
+
+    def test_a_new_memory_indexes_the_turns_already_in_the_store(self):
+        self.store.add_turn("I'm allergic to peanuts", "Noted, no peanuts.")
+        self.store.add_turn("Play some music", "Playing.")
+        self.store.flush()
+
+        memory = RetrievalMemory(self.store, self.memory_dir)
+
+        self.assertEqual(memory.size, 2)
+        self.assertEqual([turn["user"] for turn in memory.search("what am I allergic to, peanuts?")], ["I'm allergic to peanuts"])
+        memory.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
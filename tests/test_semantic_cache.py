@@ -0,0 +1,44 @@
+import unittest
+
+from TOOLS.semantic_cache import SemanticCache
+
+
+class SemanticCacheTest(unittest.TestCase):
+    def test_short_follow_ups_are_neither_cached_nor_served(self):
+        cache = SemanticCache()
+        cache.add("why", "Because it rained.")
+        cache.add("Why is the sky blue?", "Rayleigh scattering.")
+
+        self.assertIsNone(cache.lookup("why"))
+        self.assertIsNone(cache.lookup("tell me more"))
+        self.assertEqual(cache.lookup("why is the sky blue"), "Rayleigh scattering.")
+
+    def test_follow_ups_only_hit_after_the_same_exchange(self):
+        cache = SemanticCache()
+        cache.add("How old is he now?", "He is 78.", context="Joe Biden is the president.")
+
+        self.assertEqual(cache.lookup("how old is he now", context="Joe Biden is the president."), "He is 78.")
+        self.assertIsNone(cache.lookup("how old is he now", context="Virat Kohli scored a century."))
+
+    def test_standalone_questions_hit_in_any_context(self):
+        cache = SemanticCache()
+        cache.add("What is the capital of France?", "Paris.", context="It is sunny today.")
+
+        self.assertEqual(cache.lookup("whats the capital of France", context="Hello!"), "Paris.")
+
+    def test_numbers_and_directions_must_match_exactly(self):
+        cache = SemanticCache()
+        cache.add("Convert 10 dollars to rupees", "About 835 rupees.")
+        cache.add("What is 25 times 4?", "100.")
+        cache.add("Set a reminder for 5 pm", "Reminder set for 5 PM.")
+
+        self.assertEqual(cache.lookup("please convert 10 dollars to rupees"), "About 835 rupees.")
+        self.assertIsNone(cache.lookup("convert 10 rupees to dollars"))
+        self.assertIsNone(cache.lookup("convert 100 dollars to rupees"))
+        self.assertIsNone(cache.lookup("what is 4 times 25"))
+        self.assertIsNone(cache.lookup("set a reminder for 6 pm"))
+        self.assertIsNone(cache.lookup("set a reminder for six pm"))
+
+
+if __name__ == "__main__":
+    unittest.main()
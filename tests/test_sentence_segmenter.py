@@ -0,0 +1,31 @@
+import unittest
+
+from TOOLS.sentence_segmenter import SentenceSegmenter, split_sentences
+
+
+class SentenceSegmenterTest(unittest.TestCase):
+    def test_single_digit_ends_a_sentence(self):
+        self.assertEqual(split_sentences("Version 2. Done now."), ["Version 2.", "Done now."])
+        self.assertEqual(split_sentences("2 plus 2 is 4. Anything else?"), ["2 plus 2 is 4.", "Anything else?"])
+
+    def test_initials_and_list_markers_do_not_end_a_sentence(self):
+        self.assertEqual(split_sentences("A. P. J. Kalam was born in 1931. He was a scientist."),
+                         ["A. P. J. Kalam was born in 1931.", "He was a scientist."])
+        self.assertEqual(split_sentences("1. India has 28 states. 2. Delhi is the capital."),
+                         ["1. India has 28 states.", "2. Delhi is the capital."])
+
+    def test_no_is_an_abbreviation_only_before_a_number(self):
+        self.assertEqual(split_sentences("Is it raining? No. It's sunny."), ["Is it raining?", "No.", "It's sunny."])
+        self.assertEqual(split_sentences("Take platform No. 5 for Jaipur."), ["Take platform No. 5 for Jaipur."])
+
+    def test_no_is_split_as_soon_as_the_next_word_arrives(self):
+        segmenter = SentenceSegmenter()
+
+        self.assertEqual(segmenter.feed("Is it raining? No. "), ["Is it raining?"])
+        self.assertEqual(segmenter.feed("It"), ["No."])
+        self.assertEqual(segmenter.feed("'s sunny."), [])
+        self.assertEqual(segmenter.flush(), ["It's sunny."])
+
+
+if __name__ == "__main__":
+    unittest.main()
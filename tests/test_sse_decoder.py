@@ -0,0 +1,61 @@
+import json
+import unittest
+
+from TOOLS.sse_decoder import SSEDecoder, iter_deltas
+
+
+def event(text):
+    return b"data: " + json.dumps({"choices": [{"delta": {"content": text}}]}, ensure_ascii=False).encode("utf-8") + b"\n\n"
+
+
+class FakeResponse:
+    """A streamed requests response without read1, so iter_chunks falls back to iter_content."""
+
+    raw = None
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_content(self, chunk_size=None):
+        return iter(self.chunks)
+
+
+def split_every(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class SSEDecoderTest(unittest.TestCase):
+    def test_event_split_across_chunks(self):
+        decoder = SSEDecoder()
+
+        self.assertEqual(decoder.feed(b"da"), [])
+        self.assertEqual(decoder.feed(b"ta: {\"a\""), [])
+        self.assertEqual(decoder.feed(b": 1}\r"), [])
+        self.assertEqual(decoder.feed(b"\n\ndata: 2\n"), [b"{\"a\": 1}", b"2"])
+
+    def test_multibyte_utf8_split_across_chunks(self):
+        stream = event("नमस्ते") + event(" दुनिया 👋")
+
+        deltas = list(iter_deltas(FakeResponse(split_every(stream, 1))))
+
+        self.assertEqual("".join(deltas), "नमस्ते दुनिया 👋")
+
+    def test_done_ends_the_stream(self):
+        stream = event("Hello") + b"data: [DONE]\n\n" + event("after the end")
+
+        self.assertEqual(list(iter_deltas(FakeResponse(split_every(stream, 7)))), ["Hello"])
+
+    def test_comments_and_keep_alives_are_skipped(self):
+        stream = b": keep-alive\n\n" + b"event: message\nid: 1\n" + event("Hi") + b":\n\nretry: 1000\n" + event(" there")
+
+        self.assertEqual(list(iter_deltas(FakeResponse(split_every(stream, 5)))), ["Hi", " there"])
+
+    def test_unterminated_last_line_is_flushed(self):
+        decoder = SSEDecoder()
+
+        self.assertEqual(decoder.feed(b"data: last"), [])
+        self.assertEqual(decoder.flush(), [b"last"])
+
+
+if __name__ == "__main__":
+    unittest.main()
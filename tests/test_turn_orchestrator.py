@@ -0,0 +1,59 @@
+import unittest
+
+from TOOLS.turn_orchestrator import TurnOrchestrator
+
+
+class TurnOrchestratorTest(unittest.TestCase):
+    def run_pipeline(self, utterances, respond):
+        utterances = iter(utterances)
+        spoken = []
+
+        def listen():
+            speech = next(utterances, None)
+            if speech is None:
+                orchestrator.stop()
+            return speech
+
+        orchestrator = TurnOrchestrator(listen, lambda speech: speech, respond, spoken.append)
+        orchestrator.run()
+        return spoken
+
+    def test_respond_raising_mid_stream_does_not_stop_later_turns(self):
+        def respond(turn):
+            yield f"Sure, {turn}."
+            if turn == "broken":
+                raise ConnectionError("provider down")
+            yield f"Answer to {turn}"
+
+        spoken = self.run_pipeline(["first", "broken", "last"], respond)
+
+        self.assertEqual(spoken, ["Sure, first.", "Answer to first", "Sure, broken.", "Sure, last.", "Answer to last"])
+
+    def test_respond_raising_before_first_utterance_is_skipped(self):
+        def respond(turn):
+            if turn == "broken":
+                raise ValueError("bad turn")
+            return turn.upper()
+
+        self.assertEqual(self.run_pipeline(["broken", "ok"], respond), ["OK"])
+
+    def test_listen_raising_keeps_listening(self):
+        results = iter([OSError("microphone unplugged"), "first", RuntimeError("recognizer failed"), "last", None])
+        spoken = []
+
+        def listen():
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            if result is None:
+                orchestrator.stop()
+            return result
+
+        orchestrator = TurnOrchestrator(listen, lambda speech: speech, str.upper, spoken.append)
+        orchestrator.run()
+
+        self.assertEqual(spoken, ["FIRST", "LAST"])
+
+
+if __name__ == "__main__":
+    unittest.main()